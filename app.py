@@ -323,6 +323,20 @@ def _migrate_schema():
     except Exception:
         pass  # index already exists or table not yet created
 
+    # Lookup indexes for collective invoicing (unbilled notes per partner)
+    for index_sql in (
+        'CREATE INDEX IF NOT EXISTS "ix_delivery_note_unbilled" '
+        'ON "delivery_note" (invoiced, primary_order_id)',
+        'CREATE INDEX IF NOT EXISTS "ix_delivery_note_order_note" '
+        'ON "delivery_note_order" (delivery_note_id, order_id)',
+        'CREATE INDEX IF NOT EXISTS "ix_delivery_note_order_order" '
+        'ON "delivery_note_order" (order_id, delivery_note_id)',
+    ):
+        try:
+            db.session.execute(text(index_sql))
+        except Exception:
+            pass  # table not yet created
+
     db.session.commit()
 
 
@@ -565,7 +579,7 @@ def _seed_subscription_plans():
     from models import SubscriptionPlan
     from decimal import Decimal
 
-    if SubscriptionPlan.query.count() > 0:
+    if db.session.query(SubscriptionPlan.query.exists()).scalar():
         return
 
     plans = [
@@ -616,6 +630,9 @@ def create_app():
     app = Flask(__name__)
     app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Room for every statement shape the app and db_tools use, so hot
+    # queries are compiled once rather than evicted from the default 500
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"query_cache_size": 1200}
     app.secret_key = app_cfg.secret_key
     app.config["APP_CONFIG"] = app_cfg
     app.config["EMAIL_CONFIG"] = email_cfg
@@ -635,6 +652,18 @@ def create_app():
     )
     app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(hours=8)
 
+    # Template caching: outside debug mode skip per-render mtime checks and
+    # persist compiled template bytecode so restarts don't re-parse them.
+    if not app.debug:
+        from jinja2 import FileSystemBytecodeCache
+
+        app.config["TEMPLATES_AUTO_RELOAD"] = False
+        jinja_cache_dir = os.path.join(app.instance_path, "jinja_cache")
+        os.makedirs(jinja_cache_dir, exist_ok=True)
+        app.jinja_env.auto_reload = False
+        app.jinja_env.cache_size = 400
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=jinja_cache_dir)
+
     # Initialize extensions
     csrf.init_app(app)
     limiter.init_app(app)
@@ -8,10 +8,43 @@ import secrets
 
 import yaml
 
-from config_models import AppConfig, EmailConfig, GopayConfig, SuperfakturaConfig
+from config_models import (
+    AppConfig,
+    EmailConfig,
+    GopayConfig,
+    SuperfakturaConfig,
+    default_pdf_workers,
+)
 
 logger = logging.getLogger(__name__)
 
+# Accepted spellings of a true boolean in env vars / config values
+_TRUTHY = frozenset({"true", "1", "yes", "on", "y", "t"})
+
+# libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Parsed config.yaml keyed by (path, mtime_ns, size)
+_yaml_cache: dict = {}
+
+
+def _read_config_file(config_path: str) -> dict:
+    """Return the parsed YAML at *config_path*, re-reading only when it changes.
+
+    The parsed dict is shared between calls and must be treated as read-only.
+    """
+    try:
+        stat = os.stat(config_path)
+    except OSError:
+        return {}
+    key = (config_path, stat.st_mtime_ns, stat.st_size)
+    if _yaml_cache.get("key") == key:
+        return _yaml_cache["raw"]
+    with open(config_path, "r", encoding="utf-8") as handle:
+        raw = yaml.load(handle, Loader=_YAML_LOADER) or {}
+    _yaml_cache.update(key=key, raw=raw)
+    return raw
+
 
 def load_config():
     """Load configuration from *config.yaml* with env-var overrides.
@@ -20,10 +53,7 @@ def load_config():
     Returns (AppConfig, EmailConfig, SuperfakturaConfig, GopayConfig, database_uri).
     """
     config_path = os.environ.get("CONFIG_PATH", "config.yaml")
-    raw: dict = {}
-    if os.path.exists(config_path):
-        with open(config_path, "r", encoding="utf-8") as handle:
-            raw = yaml.safe_load(handle) or {}
+    raw = _read_config_file(config_path)
 
     app_cfg = raw.get("app", {})
     email_cfg = raw.get("email", {})
@@ -45,12 +75,15 @@ def load_config():
             secret_key=secret_key,
             base_currency=app_cfg.get("base_currency", "EUR"),
             show_prices_default=app_cfg.get("show_prices_default", True),
+            pdf_workers=max(1, int(os.environ.get(
+                "PDF_WORKERS", app_cfg.get("pdf_workers", default_pdf_workers())
+            ))),
         ),
         EmailConfig(
             enabled=os.environ.get(
                 "EMAIL_ENABLED", str(email_cfg.get("enabled", False))
-            ).lower()
-            in ("true", "1", "yes"),
+            ).strip().lower()
+            in _TRUTHY,
             smtp_host=os.environ.get("SMTP_HOST", email_cfg.get("smtp_host", "")),
             smtp_port=int(os.environ.get("SMTP_PORT", email_cfg.get("smtp_port", 587))),
             smtp_user=os.environ.get("SMTP_USER", email_cfg.get("smtp_user", "")),
@@ -61,8 +94,8 @@ def load_config():
         SuperfakturaConfig(
             enabled=os.environ.get(
                 "SUPERFAKTURA_ENABLED", str(sf_cfg.get("enabled", False))
-            ).lower()
-            in ("true", "1", "yes"),
+            ).strip().lower()
+            in _TRUTHY,
             api_email=os.environ.get("SUPERFAKTURA_API_EMAIL", sf_cfg.get("api_email", "")),
             api_key=os.environ.get("SUPERFAKTURA_API_KEY", sf_cfg.get("api_key", "")),
             company_id=os.environ.get(
@@ -76,8 +109,8 @@ def load_config():
         GopayConfig(
             enabled=os.environ.get(
                 "GOPAY_ENABLED", str(gopay_cfg.get("enabled", False))
-            ).lower()
-            in ("true", "1", "yes"),
+            ).strip().lower()
+            in _TRUTHY,
             goid=os.environ.get("GOPAY_GOID", gopay_cfg.get("goid", "")),
             client_id=os.environ.get("GOPAY_CLIENT_ID", gopay_cfg.get("client_id", "")),
             client_secret=os.environ.get("GOPAY_CLIENT_SECRET", gopay_cfg.get("client_secret", "")),
@@ -91,7 +124,18 @@ def load_config():
 
 
 def enable_sqlite_fks(dbapi_conn, _connection_record):
-    """Enable foreign key enforcement for SQLite connections."""
+    """Enable foreign key enforcement and tune SQLite connections.
+
+    WAL lets readers proceed while a write is in progress and, with
+    ``synchronous=NORMAL``, saves an fsync per commit without risking
+    corruption.  The remaining pragmas keep temp tables and a 20 MB page
+    cache in memory and read the file through mmap.
+    """
     cursor = dbapi_conn.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-20000")
     cursor.close()
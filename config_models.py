@@ -1,4 +1,10 @@
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
+
+
+def default_pdf_workers() -> int:
+    """Default size of the batch PDF pool: a few processes, never more than cores."""
+    return min(4, os.cpu_count() or 1)
 
 
 @dataclass
@@ -7,6 +13,7 @@ class AppConfig:
     secret_key: str
     base_currency: str
     show_prices_default: bool
+    pdf_workers: int = field(default_factory=default_pdf_workers)
 
 
 @dataclass
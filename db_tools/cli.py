@@ -5,7 +5,6 @@ Provides both Flask CLI integration and standalone CLI functionality.
 
 from __future__ import annotations
 
-import os
 import sys
 from pathlib import Path
 from typing import Optional
@@ -262,12 +261,10 @@ def import_data(file: str, entity_type: str, preview: bool, conflict_mode: str):
                 type=click.Choice(["partner", "contact", "product", "bundle", "bundle_item", "vehicle"]))
 def template(entity_type: str):
     """Generate CSV import template."""
-    with get_app_context():
-        from db_tools.operations.import_data import DataImporter
+    # Templates are static text; no app context or models needed.
+    from db_tools.config import IMPORT_TEMPLATES
 
-        importer = DataImporter()
-        template_content = importer.generate_template(entity_type)
-        click.echo(template_content)
+    click.echo(IMPORT_TEMPLATES[entity_type])
 
 
 # ---------------------------------------------------------------------------
@@ -23,7 +23,7 @@ CONFIG_TABLES = frozenset({
 
 # FK-safe deletion order (leaf tables first, foundation tables last)
 # This order respects foreign key constraints
-DELETION_ORDER = [
+DELETION_ORDER = (
     # Level 1: Leaf tables (no incoming FKs, or only from cascade-delete parents)
     "audit_log",
     "product_price_history",
@@ -61,11 +61,11 @@ DELETION_ORDER = [
     "numbering_config",
     "app_setting",
     "pdf_template",
-]
+)
 
 # Import order (foundation tables first, dependent tables last)
 # Reverse of deletion order for the data tables
-IMPORT_ORDER = [
+IMPORT_ORDER = (
     "user",
     "partner",
     "partner_address",
@@ -84,7 +84,7 @@ IMPORT_ORDER = [
     "invoice",
     "invoice_item",
     "logistics_plan",
-]
+)
 
 # Entity type to model class mapping
 ENTITY_MODEL_MAP = {
@@ -115,3 +115,38 @@ ENTITY_MODEL_MAP = {
     "bundle_price_history": "BundlePriceHistory",
     "product_restriction": "ProductRestriction",
 }
+
+# CSV import templates (header row + example row) per entity type.
+# Kept here so the ``template`` CLI command can print them without
+# building an application context.
+IMPORT_TEMPLATES = {
+    "partner": (
+        "name,street,street_number,postal_code,city,ico,dic,ic_dph,"
+        "email,phone,price_level,discount_percent,group_code,note\n"
+        '"ABC Company s.r.o.",Hlavná,15,81101,Bratislava,12345678,'
+        '2012345678,SK2012345678,info@abc.sk,+421903111222,A,5.0,STAVBY,'
+        '"Important customer"'
+    ),
+    "contact": (
+        "partner_name,name,email,phone,role,can_order,can_receive\n"
+        '"ABC Company s.r.o.","Ján Novák",jan@abc.sk,+421903111222,'
+        "Manager,true,true"
+    ),
+    "product": (
+        "product_number,name,description,price,vat_rate,is_service,"
+        "discount_excluded\n"
+        'PROD-001,"Cement 25kg","Portland cement bag",6.50,20.0,false,false'
+    ),
+    "bundle": (
+        "bundle_number,name,bundle_price,discount_excluded\n"
+        'BUN-001,"Starter Pack",99.00,false'
+    ),
+    "bundle_item": (
+        "bundle_name,product_name,quantity\n"
+        '"Starter Pack","Cement 25kg",10'
+    ),
+    "vehicle": (
+        "name,registration_number,notes,active\n"
+        '"MAN TGS 26.400",BA-123AB,"Heavy truck",true'
+    ),
+}
@@ -1,7 +1,24 @@
-"""Core utilities for database tools."""
+"""Core utilities for database tools.
 
-from db_tools.core.normalization import normalize_for_matching
-from db_tools.core.backup import BackupManager
-from db_tools.core.database_inspector import DatabaseInspector
+The helpers are resolved lazily (PEP 562) so that importing a light module
+such as ``db_tools.core.normalization`` does not load SQLAlchemy models.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "normalize_for_matching": "db_tools.core.normalization",
+    "BackupManager": "db_tools.core.backup",
+    "DatabaseInspector": "db_tools.core.database_inspector",
+}
 
 __all__ = ["normalize_for_matching", "BackupManager", "DatabaseInspector"]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
@@ -2,16 +2,131 @@
 
 from __future__ import annotations
 
+import heapq
+import importlib.util
 import os
+import re
 import shutil
+import sqlite3
 import subprocess
 from datetime import datetime, timedelta
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import List, Optional, Tuple
-from urllib.parse import urlparse
+from urllib.parse import ParseResult, urlparse
 
 from db_tools.config import BACKUP_DIR, BACKUP_RETENTION_COUNT, BACKUP_RETENTION_DAYS
 
+# Zstandard compression for backups (optional dependency).  Only its
+# presence is checked here; the module itself is imported on first use so
+# commands that never (de)compress don't pay for loading it.
+_HAS_ZSTD = importlib.util.find_spec("zstandard") is not None
+
+_ZSTD_LEVEL = 6
+_ZSTD_SUFFIX = ".zst"
+_PG_DUMP_SUFFIX = ".dump"
+_PG_DUMP_MAGIC = b"PGDMP"
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+_BACKUP_SUFFIXES = (".db", ".sql", ".db.zst", ".sql.zst", _PG_DUMP_SUFFIX)
+
+# Pages copied per step by the SQLite online backup API.  Between steps the
+# source read lock is released so writers are not blocked for the whole copy.
+_SQLITE_BACKUP_PAGES = 1024
+
+
+def _sqlite_copy(src_path: str, dst_path: str, checkpoint: bool = False) -> None:
+    """Copy the SQLite database at *src_path* into *dst_path*.
+
+    With *checkpoint* the source WAL is folded into the main file first,
+    keeping the snapshot (and the WAL itself) small.
+    """
+    src = sqlite3.connect(src_path)
+    try:
+        if checkpoint:
+            src.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        dst = sqlite3.connect(dst_path)
+        try:
+            src.backup(dst, pages=_SQLITE_BACKUP_PAGES)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def _fast_copy(src_path: str, dst_path: str) -> None:
+    """Copy a file like ``shutil.copy2`` but in-kernel where possible.
+
+    ``os.copy_file_range`` lets Linux copy (or reflink) without moving the
+    bytes through userspace.  Where it is unavailable or refused (other
+    platforms, cross-device copies), ``shutil.copyfile`` is used, which
+    itself prefers ``sendfile``.
+    """
+    copied = False
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+                copied = remaining == 0
+        except OSError:
+            copied = False
+    if not copied:
+        shutil.copyfile(src_path, dst_path)
+    shutil.copystat(src_path, dst_path)
+
+
+def _zstd():
+    """Return the ``zstandard`` module, importing it on first call."""
+    import zstandard  # type: ignore[import-untyped]
+
+    return zstandard
+
+
+def _compress_file(src_path: Path, dst_path: Path) -> None:
+    """Stream-compress *src_path* into *dst_path* with zstd."""
+    cctx = _zstd().ZstdCompressor(level=_ZSTD_LEVEL, threads=-1)
+    with open(src_path, "rb") as fin, open(dst_path, "wb") as fout:
+        cctx.copy_stream(fin, fout)
+
+
+def _decompress_file(src_path: Path, dst_path: Path) -> None:
+    """Stream-decompress the zstd file *src_path* into *dst_path*."""
+    if not _HAS_ZSTD:
+        raise RuntimeError("zstandard is not installed; cannot read .zst backups")
+    with open(src_path, "rb") as fin, open(dst_path, "wb") as fout:
+        _zstd().ZstdDecompressor().copy_stream(fin, fout)
+
+
+@lru_cache(maxsize=8)
+def _parse_uri(uri: str) -> ParseResult:
+    """Parse a database URI; cached since the app uses one or two URIs."""
+    return urlparse(uri)
+
+
+def _is_compressed(path: Path) -> bool:
+    return path.name.endswith(_ZSTD_SUFFIX)
+
+
+@lru_cache(maxsize=1)
+def _pg_dump_compression() -> str:
+    """Return the ``pg_dump -Z`` value: zstd on PostgreSQL 16+, else gzip."""
+    try:
+        out = subprocess.run(
+            ["pg_dump", "--version"], capture_output=True, text=True, check=True
+        ).stdout
+        major = int(re.search(r"(\d+)", out).group(1))
+    except (OSError, subprocess.CalledProcessError, AttributeError, ValueError):
+        return "6"
+    return f"zstd:{_ZSTD_LEVEL}" if major >= 16 else "6"
+
+
+def _pg_jobs() -> str:
+    return str(os.cpu_count() or 4)
+
 
 class BackupManager:
     """Manages database backups with automatic cleanup."""
@@ -38,9 +153,10 @@ class BackupManager:
         self.retention_count = retention_count
         self.retention_days = retention_days
         self.app_root = app_root
-        self._parsed_uri = urlparse(database_uri)
+        self._parsed_uri = _parse_uri(database_uri)
+        self._resolved_sqlite_path: Optional[str] = None
 
-    @property
+    @cached_property
     def db_type(self) -> str:
         """Get database type from URI."""
         scheme = self._parsed_uri.scheme
@@ -51,11 +167,11 @@ class BackupManager:
         else:
             return scheme
 
-    @property
+    @cached_property
     def is_sqlite(self) -> bool:
         return self.db_type == "sqlite"
 
-    @property
+    @cached_property
     def is_postgresql(self) -> bool:
         return self.db_type == "postgresql"
 
@@ -66,10 +182,13 @@ class BackupManager:
     def _generate_backup_filename(self, prefix: str = "backup") -> str:
         """Generate a timestamped backup filename."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if self.is_sqlite:
-            return f"{prefix}_{timestamp}.db"
-        else:
-            return f"{prefix}_{timestamp}.sql"
+        if not self.is_sqlite:
+            # pg_dump custom-format archives are compressed by pg_dump itself
+            return f"{prefix}_{timestamp}{_PG_DUMP_SUFFIX}"
+        ext = ".db"
+        if _HAS_ZSTD:
+            ext += _ZSTD_SUFFIX
+        return f"{prefix}_{timestamp}{ext}"
 
     def create_backup(self, prefix: str = "backup") -> Path:
         """Create a database backup.
@@ -99,13 +218,19 @@ class BackupManager:
 
         Handles both relative (sqlite:///file.db) and absolute
         (sqlite:////absolute/path) URI formats. For relative paths,
-        checks the Flask app root, CWD, and instance/ directory.
+        checks the Flask app root, CWD, and instance/ directory.  A definite
+        result (absolute URI or an existing file) is cached on the instance,
+        so repeated backups/restores skip the filesystem probing.
         """
+        if self._resolved_sqlite_path:
+            return self._resolved_sqlite_path
+
         db_path = self._parsed_uri.path
 
         # Absolute path: sqlite:////absolute/path → parsed path starts with //
         if db_path.startswith("//"):
-            return db_path[1:]
+            self._resolved_sqlite_path = db_path[1:]
+            return self._resolved_sqlite_path
 
         # Relative path: sqlite:///file.db → parsed path = /file.db
         relative = db_path.lstrip("/")
@@ -117,16 +242,19 @@ class BackupManager:
         if self.app_root:
             app_root_path = os.path.join(self.app_root, relative)
             if os.path.exists(app_root_path):
-                return os.path.abspath(app_root_path)
+                self._resolved_sqlite_path = os.path.abspath(app_root_path)
+                return self._resolved_sqlite_path
 
         # Check CWD
         if os.path.exists(relative):
-            return os.path.abspath(relative)
+            self._resolved_sqlite_path = os.path.abspath(relative)
+            return self._resolved_sqlite_path
 
         # Check Flask instance directory
         instance = os.path.join("instance", relative)
         if os.path.exists(instance):
-            return os.path.abspath(instance)
+            self._resolved_sqlite_path = os.path.abspath(instance)
+            return self._resolved_sqlite_path
 
         # If app_root was provided, use that as the canonical location even
         # if the file doesn't exist yet (e.g. first run before DB creation)
@@ -137,13 +265,32 @@ class BackupManager:
         return relative
 
     def _backup_sqlite(self, backup_path: Path) -> Path:
-        """Create SQLite backup by copying the database file."""
+        """Create SQLite backup using SQLite's online backup API.
+
+        The database runs in WAL mode, so a plain file copy can miss
+        committed pages still sitting in the ``-wal`` file.  The backup API
+        copies a consistent snapshot page by page; a file copy is only used
+        if the API itself fails.
+        """
         db_path = self._resolve_sqlite_path()
 
         if not db_path or not os.path.exists(db_path):
             raise RuntimeError(f"SQLite database file not found: {db_path}")
 
-        shutil.copy2(db_path, backup_path)
+        # The backup API needs a real database file as target, so a
+        # compressed backup is staged next to its final location first.
+        raw_path = backup_path.with_name(backup_path.name + ".tmp") \
+            if _is_compressed(backup_path) else backup_path
+        try:
+            try:
+                _sqlite_copy(db_path, str(raw_path), checkpoint=True)
+            except sqlite3.Error:
+                _fast_copy(db_path, str(raw_path))
+            if raw_path != backup_path:
+                _compress_file(raw_path, backup_path)
+        finally:
+            if raw_path != backup_path and raw_path.exists():
+                raw_path.unlink()
         return backup_path
 
     def _backup_postgresql(self, backup_path: Path) -> Path:
@@ -165,23 +312,27 @@ class BackupManager:
             "-p", str(port),
             "-U", user,
             "-d", dbname,
-            "-f", str(backup_path),
-            "--format=plain",
+            "--format=custom",
+            "-Z", _pg_dump_compression(),
         ]
 
+        # The archive streams from pg_dump's stdout straight into the backup
+        # file; only stderr is read back.  A regular file is seekable, so
+        # pg_dump still records data offsets for parallel pg_restore.
         try:
-            result = subprocess.run(
-                cmd,
-                env=env,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"pg_dump failed: {e.stderr}")
+            with open(backup_path, "wb") as out:
+                proc = subprocess.Popen(
+                    cmd, env=env, stdout=out, stderr=subprocess.PIPE
+                )
+                _, err = proc.communicate()
         except FileNotFoundError:
+            backup_path.unlink(missing_ok=True)
             raise RuntimeError("pg_dump not found. Is PostgreSQL client installed?")
 
+        if proc.returncode:
+            backup_path.unlink(missing_ok=True)
+            raise RuntimeError(f"pg_dump failed: {err.decode(errors='replace')}")
+
         return backup_path
 
     def restore_backup(self, backup_path: Path) -> None:
@@ -198,19 +349,41 @@ class BackupManager:
             raise FileNotFoundError(f"Backup file not found: {backup_path}")
 
         if self.is_sqlite:
-            self._restore_sqlite(backup_path)
+            restore = self._restore_sqlite
         elif self.is_postgresql:
-            self._restore_postgresql(backup_path)
+            restore = self._restore_postgresql
         else:
             raise RuntimeError(f"Unsupported database type: {self.db_type}")
 
+        if not _is_compressed(backup_path):
+            restore(backup_path)
+            return
+        raw_path = backup_path.with_name(backup_path.name + ".tmp")
+        try:
+            _decompress_file(backup_path, raw_path)
+            restore(raw_path)
+        finally:
+            if raw_path.exists():
+                raw_path.unlink()
+
     def _restore_sqlite(self, backup_path: Path) -> None:
-        """Restore SQLite database by copying backup file."""
+        """Restore SQLite database from a backup file.
+
+        Goes through the backup API so the live database's WAL is updated
+        too; copying over the main file would leave stale WAL frames behind.
+        """
         db_path = self._resolve_sqlite_path()
-        shutil.copy2(backup_path, db_path)
+        try:
+            _sqlite_copy(str(backup_path), db_path)
+        except sqlite3.Error:
+            _fast_copy(str(backup_path), db_path)
 
     def _restore_postgresql(self, backup_path: Path) -> None:
-        """Restore PostgreSQL database using psql."""
+        """Restore PostgreSQL database.
+
+        Custom-format archives go through ``pg_restore`` with parallel jobs;
+        older plain SQL dumps are still replayed with ``psql``.
+        """
         host = self._parsed_uri.hostname or "localhost"
         port = self._parsed_uri.port or 5432
         user = self._parsed_uri.username
@@ -221,17 +394,33 @@ class BackupManager:
         if password:
             env["PGPASSWORD"] = password
 
-        cmd = [
-            "psql",
-            "-h", host,
-            "-p", str(port),
-            "-U", user,
-            "-d", dbname,
-            "-f", str(backup_path),
-        ]
+        with open(backup_path, "rb") as f:
+            is_archive = f.read(len(_PG_DUMP_MAGIC)) == _PG_DUMP_MAGIC
+
+        if is_archive:
+            tool = "pg_restore"
+            cmd = [
+                "pg_restore",
+                "-h", host,
+                "-p", str(port),
+                "-U", user,
+                "-d", dbname,
+                "-j", _pg_jobs(),
+                str(backup_path),
+            ]
+        else:
+            tool = "psql"
+            cmd = [
+                "psql",
+                "-h", host,
+                "-p", str(port),
+                "-U", user,
+                "-d", dbname,
+                "-f", str(backup_path),
+            ]
 
         try:
-            result = subprocess.run(
+            subprocess.run(
                 cmd,
                 env=env,
                 capture_output=True,
@@ -239,7 +428,7 @@ class BackupManager:
                 check=True,
             )
         except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"psql restore failed: {e.stderr}")
+            raise RuntimeError(f"{tool} restore failed: {e.stderr}")
 
     def list_backups(self) -> List[Tuple[Path, datetime]]:
         """List all backup files with their timestamps.
@@ -247,19 +436,31 @@ class BackupManager:
         Returns:
             List of (path, modified_time) tuples, sorted newest first
         """
-        if not self.backup_dir.exists():
-            return []
-
-        backups = []
-        for f in self.backup_dir.iterdir():
-            if f.is_file() and (f.suffix == ".db" or f.suffix == ".sql"):
-                mtime = datetime.fromtimestamp(f.stat().st_mtime)
-                backups.append((f, mtime))
+        backups = [
+            (Path(path), datetime.fromtimestamp(mtime))
+            for path, mtime in self._scan_backups()
+        ]
 
         # Sort by modification time, newest first
         backups.sort(key=lambda x: x[1], reverse=True)
         return backups
 
+    def _scan_backups(self) -> List[Tuple[str, float]]:
+        """Return unsorted ``(path, st_mtime)`` pairs for all backup files.
+
+        Uses a single ``os.scandir`` walk so file type and stat data come
+        from the directory listing instead of extra per-file syscalls.
+        """
+        try:
+            with os.scandir(self.backup_dir) as it:
+                return [
+                    (entry.path, entry.stat().st_mtime)
+                    for entry in it
+                    if entry.name.endswith(_BACKUP_SUFFIXES) and entry.is_file()
+                ]
+        except FileNotFoundError:
+            return []
+
     def cleanup_old_backups(self) -> List[Path]:
         """Remove old backups based on retention policy.
 
@@ -270,59 +471,95 @@ class BackupManager:
         Returns:
             List of removed backup paths
         """
-        backups = self.list_backups()
-        removed = []
-        cutoff_date = datetime.now() - timedelta(days=self.retention_days)
-
-        for i, (path, mtime) in enumerate(backups):
-            should_remove = False
+        backups = self._scan_backups()
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).timestamp()
 
-            # Remove if exceeds count limit
-            if i >= self.retention_count:
-                should_remove = True
+        # Only the newest N are needed, not a full ordering
+        keep = {
+            path for path, _ in heapq.nlargest(
+                max(self.retention_count, 0), backups, key=lambda x: x[1]
+            )
+        }
 
-            # Remove if older than retention period
-            if mtime < cutoff_date:
-                should_remove = True
+        # Remove if exceeds count limit or older than retention period
+        to_remove = [
+            path for path, mtime in backups
+            if path not in keep or mtime < cutoff
+        ]
 
-            if should_remove:
-                path.unlink()
-                removed.append(path)
+        removed = []
+        unlink = os.unlink
+        for path in to_remove:
+            try:
+                unlink(path)
+            except FileNotFoundError:
+                continue
+            removed.append(path)
 
-        return removed
+        return [Path(path) for path in removed]
 
-    def verify_backup(self, backup_path: Path) -> bool:
+    def verify_backup(self, backup_path: Path, deep: bool = False) -> bool:
         """Verify a backup file is valid.
 
+        By default only the first bytes of the (decompressed) file are
+        checked against the expected SQLite / SQL dump / pg_dump header.
+
         Args:
             backup_path: Path to the backup file
+            deep: For SQLite, also run a full ``PRAGMA integrity_check``
 
         Returns:
             True if backup appears valid, False otherwise
         """
-        if not backup_path.exists():
+        # Check file exists and has reasonable size
+        try:
+            if backup_path.stat().st_size == 0:
+                return False
+        except OSError:
             return False
 
-        # Check file has reasonable size
-        if backup_path.stat().st_size == 0:
+        try:
+            head = self._read_head(backup_path)
+        except Exception:
             return False
 
-        if self.is_sqlite:
-            # Try to open as SQLite and run integrity check
-            import sqlite3
-            try:
-                conn = sqlite3.connect(str(backup_path))
-                cursor = conn.execute("PRAGMA integrity_check")
-                result = cursor.fetchone()
-                conn.close()
-                return result[0] == "ok"
-            except sqlite3.Error:
-                return False
-        else:
-            # For SQL dumps, just check it's not empty and starts with valid SQL
-            try:
-                with open(backup_path, "r") as f:
-                    first_line = f.readline()
-                    return first_line.startswith("--") or first_line.startswith("SET")
-            except Exception:
-                return False
+        if not self.is_sqlite:
+            return head.startswith((b"--", b"SET", _PG_DUMP_MAGIC))
+
+        if head != _SQLITE_MAGIC:
+            return False
+        if not deep:
+            return True
+        if not _is_compressed(backup_path):
+            return self._verify_sqlite_file(backup_path)
+        raw_path = backup_path.with_name(backup_path.name + ".tmp")
+        try:
+            _decompress_file(backup_path, raw_path)
+            return self._verify_sqlite_file(raw_path)
+        except Exception:
+            return False
+        finally:
+            if raw_path.exists():
+                raw_path.unlink()
+
+    @staticmethod
+    def _read_head(path: Path, size: int = 16) -> bytes:
+        """Return the first *size* bytes of *path*, decompressing .zst files."""
+        with open(path, "rb") as f:
+            if not _is_compressed(path):
+                return f.read(size)
+            if not _HAS_ZSTD:
+                raise RuntimeError("zstandard is not installed")
+            return _zstd().ZstdDecompressor().stream_reader(f).read(size)
+
+    @staticmethod
+    def _verify_sqlite_file(path: Path) -> bool:
+        """Open *path* as SQLite and run an integrity check."""
+        try:
+            conn = sqlite3.connect(str(path))
+            cursor = conn.execute("PRAGMA integrity_check")
+            result = cursor.fetchone()
+            conn.close()
+            return result[0] == "ok"
+        except sqlite3.Error:
+            return False
@@ -2,15 +2,73 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple, Type
 
-from sqlalchemy import inspect, func
+from sqlalchemy import case, exists, func, inspect, literal, select, union_all
 from sqlalchemy.orm import Session
 
 from extensions import db
 from db_tools.config import DELETION_ORDER, CONFIG_TABLES, ENTITY_MODEL_MAP
 
 
+# Duplicate invoice numbers listed in a check_integrity issue
+_DUPLICATE_DETAILS_LIMIT = 20
+
+
+def _duplicate_invoice_numbers_query(Invoice: Type):
+    """SELECT of invoice numbers that occur on more than one invoice."""
+    return (
+        select(Invoice.invoice_number)
+        .where(Invoice.invoice_number.isnot(None))
+        .group_by(Invoice.invoice_number)
+        .having(func.count(Invoice.id) > 1)
+    )
+
+
+@lru_cache(maxsize=1)
+def _model_map() -> Dict[str, Type]:
+    """Map table names to model classes, resolved once per process."""
+    import models
+
+    return {
+        table_name: model
+        for table_name, class_name in ENTITY_MODEL_MAP.items()
+        if (model := getattr(models, class_name, None)) is not None
+    }
+
+
+@lru_cache(maxsize=1)
+def _fk_graph(engine_url: str) -> Dict[str, Dict[str, Tuple[Tuple[str, str], ...]]]:
+    """Reflect foreign keys of all known tables once per database.
+
+    Returns ``{table: {"outgoing": ((column, referred_table), ...),
+    "incoming": ((referencing_table, column), ...)}}``.  The schema only
+    changes on migrations, so the result is kept for the process lifetime;
+    call ``_fk_graph.cache_clear()`` after altering it at runtime.
+    """
+    inspector = inspect(db.engine)
+    outgoing: Dict[str, List[Tuple[str, str]]] = {}
+    incoming: Dict[str, List[Tuple[str, str]]] = {}
+    for table_name in DELETION_ORDER:
+        try:
+            fks = inspector.get_foreign_keys(table_name)
+        except Exception:
+            continue
+        for fk in fks:
+            column = fk["constrained_columns"][0]
+            outgoing.setdefault(table_name, []).append((column, fk["referred_table"]))
+            if fk["referred_table"] != table_name:
+                incoming.setdefault(fk["referred_table"], []).append((table_name, column))
+    return {
+        table_name: {
+            "outgoing": tuple(outgoing.get(table_name, ())),
+            "incoming": tuple(incoming.get(table_name, ())),
+        }
+        for table_name in DELETION_ORDER
+    }
+
+
 class DatabaseInspector:
     """Inspects database structure and provides statistics."""
 
@@ -21,6 +79,7 @@ class DatabaseInspector:
             session: SQLAlchemy session (uses db.session if not provided)
         """
         self.session = session or db.session
+        self._model_map = _model_map()
 
     def get_model_class(self, table_name: str) -> Optional[Type]:
         """Get SQLAlchemy model class for a table name.
@@ -31,12 +90,7 @@ class DatabaseInspector:
         Returns:
             Model class or None if not found
         """
-        import models
-
-        class_name = ENTITY_MODEL_MAP.get(table_name)
-        if class_name:
-            return getattr(models, class_name, None)
-        return None
+        return self._model_map.get(table_name)
 
     def get_table_counts(self) -> Dict[str, int]:
         """Get row counts for all tables.
@@ -44,18 +98,47 @@ class DatabaseInspector:
         Returns:
             Dict mapping table name to row count
         """
-        counts = {}
+        counts = {table_name: -1 for table_name in DELETION_ORDER}
+        models = {}
         for table_name in DELETION_ORDER:
             model = self.get_model_class(table_name)
             if model:
+                models[table_name] = model
+
+        # Failures roll back to a savepoint only, so the caller's pending
+        # work and loaded objects in the shared session are left alone
+        try:
+            with self.session.begin_nested():
+                counts.update(self._count_tables(models))
+        except Exception:
+            # Count tables one by one so a single broken table only marks
+            # its own entry as an error
+            for table_name, model in models.items():
                 try:
-                    counts[table_name] = self.session.query(model).count()
+                    with self.session.begin_nested():
+                        counts[table_name] = self._count(model)
                 except Exception:
                     counts[table_name] = -1  # Error
-            else:
-                counts[table_name] = -1
         return counts
 
+    def _count_tables(self, models: Dict[str, Type]) -> Dict[str, int]:
+        """Count rows of several tables in one UNION ALL round-trip.
+
+        Args:
+            models: Mapping of table name to model class
+
+        Returns:
+            Dict mapping table name to row count
+        """
+        if not models:
+            return {}
+        stmt = union_all(*[
+            select(literal(table_name).label("t"), func.count().label("c"))
+            .select_from(model.__table__)
+            for table_name, model in models.items()
+        ])
+        return {table_name: count for table_name, count in self.session.execute(stmt)}
+
     def get_statistics(self) -> Dict[str, Any]:
         """Get comprehensive database statistics.
 
@@ -64,50 +147,108 @@ class DatabaseInspector:
         """
         import models
 
-        stats = {
-            "users": {
-                "total": self.session.query(models.User).count(),
-                "active": self.session.query(models.User).filter_by(is_active=True).count(),
-            },
-            "partners": {
-                "total": self.session.query(models.Partner).count(),
-                "active": self.session.query(models.Partner).filter_by(
-                    is_active=True, is_deleted=False
-                ).count(),
-            },
-            "products": {
-                "total": self.session.query(models.Product).count(),
-                "active": self.session.query(models.Product).filter_by(is_active=True).count(),
-            },
-            "bundles": {
-                "total": self.session.query(models.Bundle).count(),
-                "active": self.session.query(models.Bundle).filter_by(is_active=True).count(),
-            },
-            "orders": {
-                "total": self.session.query(models.Order).count(),
-                "confirmed": self.session.query(models.Order).filter_by(confirmed=True).count(),
-                "locked": self.session.query(models.Order).filter_by(is_locked=True).count(),
-            },
-            "delivery_notes": {
-                "total": self.session.query(models.DeliveryNote).count(),
-                "confirmed": self.session.query(models.DeliveryNote).filter_by(confirmed=True).count(),
-                "invoiced": self.session.query(models.DeliveryNote).filter_by(invoiced=True).count(),
-            },
-            "invoices": {
-                "total": self.session.query(models.Invoice).count(),
-                "draft": self.session.query(models.Invoice).filter_by(status="draft").count(),
-                "sent": self.session.query(models.Invoice).filter_by(status="sent").count(),
-                "paid": self.session.query(models.Invoice).filter_by(status="paid").count(),
-            },
-            "vehicles": {
-                "total": self.session.query(models.Vehicle).count(),
-                "active": self.session.query(models.Vehicle).filter_by(active=True).count(),
-            },
-            "audit_log": {
-                "total": self.session.query(models.AuditLog).count(),
-            },
-        }
-        return stats
+        return self._counts_union({
+            "users": (models.User, {"active": models.User.is_active == True}),
+            "partners": (models.Partner, {
+                "active": (models.Partner.is_active == True)
+                & (models.Partner.is_deleted == False),
+            }),
+            "products": (models.Product, {"active": models.Product.is_active == True}),
+            "bundles": (models.Bundle, {"active": models.Bundle.is_active == True}),
+            "orders": (models.Order, {
+                "confirmed": models.Order.confirmed == True,
+                "locked": models.Order.is_locked == True,
+            }),
+            "delivery_notes": (models.DeliveryNote, {
+                "confirmed": models.DeliveryNote.confirmed == True,
+                "invoiced": models.DeliveryNote.invoiced == True,
+            }),
+            "invoices": (models.Invoice, {
+                "draft": models.Invoice.status == "draft",
+                "sent": models.Invoice.status == "sent",
+                "paid": models.Invoice.status == "paid",
+            }),
+            "vehicles": (models.Vehicle, {"active": models.Vehicle.active == True}),
+            "audit_log": (models.AuditLog, {}),
+        })
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Collect table counts, statistics and integrity issues together.
+
+        The three reads run in one transaction on a dedicated connection,
+        so they describe the same point in time regardless of what the
+        request's session has already done.  PostgreSQL gets a read-only
+        REPEATABLE READ transaction; pysqlite does not begin transactions
+        for SELECTs, so on SQLite an explicit BEGIN pins the snapshot.
+
+        Returns:
+            Dict with ``counts``, ``stats`` and ``integrity`` keys
+        """
+        with self.session.get_bind().connect() as conn:
+            dialect = conn.dialect.name
+            if dialect == "postgresql":
+                conn.execution_options(
+                    isolation_level="REPEATABLE READ", postgresql_readonly=True
+                )
+            elif dialect == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+                conn.exec_driver_sql("BEGIN")
+            session = Session(bind=conn)
+            try:
+                inspector = DatabaseInspector(session)
+                return {
+                    "counts": inspector.get_table_counts(),
+                    "stats": inspector.get_statistics(),
+                    "integrity": inspector.check_integrity(),
+                }
+            finally:
+                # Nothing was written; end the read transaction
+                session.close()
+                conn.rollback()
+
+    def _count(self, model: Type) -> int:
+        """Return the row count of *model*'s table.
+
+        A Core ``select`` rather than ``Query.count()`` (which wraps the
+        query in a subquery) keeps a stable, cacheable statement per table.
+        """
+        return self.session.execute(
+            select(func.count()).select_from(model.__table__)
+        ).scalar_one()
+
+    def _counts_union(
+        self, groups: Dict[str, Tuple[Type, Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, int]]:
+        """Count rows of several models plus rows matching conditions.
+
+        Each group is a conditional aggregate over one table, so every
+        table is scanned once; the groups are glued into one UNION ALL
+        round-trip, padding the shorter ones with zero columns.
+
+        Args:
+            groups: Mapping of group name to ``(model, {name: condition})``
+
+        Returns:
+            Dict mapping group name to ``{"total": n, <name>: n, ...}``
+        """
+        width = max(len(conditions) for _, conditions in groups.values())
+        parts = []
+        for key, (model, conditions) in groups.items():
+            columns = [literal(key), func.count()]
+            for condition in conditions.values():
+                columns.append(func.coalesce(func.sum(case((condition, 1), else_=0)), 0))
+            columns.extend(literal(0) for _ in range(width - len(conditions)))
+            parts.append(
+                select(*[c.label(f"c{i}") for i, c in enumerate(columns)])
+                .select_from(model.__table__)
+            )
+
+        results = {}
+        for row in self.session.execute(union_all(*parts)):
+            key, total, *values = row
+            names = groups[key][1]
+            results[key] = {"total": total, **dict(zip(names, values))}
+        # Keep the order callers (and templates) expect
+        return {key: results[key] for key in groups}
 
     def check_integrity(self) -> List[Dict[str, Any]]:
         """Check for common data integrity issues.
@@ -118,15 +259,51 @@ class DatabaseInspector:
         import models
 
         issues = []
-
-        # Check for orphaned order items
-        orphaned_order_items = (
-            self.session.query(models.OrderItem)
-            .filter(~models.OrderItem.order_id.in_(
-                self.session.query(models.Order.id)
-            ))
-            .count()
+        OrderItem, DeliveryItem = models.OrderItem, models.DeliveryItem
+        Order, DeliveryNote = models.Order, models.DeliveryNote
+        Product, Partner, Invoice = models.Product, models.Partner, models.Invoice
+
+        # Orphans via LEFT JOIN ... IS NULL (an anti-join) rather than
+        # NOT IN (subquery); NULL parent ids were never counted by NOT IN.
+        orphaned_order_items_q = (
+            select(func.count(OrderItem.id))
+            .outerjoin(Order, Order.id == OrderItem.order_id)
+            .where(OrderItem.order_id.isnot(None), Order.id.is_(None))
+        )
+        orphaned_delivery_items_q = (
+            select(func.count(DeliveryItem.id))
+            .outerjoin(DeliveryNote, DeliveryNote.id == DeliveryItem.delivery_note_id)
+            .where(DeliveryItem.delivery_note_id.isnot(None), DeliveryNote.id.is_(None))
+        )
+        inactive_products_q = select(func.count(Product.id)).where(
+            Product.is_active == False,
+            select(OrderItem.id).where(OrderItem.product_id == Product.id).exists(),
+        )
+        duplicate_invoices_q = select(func.count()).select_from(
+            _duplicate_invoice_numbers_query(Invoice).subquery()
         )
+        deleted_partners_q = select(func.count(Partner.id)).where(
+            Partner.is_deleted == True,
+            select(Order.id).where(
+                Order.partner_id == Partner.id, Order.confirmed == True
+            ).exists(),
+        )
+
+        # All five checks in one round-trip
+        (
+            orphaned_order_items,
+            orphaned_delivery_items,
+            inactive_products_in_orders,
+            duplicate_invoice_count,
+            deleted_partners_in_orders,
+        ) = self.session.execute(select(
+            orphaned_order_items_q.scalar_subquery(),
+            orphaned_delivery_items_q.scalar_subquery(),
+            inactive_products_q.scalar_subquery(),
+            duplicate_invoices_q.scalar_subquery(),
+            deleted_partners_q.scalar_subquery(),
+        )).one()
+
         if orphaned_order_items > 0:
             issues.append({
                 "type": "orphan",
@@ -135,14 +312,6 @@ class DatabaseInspector:
                 "count": orphaned_order_items,
             })
 
-        # Check for orphaned delivery items
-        orphaned_delivery_items = (
-            self.session.query(models.DeliveryItem)
-            .filter(~models.DeliveryItem.delivery_note_id.in_(
-                self.session.query(models.DeliveryNote.id)
-            ))
-            .count()
-        )
         if orphaned_delivery_items > 0:
             issues.append({
                 "type": "orphan",
@@ -151,17 +320,6 @@ class DatabaseInspector:
                 "count": orphaned_delivery_items,
             })
 
-        # Check for inactive products still in orders
-        inactive_products_in_orders = (
-            self.session.query(models.Product)
-            .filter(
-                models.Product.is_active == False,
-                models.Product.id.in_(
-                    self.session.query(models.OrderItem.product_id)
-                ),
-            )
-            .count()
-        )
         if inactive_products_in_orders > 0:
             issues.append({
                 "type": "warning",
@@ -170,38 +328,17 @@ class DatabaseInspector:
                 "count": inactive_products_in_orders,
             })
 
-        # Check for duplicate invoice numbers
-        duplicate_invoices = (
-            self.session.query(
-                models.Invoice.invoice_number,
-                func.count(models.Invoice.id).label("cnt"),
-            )
-            .filter(models.Invoice.invoice_number.isnot(None))
-            .group_by(models.Invoice.invoice_number)
-            .having(func.count(models.Invoice.id) > 1)
-            .all()
-        )
-        if duplicate_invoices:
+        if duplicate_invoice_count > 0:
             issues.append({
                 "type": "error",
                 "entity": "Invoice",
                 "description": "Duplicate invoice numbers found",
-                "count": len(duplicate_invoices),
-                "details": [d[0] for d in duplicate_invoices],
+                "count": duplicate_invoice_count,
+                "details": self.get_duplicate_invoice_numbers(
+                    limit=_DUPLICATE_DETAILS_LIMIT
+                ),
             })
 
-        # Check for soft-deleted partners still referenced in active orders
-        deleted_partners_in_orders = (
-            self.session.query(models.Partner)
-            .filter(
-                models.Partner.is_deleted == True,
-                models.Partner.id.in_(
-                    self.session.query(models.Order.partner_id)
-                    .filter(models.Order.confirmed == True)
-                ),
-            )
-            .count()
-        )
         if deleted_partners_in_orders > 0:
             issues.append({
                 "type": "warning",
@@ -212,6 +349,24 @@ class DatabaseInspector:
 
         return issues
 
+    def get_duplicate_invoice_numbers(self, limit: Optional[int] = None) -> List[str]:
+        """Return invoice numbers used by more than one invoice.
+
+        Args:
+            limit: Maximum number of invoice numbers to return
+
+        Returns:
+            Sorted list of duplicated invoice numbers
+        """
+        import models
+
+        stmt = _duplicate_invoice_numbers_query(models.Invoice).order_by(
+            models.Invoice.invoice_number
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return list(self.session.execute(stmt).scalars())
+
     def get_foreign_key_references(self, table_name: str) -> Dict[str, List[Tuple[str, str]]]:
         """Get foreign key relationships for a table.
 
@@ -225,36 +380,9 @@ class DatabaseInspector:
         if not model:
             return {"incoming": [], "outgoing": []}
 
-        inspector = inspect(db.engine)
-        result = {"incoming": [], "outgoing": []}
-
-        # Get outgoing FKs (this table references others)
-        try:
-            fks = inspector.get_foreign_keys(table_name)
-            for fk in fks:
-                result["outgoing"].append((
-                    fk["constrained_columns"][0],
-                    fk["referred_table"],
-                ))
-        except Exception:
-            pass
-
-        # Get incoming FKs (other tables reference this one)
-        for other_table in DELETION_ORDER:
-            if other_table == table_name:
-                continue
-            try:
-                fks = inspector.get_foreign_keys(other_table)
-                for fk in fks:
-                    if fk["referred_table"] == table_name:
-                        result["incoming"].append((
-                            other_table,
-                            fk["constrained_columns"][0],
-                        ))
-            except Exception:
-                pass
-
-        return result
+        graph = _fk_graph(db.engine.url.render_as_string(hide_password=False))
+        refs = graph.get(table_name, {"incoming": (), "outgoing": ()})
+        return {"incoming": list(refs["incoming"]), "outgoing": list(refs["outgoing"])}
 
     def get_reference_counts(self, table_name: str, record_id: int) -> Dict[str, int]:
         """Get counts of records referencing a specific record.
@@ -266,19 +394,67 @@ class DatabaseInspector:
         Returns:
             Dict mapping referencing table to count
         """
-        refs = self.get_foreign_key_references(table_name)
         counts = {}
+        parts = [
+            select(literal(ref_table).label("t"), func.count().label("c"))
+            .select_from(ref_model.__table__)
+            .where(condition)
+            for ref_table, ref_model, condition in self._reference_filters(
+                table_name, record_id
+            )
+        ]
+        if not parts:
+            return counts
+
+        # One round-trip for all referencing tables; a table referencing
+        # the record through several columns gets the sum of its counts
+        for ref_table, count in self.session.execute(union_all(*parts)):
+            if count > 0:
+                counts[ref_table] = counts.get(ref_table, 0) + count
+
+        return counts
+
+    def get_reference_exists(self, table_name: str, record_id: int) -> Dict[str, bool]:
+        """Check which tables reference a specific record at all.
+
+        Cheaper than ``get_reference_counts`` when only "is the record in
+        use" matters: each EXISTS stops at the first matching row.
 
-        for ref_table, ref_column in refs["incoming"]:
+        Args:
+            table_name: The table containing the record
+            record_id: The ID of the record
+
+        Returns:
+            Dict mapping each referencing table to whether it has rows
+            pointing at the record
+        """
+        parts = [
+            select(
+                literal(ref_table).label("t"),
+                exists().where(condition).label("e"),
+            )
+            for ref_table, _, condition in self._reference_filters(
+                table_name, record_id
+            )
+        ]
+        if not parts:
+            return {}
+
+        found: Dict[str, bool] = {}
+        for ref_table, is_referenced in self.session.execute(union_all(*parts)):
+            found[ref_table] = found.get(ref_table, False) or bool(is_referenced)
+        return found
+
+    def _reference_filters(self, table_name: str, record_id: int) -> List[Tuple[str, Type, Any]]:
+        """Return ``(ref_table, ref_model, column == record_id)`` per incoming FK."""
+        filters = []
+        for ref_table, ref_column in self.get_foreign_key_references(table_name)["incoming"]:
             ref_model = self.get_model_class(ref_table)
             if ref_model:
                 col = getattr(ref_model, ref_column, None)
                 if col is not None:
-                    count = self.session.query(ref_model).filter(col == record_id).count()
-                    if count > 0:
-                        counts[ref_table] = count
-
-        return counts
+                    filters.append((ref_table, ref_model, col == record_id))
+        return filters
 
     def is_config_table(self, table_name: str) -> bool:
         """Check if a table is a configuration table."""
@@ -293,15 +469,18 @@ class DatabaseInspector:
         Returns:
             List of (table_name, row_count) tuples in deletion order
         """
-        preview = []
+        models = {}
         for table_name in DELETION_ORDER:
             if not include_config and self.is_config_table(table_name):
                 continue
 
             model = self.get_model_class(table_name)
             if model:
-                count = self.session.query(model).count()
-                if count > 0:
-                    preview.append((table_name, count))
-
-        return preview
+                models[table_name] = model
+
+        counts = self._count_tables(models)
+        return [
+            (table_name, counts[table_name])
+            for table_name in models
+            if counts.get(table_name, 0) > 0
+        ]
@@ -11,12 +11,32 @@ Example:
 from __future__ import annotations
 
 import re
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple, Union
 
+# Fuzzy scoring for suggestions (optional dependency)
+try:
+    from rapidfuzz import fuzz, process  # type: ignore[import-untyped]
 
+    _HAS_RAPIDFUZZ = True
+except ImportError:
+    _HAS_RAPIDFUZZ = False
+
+# Minimum rapidfuzz token_set_ratio (0-100) for a name to be suggested
+_SUGGEST_SCORE_CUTOFF = 60
+
+# Compiled once; normalize_for_matching runs per FK candidate during imports
+_PUNCT_TO_SPACE = str.maketrans({",": " ", ";": " "})
+_RE_INITIALS = re.compile(r"(\b\w)\.\s+(\w\b)")
+
+
+@lru_cache(maxsize=16384)
 def normalize_for_matching(text: str) -> str:
     """Normalize text for FK matching - handles typos, not different entities.
 
+    Results are memoised: imports normalise the same candidate names for
+    every row they resolve.
+
     Rules:
     - Convert to lowercase (case-insensitive matching)
     - Replace commas and semicolons with spaces
@@ -48,21 +68,32 @@ def normalize_for_matching(text: str) -> str:
 
     result = text.lower()
 
+    # Fast path: most names are already clean (single spaces, no , ; and
+    # no "x. y" initials) and at most need the trailing dot dropped
+    if (
+        "," not in result
+        and ";" not in result
+        and ". " not in result
+        and " ".join(result.split()) == result
+    ):
+        return result[:-1].rstrip() if result.endswith(".") else result
+
     # Replace commas and semicolons with spaces
-    result = re.sub(r"[,;]", " ", result)
+    result = result.translate(_PUNCT_TO_SPACE)
 
     # Normalize "s. r. o." patterns - remove spaces around dots between single letters
     # This handles: "s. r. o." → "s.r.o."
-    result = re.sub(r"(\b\w)\.\s+(\w\b)", r"\1.\2", result)
+    result = _RE_INITIALS.sub(r"\1.\2", result)
 
-    # Remove trailing dot at end of string
-    result = re.sub(r"\.$", "", result)
+    # Remove trailing dot at end of string (like r"\.$", which also
+    # matches just before a final newline)
+    if result.endswith("."):
+        result = result[:-1]
+    elif result.endswith(".\n"):
+        result = result[:-2] + "\n"
 
-    # Collapse multiple spaces into single space
-    result = re.sub(r"\s+", " ", result)
-
-    # Trim edges
-    result = result.strip()
+    # Collapse whitespace runs into single spaces and trim edges
+    result = " ".join(result.split())
 
     return result
 
@@ -89,23 +120,122 @@ def find_best_match(
     if not search_value or not candidates:
         return None
 
-    # First, try exact match
+    if exact_only:
+        for cid, cname in candidates:
+            if cname == search_value:
+                return (cid, cname, True)
+        return None
+
+    # Single pass: return on the first exact hit, collecting normalized
+    # matches on the way in case there is none.  For repeated lookups
+    # against the same candidates use build_match_index instead.
+    normalized_search = normalize_for_matching(search_value)
+    matches = []
     for cid, cname in candidates:
         if cname == search_value:
             return (cid, cname, True)
+        if normalize_for_matching(cname) == normalized_search:
+            matches.append((cid, cname))
 
-    if exact_only:
+    if len(matches) == 0:
+        return None
+    elif len(matches) == 1:
+        return (matches[0][0], matches[0][1], False)
+    else:
+        # Ambiguous - multiple matches
+        match_names = [m[1] for m in matches]
+        raise ValueError(
+            f"Ambiguous match for '{search_value}' - found: {', '.join(match_names)}"
+        )
+
+
+def find_best_match_prenorm(
+    search_value: str,
+    candidates: List[Tuple[int, str, str]],
+    *,
+    exact_checked: bool = False,
+) -> Optional[Tuple[int, str, bool]]:
+    """``find_best_match`` for candidates normalised ahead of time.
+
+    Args:
+        search_value: The value to search for
+        candidates: List of (id, name, normalize_for_matching(name)) tuples
+        exact_checked: Skip the exact-match pass (caller already did it)
+
+    Returns:
+        Tuple of (id, matched_name, was_exact_match) or None if no match found
+
+    Raises:
+        ValueError: If multiple candidates match after normalization (ambiguous)
+    """
+    if not search_value or not candidates:
         return None
 
+    if not exact_checked:
+        for cid, cname, _ in candidates:
+            if cname == search_value:
+                return (cid, cname, True)
+
     # Normalize search value
     normalized_search = normalize_for_matching(search_value)
 
     # Find all matches after normalization
-    matches = []
+    matches = [
+        (cid, cname) for cid, cname, cnorm in candidates if cnorm == normalized_search
+    ]
+
+    if len(matches) == 0:
+        return None
+    elif len(matches) == 1:
+        return (matches[0][0], matches[0][1], False)
+    else:
+        # Ambiguous - multiple matches
+        match_names = [m[1] for m in matches]
+        raise ValueError(
+            f"Ambiguous match for '{search_value}' - found: {', '.join(match_names)}"
+        )
+
+
+# (exact name -> first (id, name), normalized name -> [(id, name), ...])
+MatchIndex = Tuple[Dict[str, Tuple[int, str]], Dict[str, List[Tuple[int, str]]]]
+
+
+def build_match_index(candidates: List[Tuple[int, str]]) -> MatchIndex:
+    """Index candidates for repeated ``find_best_match_indexed`` lookups.
+
+    Each candidate is normalized once; lookups are then two dict probes
+    instead of a scan over all candidates.
+    """
+    exact: Dict[str, Tuple[int, str]] = {}
+    normalized: Dict[str, List[Tuple[int, str]]] = {}
     for cid, cname in candidates:
-        if normalize_for_matching(cname) == normalized_search:
-            matches.append((cid, cname))
+        # First candidate wins, like the linear scan in find_best_match
+        exact.setdefault(cname, (cid, cname))
+        normalized.setdefault(normalize_for_matching(cname), []).append((cid, cname))
+    return exact, normalized
+
+
+def find_best_match_indexed(
+    search_value: str,
+    index: MatchIndex,
+) -> Optional[Tuple[int, str, bool]]:
+    """``find_best_match`` against an index from ``build_match_index``.
 
+    Returns:
+        Tuple of (id, matched_name, was_exact_match) or None if no match found
+
+    Raises:
+        ValueError: If multiple candidates match after normalization (ambiguous)
+    """
+    exact, normalized = index
+    if not search_value or not exact:
+        return None
+
+    hit = exact.get(search_value)
+    if hit is not None:
+        return (hit[0], hit[1], True)
+
+    matches = normalized.get(normalize_for_matching(search_value), ())
     if len(matches) == 0:
         return None
     elif len(matches) == 1:
@@ -118,19 +248,40 @@ def find_best_match(
         )
 
 
+class Candidate(NamedTuple):
+    """A suggestion candidate with its normalized form precomputed."""
+
+    id: int
+    name: str
+    normalized: str
+    words: FrozenSet[str]
+
+
+def prepare_candidates(candidates: List[Tuple[int, str]]) -> List[Candidate]:
+    """Normalize candidates once for repeated ``suggest_similar`` calls."""
+    prepared = []
+    for cid, cname in candidates:
+        normalized = normalize_for_matching(cname)
+        prepared.append(Candidate(cid, cname, normalized, frozenset(normalized.split())))
+    return prepared
+
+
 def suggest_similar(
     search_value: str,
-    candidates: List[Tuple[int, str]],
+    candidates: Union[Sequence[Candidate], Sequence[Tuple[int, str]]],
     max_suggestions: int = 5,
 ) -> List[str]:
     """Suggest similar candidates when no match is found.
 
-    Uses a simple approach: candidates that share the first word or
-    contain significant parts of the search value.
+    With rapidfuzz installed, candidates are ranked by token-set
+    similarity in C++.  Otherwise a simple approach is used: candidates
+    that share the first word or contain significant parts of the search
+    value.
 
     Args:
         search_value: The value that wasn't found
-        candidates: List of (id, name) tuples
+        candidates: List of (id, name) tuples, or ``Candidate`` entries
+            from ``prepare_candidates`` when suggesting repeatedly
         max_suggestions: Maximum number of suggestions to return
 
     Returns:
@@ -139,15 +290,27 @@ def suggest_similar(
     if not search_value or not candidates:
         return []
 
+    if not isinstance(candidates[0], Candidate):
+        candidates = prepare_candidates(candidates)
+
     normalized_search = normalize_for_matching(search_value)
-    search_words = set(normalized_search.split())
-    first_word = normalized_search.split()[0] if normalized_search else ""
 
-    scored = []
-    for _, cname in candidates:
-        normalized_cname = normalize_for_matching(cname)
-        cname_words = set(normalized_cname.split())
+    if _HAS_RAPIDFUZZ:
+        results = process.extract(
+            normalized_search,
+            [c.normalized for c in candidates],
+            scorer=fuzz.token_set_ratio,
+            limit=max_suggestions,
+            score_cutoff=_SUGGEST_SCORE_CUTOFF,
+        )
+        return [candidates[idx].name for _, _, idx in results]
 
+    search_words = normalized_search.split()
+    first_word = search_words[0] if search_words else ""
+    search_words = frozenset(search_words)
+
+    scored = []
+    for _, cname, normalized_cname, cname_words in candidates:
         # Calculate simple similarity score
         score = 0
 
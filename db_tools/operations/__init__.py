@@ -1,7 +1,24 @@
-"""Database operations for maintenance tools."""
+"""Database operations for maintenance tools.
 
-from db_tools.operations.wipe import DatabaseWiper
-from db_tools.operations.import_data import DataImporter
-from db_tools.operations.maintenance import MaintenanceTool
+The classes are resolved lazily (PEP 562) so that importing one operation
+module - as every CLI handler does - does not drag in the others.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "DatabaseWiper": "db_tools.operations.wipe",
+    "DataImporter": "db_tools.operations.import_data",
+    "MaintenanceTool": "db_tools.operations.maintenance",
+}
 
 __all__ = ["DatabaseWiper", "DataImporter", "MaintenanceTool"]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
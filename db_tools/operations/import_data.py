@@ -8,16 +8,31 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+from sqlalchemy import inspect
 
 from extensions import db
-from db_tools.config import LARGE_IMPORT_THRESHOLD, ENTITY_MODEL_MAP
+from db_tools.config import LARGE_IMPORT_THRESHOLD, ENTITY_MODEL_MAP, IMPORT_TEMPLATES
 from db_tools.core.normalization import (
+    Candidate,
+    MatchIndex,
+    build_match_index,
     normalize_for_matching,
-    find_best_match,
+    find_best_match_indexed,
+    prepare_candidates,
     suggest_similar,
 )
 from db_tools.core.database_inspector import DatabaseInspector
+from services.tenant import enforce_tenant_on_rows
+
+# Rust-backed XLSX reader (optional dependency); openpyxl otherwise
+try:
+    from python_calamine import CalamineWorkbook  # type: ignore[import-untyped]
+
+    _HAS_CALAMINE = True
+except ImportError:
+    _HAS_CALAMINE = False
 
 
 @dataclass
@@ -44,14 +59,27 @@ class ImportResult:
     warnings: List[str] = field(default_factory=list)
 
 
+# Keys per IN (...) when pre-loading existing records; stays well below
+# SQLite's bound-parameter limit
+_EXISTING_KEYS_CHUNK = 500
+
+# Read buffer for CSV imports; fewer read syscalls on large files
+_CSV_BUFFER_SIZE = 1 << 20
+
+# Format patterns, compiled once and shared by all importers
+_RE_ICO = re.compile(r"^\d{8}$")
+_RE_DIC = re.compile(r"^\d{10}$")
+_RE_IC_DPH = re.compile(r"^SK\d{10}$")
+_RE_EMAIL = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
+
 # Validation rules for each entity type
 VALIDATION_RULES = {
     "partner": {
         "name": {"required": True, "max_length": 120},
-        "ico": {"pattern": r"^\d{8}$", "required": False},
-        "dic": {"pattern": r"^\d{10}$", "required": False},
-        "ic_dph": {"pattern": r"^SK\d{10}$", "required": False},
-        "email": {"pattern": r"^[^@]+@[^@]+\.[^@]+$", "required": False},
+        "ico": {"pattern": _RE_ICO, "required": False},
+        "dic": {"pattern": _RE_DIC, "required": False},
+        "ic_dph": {"pattern": _RE_IC_DPH, "required": False},
+        "email": {"pattern": _RE_EMAIL, "required": False},
         "discount_percent": {"type": "decimal", "min": 0, "max": 100},
         "price_level": {"max_length": 60},
         "group_code": {"max_length": 60},
@@ -59,7 +87,7 @@ VALIDATION_RULES = {
     "contact": {
         "name": {"required": True, "max_length": 120},
         "partner_id": {"required": True, "type": "fk", "fk_entity": "partner"},
-        "email": {"pattern": r"^[^@]+@[^@]+\.[^@]+$", "required": False},
+        "email": {"pattern": _RE_EMAIL, "required": False},
     },
     "product": {
         "name": {"required": True, "max_length": 120},
@@ -95,6 +123,24 @@ FK_LOOKUPS = {
     "vehicle_name": ("vehicle", "name"),
 }
 
+# Name-based FK columns and the id column each one resolves into
+_FK_NAME_TO_ID_COL = {
+    column: column[:-5] + "_id" for column in FK_LOOKUPS if column.endswith("_name")
+}
+
+
+def _calamine_cell(value: Any) -> Any:
+    """Map a python-calamine cell value to what openpyxl would return.
+
+    Calamine reports empty cells as ``""`` and every number as a float;
+    openpyxl gives ``None`` and keeps whole numbers as ints.
+    """
+    if value == "":
+        return None
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
 
 class DataImporter:
     """Imports data from CSV/XLS files with validation and FK resolution."""
@@ -108,6 +154,10 @@ class DataImporter:
         self.inspector = inspector or DatabaseInspector()
         self._progress_callback: Optional[Callable[[int, int], None]] = None
         self._fk_cache: Dict[str, List[Tuple[int, str]]] = {}
+        self._fk_index: Dict[str, MatchIndex] = {}
+        self._fk_suggest: Dict[str, List[Candidate]] = {}
+        # (entity_type, normalized value) -> suggestions for unresolved FKs
+        self._fk_suggestions: Dict[Tuple[str, str], List[str]] = {}
 
     def set_progress_callback(self, callback: Callable[[int, int], None]) -> None:
         """Set a callback for progress updates.
@@ -138,21 +188,9 @@ class DataImporter:
         if not model:
             return []
 
-        # Determine the name column
-        name_col = "name"
-        if entity_type == "partner":
-            name_col = "name"
-        elif entity_type == "product":
-            name_col = "name"
-        elif entity_type == "bundle":
-            name_col = "name"
-        elif entity_type == "vehicle":
-            name_col = "name"
-
+        # Every FK-able entity is looked up by its name column
         try:
-            results = db.session.query(
-                model.id, getattr(model, name_col)
-            ).all()
+            results = db.session.query(model.id, model.name).all()
             self._fk_cache[entity_type] = results
             return results
         except Exception:
@@ -199,17 +237,19 @@ class DataImporter:
 
         # Try to find a match
         try:
-            match = find_best_match(str(value), candidates)
+            index = self._fk_index.get(entity_type)
+            if index is None:
+                index = self._fk_index[entity_type] = build_match_index(candidates)
+            match = find_best_match_indexed(str(value), index)
             if match:
                 return match[0], None
             else:
-                suggestions = suggest_similar(str(value), candidates)
                 return None, ValidationError(
                     row_number=row_number,
                     column=column,
                     message=f"{entity_type.title()} '{value}' not found",
                     value=value,
-                    suggestions=suggestions,
+                    suggestions=self._fk_suggestions_for(entity_type, str(value), candidates),
                 )
         except ValueError as e:
             # Ambiguous match
@@ -220,6 +260,23 @@ class DataImporter:
                 value=value,
             )
 
+    def _fk_suggestions_for(
+        self, entity_type: str, value: str, candidates: List[Tuple[int, str]]
+    ) -> List[str]:
+        """Return suggestions for an unresolved FK value.
+
+        Suggestions depend only on the normalized value, so an unknown name
+        repeated across many rows is scored against the candidates once.
+        """
+        key = (entity_type, normalize_for_matching(value))
+        suggestions = self._fk_suggestions.get(key)
+        if suggestions is None:
+            prepared = self._fk_suggest.get(entity_type)
+            if prepared is None:
+                prepared = self._fk_suggest[entity_type] = prepare_candidates(candidates)
+            suggestions = self._fk_suggestions[key] = suggest_similar(value, prepared)
+        return list(suggestions)
+
     def _validate_value(
         self,
         value: Any,
@@ -238,119 +295,141 @@ class DataImporter:
         Returns:
             Tuple of (converted_value, error_if_any)
         """
-        # Handle required check
-        is_empty = value is None or (isinstance(value, str) and value.strip() == "")
-        if rules.get("required", False) and is_empty:
-            return None, ValidationError(
-                row_number=row_number,
-                column=column,
-                message=f"Required field '{column}' is empty",
-                value=value,
-            )
+        return self._column_validator(column, rules)(value, row_number)
 
-        if is_empty:
-            return rules.get("default"), None
+    def _column_validator(
+        self, column: str, rules: Dict[str, Any]
+    ) -> Callable[[Any, int], Tuple[Any, Optional[ValidationError]]]:
+        """Build a validator for one column.
 
-        # Convert string value
-        str_value = str(value).strip()
+        The rules are looked up and the type dispatched once here, so the
+        returned ``validate(value, row_number)`` only does per-cell work.
 
-        # Type conversion
+        Args:
+            column: Column name
+            rules: Validation rules for this column
+
+        Returns:
+            Function returning (converted_value, error_if_any)
+        """
+        required = rules.get("required", False)
+        default = rules.get("default")
         value_type = rules.get("type", "string")
+        min_val = rules.get("min")
+        max_val = rules.get("max")
+        max_length = rules.get("max_length")
+        pattern = rules.get("pattern")
+
+        def check_range(converted, value, row_number):
+            if min_val is not None and converted < min_val:
+                return None, ValidationError(
+                    row_number=row_number,
+                    column=column,
+                    message=f"Value {converted} is below minimum {min_val}",
+                    value=value,
+                )
+            if max_val is not None and converted > max_val:
+                return None, ValidationError(
+                    row_number=row_number,
+                    column=column,
+                    message=f"Value {converted} exceeds maximum {max_val}",
+                    value=value,
+                )
+            return converted, None
 
         if value_type == "decimal":
-            try:
-                converted = float(str_value.replace(",", "."))
-                min_val = rules.get("min")
-                max_val = rules.get("max")
-                if min_val is not None and converted < min_val:
+            def convert(str_value, value, row_number):
+                try:
+                    # Decimal comma; most files already use a dot
+                    converted = float(
+                        str_value.replace(",", ".", 1) if "," in str_value else str_value
+                    )
+                except (ValueError, InvalidOperation):
                     return None, ValidationError(
                         row_number=row_number,
                         column=column,
-                        message=f"Value {converted} is below minimum {min_val}",
+                        message=f"Invalid decimal value: {str_value}",
                         value=value,
                     )
-                if max_val is not None and converted > max_val:
+                return check_range(converted, value, row_number)
+
+        elif value_type == "integer":
+            def convert(str_value, value, row_number):
+                try:
+                    converted = int(float(str_value))
+                except ValueError:
                     return None, ValidationError(
                         row_number=row_number,
                         column=column,
-                        message=f"Value {converted} exceeds maximum {max_val}",
+                        message=f"Invalid integer value: {str_value}",
                         value=value,
                     )
-                return converted, None
-            except (ValueError, InvalidOperation):
-                return None, ValidationError(
-                    row_number=row_number,
-                    column=column,
-                    message=f"Invalid decimal value: {str_value}",
-                    value=value,
-                )
+                return check_range(converted, value, row_number)
 
-        elif value_type == "integer":
-            try:
-                converted = int(float(str_value))
-                min_val = rules.get("min")
-                max_val = rules.get("max")
-                if min_val is not None and converted < min_val:
+        elif value_type == "boolean":
+            def convert(str_value, value, row_number):
+                lower = str_value.lower()
+                if lower in ("true", "1", "yes", "ano", "áno"):
+                    return True, None
+                elif lower in ("false", "0", "no", "nie"):
+                    return False, None
+                else:
                     return None, ValidationError(
                         row_number=row_number,
                         column=column,
-                        message=f"Value {converted} is below minimum {min_val}",
+                        message=f"Invalid boolean value: {str_value}",
                         value=value,
                     )
-                if max_val is not None and converted > max_val:
+
+        elif value_type == "fk" and rules.get("fk_entity"):
+            def convert(str_value, value, row_number):
+                return self._resolve_fk(column, str_value, row_number)
+
+        else:
+            # String type - check constraints
+            def convert(str_value, value, row_number):
+                if max_length and len(str_value) > max_length:
                     return None, ValidationError(
                         row_number=row_number,
                         column=column,
-                        message=f"Value {converted} exceeds maximum {max_val}",
+                        message=f"Value exceeds maximum length of {max_length}",
                         value=value,
                     )
-                return converted, None
-            except ValueError:
-                return None, ValidationError(
-                    row_number=row_number,
-                    column=column,
-                    message=f"Invalid integer value: {str_value}",
-                    value=value,
-                )
 
-        elif value_type == "boolean":
-            lower = str_value.lower()
-            if lower in ("true", "1", "yes", "ano", "áno"):
-                return True, None
-            elif lower in ("false", "0", "no", "nie"):
-                return False, None
-            else:
-                return None, ValidationError(
-                    row_number=row_number,
-                    column=column,
-                    message=f"Invalid boolean value: {str_value}",
-                    value=value,
-                )
+                if pattern and not pattern.match(str_value):
+                    return None, ValidationError(
+                        row_number=row_number,
+                        column=column,
+                        message=f"Value does not match required format",
+                        value=value,
+                    )
 
-        elif value_type == "fk":
-            fk_entity = rules.get("fk_entity")
-            if fk_entity:
-                return self._resolve_fk(column, str_value, row_number)
+                return str_value, None
 
-        # String type - check constraints
-        if rules.get("max_length") and len(str_value) > rules["max_length"]:
-            return None, ValidationError(
-                row_number=row_number,
-                column=column,
-                message=f"Value exceeds maximum length of {rules['max_length']}",
-                value=value,
-            )
+        def validate(value, row_number):
+            # Strings (every CSV cell) are stripped once, for both the
+            # emptiness check and the conversion
+            if isinstance(value, str):
+                str_value = value.strip()
+                is_empty = not str_value
+            else:
+                is_empty = value is None
+                str_value = "" if is_empty else str(value).strip()
 
-        if rules.get("pattern"):
-            if not re.match(rules["pattern"], str_value):
-                return None, ValidationError(
-                    row_number=row_number,
-                    column=column,
-                    message=f"Value does not match required format",
-                    value=value,
-                )
+            # Handle required check
+            if is_empty:
+                if required:
+                    return None, ValidationError(
+                        row_number=row_number,
+                        column=column,
+                        message=f"Required field '{column}' is empty",
+                        value=value,
+                    )
+                return default, None
+
+            return convert(str_value, value, row_number)
 
-        return str_value, None
+        return validate
 
     def _detect_file_type(self, file_path: Path) -> str:
         """Detect file type from extension.
@@ -372,19 +451,18 @@ class DataImporter:
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
 
-    def _read_csv(self, file_path: Path) -> Tuple[List[str], List[Dict[str, Any]]]:
-        """Read CSV file.
+    def _iter_csv(self, file_path: Path) -> Iterator[Any]:
+        """Stream a CSV file.
 
         Args:
             file_path: Path to CSV file
 
-        Returns:
-            Tuple of (headers, rows_as_dicts)
+        Yields:
+            The header list first, then each non-blank row as a list
         """
-        rows = []
-        headers = []
-
-        with open(file_path, "r", encoding="utf-8-sig") as f:
+        with open(
+            file_path, "r", encoding="utf-8-sig", newline="", buffering=_CSV_BUFFER_SIZE
+        ) as f:
             # Try to detect delimiter
             sample = f.read(4096)
             f.seek(0)
@@ -393,22 +471,35 @@ class DataImporter:
             except csv.Error:
                 dialect = csv.excel
 
-            reader = csv.DictReader(f, dialect=dialect)
-            headers = reader.fieldnames or []
+            reader = csv.reader(f, dialect=dialect)
+            yield next(reader, [])
             for row in reader:
-                rows.append(row)
+                # Blank lines, skipped as csv.DictReader does
+                if row:
+                    yield row
 
-        return headers, rows
+    def _iter_xlsx(self, file_path: Path) -> Iterator[Any]:
+        """Stream the first sheet of an XLSX file.
 
-    def _read_xlsx(self, file_path: Path) -> Tuple[List[str], List[Dict[str, Any]]]:
-        """Read XLSX file.
+        Uses python-calamine when installed, openpyxl otherwise.
 
         Args:
             file_path: Path to XLSX file
 
-        Returns:
-            Tuple of (headers, rows_as_dicts)
+        Yields:
+            The header list first, then each non-empty row as a sequence
         """
+        if _HAS_CALAMINE:
+            wb = CalamineWorkbook.from_path(str(file_path))
+            try:
+                sheet_rows = wb.get_sheet_by_index(0).iter_rows()
+                yield from self._iter_sheet_rows(
+                    [_calamine_cell(cell) for cell in row] for row in sheet_rows
+                )
+            finally:
+                wb.close()
+            return
+
         try:
             import openpyxl
         except ImportError:
@@ -417,25 +508,29 @@ class DataImporter:
                 "Install it with: pip install openpyxl"
             )
 
-        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-        ws = wb.active
-
-        rows = []
-        headers = []
-
-        for i, row in enumerate(ws.iter_rows(values_only=True)):
-            if i == 0:
-                headers = [str(cell) if cell else f"col_{j}" for j, cell in enumerate(row)]
-            else:
-                row_dict = {}
-                for j, cell in enumerate(row):
-                    if j < len(headers):
-                        row_dict[headers[j]] = cell
-                if any(v is not None for v in row_dict.values()):
-                    rows.append(row_dict)
+        # keep_links=False: external workbook links are never needed here
+        wb = openpyxl.load_workbook(
+            file_path, read_only=True, data_only=True, keep_links=False
+        )
+        try:
+            yield from self._iter_sheet_rows(wb.active.iter_rows(values_only=True))
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _iter_sheet_rows(sheet_rows: Iterator[Any]) -> Iterator[Any]:
+        """Yield the header list, then the sheet rows with any value set."""
+        first = next(sheet_rows, None)
+        headers = (
+            [str(cell) if cell else f"col_{j}" for j, cell in enumerate(first)]
+            if first is not None else []
+        )
+        yield headers
 
-        wb.close()
-        return headers, rows
+        width = len(headers)
+        for row in sheet_rows:
+            if any(v is not None for v in row[:width]):
+                yield row
 
     def validate_file(
         self,
@@ -453,28 +548,61 @@ class DataImporter:
         """
         file_type = self._detect_file_type(file_path)
 
+        # Rows are streamed; only the validated ones are kept
         if file_type == "csv":
-            headers, rows = self._read_csv(file_path)
+            rows = self._iter_csv(file_path)
         else:
-            headers, rows = self._read_xlsx(file_path)
+            rows = self._iter_xlsx(file_path)
+        headers = next(rows)
 
         rules = VALIDATION_RULES.get(entity_type, {})
         validated_rows = []
         errors = []
 
+        # A file without a single column of this entity (wrong file or
+        # entity type) is rejected before any row is read
+        model = self.inspector.get_model_class(entity_type)
+        if model is not None and headers:
+            targets = set(rules) | set(_FK_NAME_TO_ID_COL) | set(inspect(model).attrs.keys())
+            if not targets.intersection(headers):
+                rows.close()
+                errors.append(ValidationError(
+                    row_number=1,
+                    column="",
+                    message=f"No recognized {entity_type} columns in file header",
+                    value=", ".join(str(h) for h in headers),
+                ))
+                return headers, validated_rows, errors
+
+        # Per-column work decided once from the headers: (position, column,
+        # validator, target id column for name-based FKs or None).  A
+        # repeated header reads its last position, like a dict row would.
+        positions = {column: j for j, column in enumerate(headers)}
+        active_cols = []
+        for column, j in positions.items():
+            # Skip empty columns
+            if not column or column.startswith("col_"):
+                continue
+            id_column = _FK_NAME_TO_ID_COL.get(column)
+            if id_column is not None:
+                active_cols.append((j, column, None, id_column))
+            else:
+                active_cols.append(
+                    (j, column, self._column_validator(column, rules.get(column, {})), None)
+                )
+
         for i, row in enumerate(rows):
             row_number = i + 2  # Account for header row and 1-based indexing
             validated_row = {}
             row_has_error = False
 
-            for column, value in row.items():
-                # Skip empty columns
-                if not column or column.startswith("col_"):
-                    continue
+            row_len = len(row)
+            for j, column, validate, id_column in active_cols:
+                # Short rows leave trailing columns empty
+                value = row[j] if j < row_len else None
 
-                # Check if this is a name-based FK that needs resolution
-                if column in FK_LOOKUPS and column.endswith("_name"):
-                    id_column = column[:-5] + "_id"
+                # Name-based FK that needs resolution
+                if id_column is not None:
                     resolved_id, error = self._resolve_fk(column, value, row_number)
                     if error:
                         errors.append(error)
@@ -483,11 +611,7 @@ class DataImporter:
                         validated_row[id_column] = resolved_id
                     continue
 
-                # Get rules for this column
-                col_rules = rules.get(column, {})
-                converted, error = self._validate_value(
-                    value, column, col_rules, row_number
-                )
+                converted, error = validate(value, row_number)
 
                 if error:
                     errors.append(error)
@@ -534,6 +658,9 @@ class DataImporter:
 
         # Clear FK cache
         self._fk_cache.clear()
+        self._fk_index.clear()
+        self._fk_suggest.clear()
+        self._fk_suggestions.clear()
 
         # Validate file
         headers, validated_rows, errors = self.validate_file(file_path, entity_type)
@@ -564,43 +691,73 @@ class DataImporter:
 
         # Import rows
         try:
-            for i, row_data in enumerate(validated_rows):
-                self._report_progress(i + 1, len(validated_rows))
-
-                # Check for existing record
-                existing = None
-                if unique_key and unique_key in row_data:
-                    existing = db.session.query(model).filter(
-                        getattr(model, unique_key) == row_data[unique_key]
-                    ).first()
-
-                if existing:
-                    if conflict_mode == "skip":
-                        result.skipped_count += 1
-                        continue
-                    elif conflict_mode == "error":
-                        result.errors.append(ValidationError(
-                            row_number=i + 2,
-                            column=unique_key,
-                            message=f"Record already exists with {unique_key}={row_data[unique_key]}",
-                            value=row_data[unique_key],
-                        ))
-                        if not partial_commit:
-                            db.session.rollback()
-                            return result
-                        continue
-                    elif conflict_mode == "update":
-                        for key, value in row_data.items():
-                            if value is not None and hasattr(existing, key):
-                                setattr(existing, key, value)
-                        result.updated_count += 1
-                        continue
-
-                # Create new record
-                new_record = model(**row_data)
-                db.session.add(new_record)
-                result.imported_count += 1
-
+            existing_map = (
+                self._load_existing(model, unique_key, validated_rows)
+                if unique_key else {}
+            )
+            # New rows are inserted in bulk after the loop
+            to_insert: List[Dict[str, Any]] = []
+            # Only column attributes: bulk_insert_mappings silently drops
+            # anything else, relationships included
+            model_columns = set(inspect(model).column_attrs.keys())
+
+            # Updates are flushed once by the commit below, not by whatever
+            # attribute load or query happens to run mid-loop
+            with db.session.no_autoflush:
+                for i, row_data in enumerate(validated_rows):
+                    self._report_progress(i + 1, len(validated_rows))
+
+                    # Check for existing record
+                    existing = None
+                    if unique_key and unique_key in row_data:
+                        existing = existing_map.get(row_data[unique_key])
+
+                    if existing:
+                        if conflict_mode == "skip":
+                            result.skipped_count += 1
+                            continue
+                        elif conflict_mode == "error":
+                            result.errors.append(ValidationError(
+                                row_number=i + 2,
+                                column=unique_key,
+                                message=f"Record already exists with {unique_key}={row_data[unique_key]}",
+                                value=row_data[unique_key],
+                            ))
+                            if not partial_commit:
+                                db.session.rollback()
+                                return result
+                            continue
+                        elif conflict_mode == "update":
+                            if isinstance(existing, dict):
+                                # Row created earlier in this file, not yet inserted
+                                existing.update(
+                                    (key, value) for key, value in row_data.items()
+                                    if value is not None
+                                )
+                            else:
+                                for key, value in row_data.items():
+                                    if value is not None and hasattr(existing, key):
+                                        setattr(existing, key, value)
+                            result.updated_count += 1
+                            continue
+
+                    # Create new record
+                    unknown = row_data.keys() - model_columns
+                    if unknown:
+                        raise ValueError(
+                            f"Unknown column(s) for {entity_type}: "
+                            + ", ".join(sorted(unknown))
+                        )
+                    new_row = dict(row_data)
+                    to_insert.append(new_row)
+                    result.imported_count += 1
+                    if unique_key and unique_key in row_data:
+                        # Later rows with the same key see this one as existing
+                        existing_map.setdefault(row_data[unique_key], new_row)
+
+            if to_insert:
+                enforce_tenant_on_rows(model, to_insert)
+                db.session.bulk_insert_mappings(model, to_insert)
             db.session.commit()
             result.success = True
 
@@ -614,6 +771,42 @@ class DataImporter:
 
         return result
 
+    def _load_existing(
+        self, model: Type, unique_key: str, rows: List[Dict[str, Any]]
+    ) -> Dict[Any, Any]:
+        """Fetch existing records matching the rows' unique key values.
+
+        Replaces a lookup query per row with one ``IN`` query per chunk of
+        keys.  A ``None`` key matches records whose key column is NULL,
+        like the ``== None`` comparison it replaces.
+
+        Args:
+            model: Model class being imported
+            unique_key: Column used for conflict detection
+            rows: Validated rows
+
+        Returns:
+            Dict mapping key value to the first existing record with it
+        """
+        column = getattr(model, unique_key)
+        keys = {row[unique_key] for row in rows if unique_key in row}
+        has_null = None in keys
+        keys.discard(None)
+        keys = list(keys)
+
+        filters = [
+            column.in_(keys[start:start + _EXISTING_KEYS_CHUNK])
+            for start in range(0, len(keys), _EXISTING_KEYS_CHUNK)
+        ]
+        if has_null:
+            filters.append(column.is_(None))
+
+        existing_map: Dict[Any, Any] = {}
+        for condition in filters:
+            for record in db.session.query(model).filter(condition).order_by(model.id):
+                existing_map.setdefault(getattr(record, unique_key), record)
+        return existing_map
+
     def _get_unique_key(self, entity_type: str) -> Optional[str]:
         """Get the unique key column for an entity type.
 
@@ -641,36 +834,4 @@ class DataImporter:
         Returns:
             CSV template string with headers and example row
         """
-        templates = {
-            "partner": (
-                "name,street,street_number,postal_code,city,ico,dic,ic_dph,"
-                "email,phone,price_level,discount_percent,group_code,note\n"
-                '"ABC Company s.r.o.",Hlavná,15,81101,Bratislava,12345678,'
-                '2012345678,SK2012345678,info@abc.sk,+421903111222,A,5.0,STAVBY,'
-                '"Important customer"'
-            ),
-            "contact": (
-                "partner_name,name,email,phone,role,can_order,can_receive\n"
-                '"ABC Company s.r.o.","Ján Novák",jan@abc.sk,+421903111222,'
-                "Manager,true,true"
-            ),
-            "product": (
-                "product_number,name,description,price,vat_rate,is_service,"
-                "discount_excluded\n"
-                'PROD-001,"Cement 25kg","Portland cement bag",6.50,20.0,false,false'
-            ),
-            "bundle": (
-                "bundle_number,name,bundle_price,discount_excluded\n"
-                'BUN-001,"Starter Pack",99.00,false'
-            ),
-            "bundle_item": (
-                "bundle_name,product_name,quantity\n"
-                '"Starter Pack","Cement 25kg",10'
-            ),
-            "vehicle": (
-                "name,registration_number,notes,active\n"
-                '"MAN TGS 26.400",BA-123AB,"Heavy truck",true'
-            ),
-        }
-
-        return templates.get(entity_type, "# No template available for this entity type")
+        return IMPORT_TEMPLATES.get(entity_type, "# No template available for this entity type")
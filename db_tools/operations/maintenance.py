@@ -2,14 +2,66 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+import re
+import sqlite3
+from itertools import chain
 from typing import Any, Dict, List, Optional
 
 from flask import g
+from sqlalchemy import DateTime, func, select
 
 from extensions import db
 from db_tools.core.database_inspector import DatabaseInspector
 
+# Counter part of a document number (format like XX-YYYY-NNNN)
+_RE_TRAILING_NUMBER = re.compile(r"(\d+)$")
+
+# Rows fetched per round-trip when exporting a table to CSV
+_EXPORT_BATCH = 1000
+
+# Orphans deleted (and committed) per statement by repair_orphaned_records
+ORPHAN_DELETE_BATCH = 5000
+
+# SQLite authorizer actions a read-only query may perform
+_READ_ONLY_ACTIONS = frozenset({
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+})
+
+# Schema-introspection pragmas, usable as table-valued functions such as
+# ``SELECT * FROM pragma_table_info('product')``; none of them can write
+_READ_ONLY_PRAGMAS = frozenset({
+    "collation_list",
+    "compile_options",
+    "database_list",
+    "foreign_key_list",
+    "function_list",
+    "index_info",
+    "index_list",
+    "index_xinfo",
+    "module_list",
+    "pragma_list",
+    "table_info",
+    "table_list",
+    "table_xinfo",
+})
+
+
+def _read_only_authorizer(action, arg1, *args):
+    """SQLite authorizer allowing only reads; everything else is denied."""
+    if action in _READ_ONLY_ACTIONS:
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_PRAGMA and arg1 in _READ_ONLY_PRAGMAS:
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_UPDATE and arg1 == "sqlite_master":
+        # Reported while a pragma_* virtual table is declared; no statement
+        # that passed the SELECT check can write the schema table, and the
+        # connection is opened read-only anyway
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
 
 def _current_user_id():
     """Return the current user's ID for audit logging, or None."""
@@ -52,6 +104,14 @@ class MaintenanceTool:
         """
         return self.inspector.get_table_counts()
 
+    def snapshot(self) -> Dict[str, Any]:
+        """Get table counts, statistics and integrity issues at once.
+
+        Returns:
+            Dict with ``counts``, ``stats`` and ``integrity`` keys
+        """
+        return self.inspector.snapshot()
+
     def reset_number_sequences(self) -> Dict[str, int]:
         """Reset all number sequences to continue from current max values.
 
@@ -64,43 +124,34 @@ class MaintenanceTool:
 
         # Entity types and their number columns
         entity_number_map = {
-            "order": (models.Order, "order_number"),
-            "delivery_note": (models.DeliveryNote, "note_number"),
-            "invoice": (models.Invoice, "invoice_number"),
+            "order": models.Order.order_number,
+            "delivery_note": models.DeliveryNote.note_number,
+            "invoice": models.Invoice.invoice_number,
         }
 
-        for entity_type, (model, number_col) in entity_number_map.items():
-            # Find max existing number
-            max_record = (
-                db.session.query(model)
-                .filter(getattr(model, number_col).isnot(None))
-                .order_by(getattr(model, number_col).desc())
-                .first()
-            )
-
-            # Extract numeric part and update sequence
-            if max_record:
-                number = getattr(max_record, number_col)
-                # Try to extract the counter part (assumes format like XX-YYYY-NNNN)
-                import re
-                match = re.search(r"(\d+)$", number or "")
-                if match:
-                    max_val = int(match.group(1))
-                    results[entity_type] = max_val
-                else:
-                    results[entity_type] = 0
-            else:
-                results[entity_type] = 0
-
-        # Update NumberSequence table
-        for entity_type, last_value in results.items():
-            seq = (
-                db.session.query(models.NumberSequence)
-                .filter_by(entity_type=entity_type)
-                .first()
-            )
-            if seq:
-                seq.last_value = last_value
+        # Highest number of every entity in one round-trip; MAX() compares
+        # like the ORDER BY ... DESC it replaces and skips NULLs
+        max_numbers = db.session.execute(select(*[
+            select(func.max(column)).scalar_subquery().label(entity_type)
+            for entity_type, column in entity_number_map.items()
+        ])).one()
+
+        for entity_type, number in max_numbers._mapping.items():
+            # Extract numeric part
+            match = _RE_TRAILING_NUMBER.search(number or "")
+            results[entity_type] = int(match.group(1)) if match else 0
+
+        # Update the first NumberSequence row of each entity type, all
+        # loaded by one query
+        sequences = {}
+        for seq in (
+            db.session.query(models.NumberSequence)
+            .filter(models.NumberSequence.entity_type.in_(list(results)))
+            .order_by(models.NumberSequence.id)
+        ):
+            sequences.setdefault(seq.entity_type, seq)
+        for entity_type, seq in sequences.items():
+            seq.last_value = results[entity_type]
 
         db.session.commit()
         return results
@@ -167,57 +218,48 @@ class MaintenanceTool:
 
         deleted = {}
 
-        # Orphaned OrderItems
-        orphaned = (
-            db.session.query(models.OrderItem)
-            .filter(~models.OrderItem.order_id.in_(
-                db.session.query(models.Order.id)
-            ))
-            .all()
-        )
-        if orphaned:
-            for record in orphaned:
-                db.session.delete(record)
-            deleted["order_item"] = len(orphaned)
-
-        # Orphaned DeliveryItems
-        orphaned = (
-            db.session.query(models.DeliveryItem)
-            .filter(~models.DeliveryItem.delivery_note_id.in_(
-                db.session.query(models.DeliveryNote.id)
-            ))
-            .all()
-        )
-        if orphaned:
-            for record in orphaned:
-                db.session.delete(record)
-            deleted["delivery_item"] = len(orphaned)
-
-        # Orphaned InvoiceItems
-        orphaned = (
-            db.session.query(models.InvoiceItem)
-            .filter(~models.InvoiceItem.invoice_id.in_(
-                db.session.query(models.Invoice.id)
-            ))
-            .all()
-        )
-        if orphaned:
-            for record in orphaned:
-                db.session.delete(record)
-            deleted["invoice_item"] = len(orphaned)
-
-        # Orphaned DeliveryNoteOrders
-        orphaned = (
-            db.session.query(models.DeliveryNoteOrder)
-            .filter(~models.DeliveryNoteOrder.delivery_note_id.in_(
-                db.session.query(models.DeliveryNote.id)
-            ))
-            .all()
+        # (entity type, child model, FK column, parent model)
+        orphan_checks = (
+            ("order_item", models.OrderItem, models.OrderItem.order_id, models.Order),
+            ("delivery_item", models.DeliveryItem,
+             models.DeliveryItem.delivery_note_id, models.DeliveryNote),
+            ("invoice_item", models.InvoiceItem, models.InvoiceItem.invoice_id, models.Invoice),
+            ("delivery_note_order", models.DeliveryNoteOrder,
+             models.DeliveryNoteOrder.delivery_note_id, models.DeliveryNote),
         )
-        if orphaned:
-            for record in orphaned:
-                db.session.delete(record)
-            deleted["delivery_note_order"] = len(orphaned)
+
+        # Set-based DELETEs instead of loading and deleting every orphan
+        # through the ORM, in committed batches so no single statement holds
+        # the write lock for long.  The batch is selected by a subquery, so
+        # no id list is bound (SQLite caps bound variables per statement)
+        for entity_type, model, fk_column, parent in orphan_checks:
+            orphan_filter = ~fk_column.in_(select(parent.id))
+            count = 0
+            while True:
+                batch = (
+                    select(model.id)
+                    .where(orphan_filter)
+                    .order_by(model.id)
+                    .limit(ORPHAN_DELETE_BATCH)
+                    .scalar_subquery()
+                )
+                if model is models.DeliveryItem:
+                    # Bulk deletes skip ORM cascades; remove the components
+                    # the items' delete-orphan cascade used to take with them
+                    db.session.query(models.DeliveryItemComponent).filter(
+                        models.DeliveryItemComponent.delivery_item_id.in_(batch)
+                    ).delete(synchronize_session=False)
+                deleted_now = (
+                    db.session.query(model)
+                    .filter(model.id.in_(batch))
+                    .delete(synchronize_session=False)
+                )
+                db.session.commit()
+                count += deleted_now
+                if deleted_now < ORPHAN_DELETE_BATCH:
+                    break
+            if count:
+                deleted[entity_type] = count
 
         if deleted:
             # Log the action
@@ -251,27 +293,39 @@ class MaintenanceTool:
         if not model:
             return {"success": False, "error": f"Unknown entity type: {entity_type}"}
 
-        records = db.session.query(model).all()
-        if not records:
+        # Stream plain Core rows in table-column order instead of loading
+        # every record into the ORM
+        rows = db.session.execute(
+            select(model.__table__).execution_options(yield_per=_EXPORT_BATCH)
+        )
+        first = rows.fetchone()
+        if first is None:
+            rows.close()
             return {"success": True, "count": 0, "path": output_path}
 
-        # Get column names from first record
         columns = [c.name for c in model.__table__.columns]
+        # Only DateTime columns need converting (to ISO format); every other
+        # value is written as the row holds it
+        datetime_positions = [
+            i for i, c in enumerate(model.__table__.columns)
+            if isinstance(c.type, DateTime)
+        ]
+        count = 0
 
         with open(output_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=columns)
-            writer.writeheader()
-
-            for record in records:
-                row = {}
-                for col in columns:
-                    value = getattr(record, col, None)
-                    if isinstance(value, datetime):
-                        value = value.isoformat()
-                    row[col] = value
+            writer = csv.writer(f)
+            writer.writerow(columns)
+
+            for row in chain((first,), rows):
+                if datetime_positions:
+                    row = list(row)
+                    for i in datetime_positions:
+                        if row[i] is not None:
+                            row[i] = row[i].isoformat()
                 writer.writerow(row)
+                count += 1
 
-        return {"success": True, "count": len(records), "path": output_path}
+        return {"success": True, "count": count, "path": output_path}
 
     def get_fk_dependencies(self, entity_type: str) -> Dict[str, Any]:
         """Get foreign key dependencies for an entity type.
@@ -293,9 +347,6 @@ class MaintenanceTool:
         Returns:
             Dict with columns and rows
         """
-        import re
-        import sqlite3
-
         sql_stripped = sql.strip()
         sql_upper = sql_stripped.upper()
 
@@ -306,29 +357,17 @@ class MaintenanceTool:
                 "error": "Only SELECT queries are allowed",
             }
 
-        # Block dangerous keywords using word boundary matching
-        # to avoid false positives like "UPDATED_AT" matching "UPDATE"
-        dangerous = ["INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "TRUNCATE", "CREATE"]
-        for keyword in dangerous:
-            if re.search(r'\b' + keyword + r'\b', sql_upper):
-                return {
-                    "success": False,
-                    "error": f"Query contains forbidden keyword: {keyword}",
-                }
-
-        # Block multiple statements (semicolons)
-        if ";" in sql_stripped.rstrip(";"):
-            return {
-                "success": False,
-                "error": "Multiple statements are not allowed",
-            }
-
         try:
             # Use a separate read-only connection for safety
             db_uri = db.engine.url.render_as_string(hide_password=False)
             db_path = db_uri.replace("sqlite:///", "")
             conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
             try:
+                # SQLite's parser consults the authorizer for every action, so
+                # writes, DDL, ATTACH and all but introspection pragmas are
+                # refused however they are spelled; execute() itself rejects
+                # multiple statements
+                conn.set_authorizer(_read_only_authorizer)
                 cursor = conn.execute(sql_stripped)
                 columns = [desc[0] for desc in cursor.description] if cursor.description else []
                 rows = [list(row) for row in cursor.fetchall()]
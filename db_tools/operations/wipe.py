@@ -153,7 +153,7 @@ class DatabaseWiper:
                 result["backup_path"] = str(backup_path)
 
                 # Verify backup
-                if not self.backup_manager.verify_backup(backup_path):
+                if not self.backup_manager.verify_backup(backup_path, deep=True):
                     result["errors"].append("Backup verification failed")
                     return result
             except Exception as e:
@@ -180,7 +180,9 @@ class DatabaseWiper:
                 self._report_progress(table_name, i + 1, total_tables)
 
                 try:
-                    count = db.session.query(model).delete()
+                    # Core DELETE without WHERE: no identity-map sync, and
+                    # SQLite can truncate tables no foreign key points at
+                    count = db.session.execute(model.__table__.delete()).rowcount
                     result["deleted_counts"][table_name] = count
                 except Exception as e:
                     result["errors"].append(f"Error deleting {table_name}: {str(e)}")
@@ -205,6 +207,12 @@ class DatabaseWiper:
             except Exception:
                 pass
 
+            # Give the freed pages back to the filesystem
+            try:
+                self._vacuum()
+            except Exception as e:
+                result["errors"].append(f"VACUUM failed: {str(e)}")
+
             # Cleanup old backups
             try:
                 self.backup_manager.cleanup_old_backups()
@@ -218,6 +226,22 @@ class DatabaseWiper:
         result["completed_at"] = datetime.utcnow().isoformat()
         return result
 
+    def _vacuum(self) -> None:
+        """Rebuild a SQLite database file so deleted pages are released.
+
+        A wipe leaves the file at its old size with the freed pages on the
+        freelist; VACUUM compacts it.  VACUUM cannot run inside a
+        transaction, hence the autocommit connection, and in WAL mode the
+        shrink only reaches the main file at checkpoint time.
+        """
+        if db.engine.dialect.name != "sqlite":
+            return
+        with db.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as conn:
+            conn.exec_driver_sql("VACUUM")
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
     def _reset_sequences(self) -> None:
         """Reset all number sequences to 0."""
         import models
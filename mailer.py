@@ -1,13 +1,20 @@
 import logging
 import smtplib
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from email.message import EmailMessage
 from pathlib import Path
 from socket import gaierror, timeout
+from typing import Optional
 
 from config_models import EmailConfig
 
 logger = logging.getLogger(__name__)
 
+# Single background worker so queued emails go out in submission order
+# and HTTP requests never wait on the SMTP round-trips.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mailer")
+
 
 class MailerError(Exception):
     """Exception raised for email sending errors."""
@@ -15,29 +22,18 @@ class MailerError(Exception):
     pass
 
 
-def send_document_email(
+def _build_message(
     config: EmailConfig,
     subject: str,
     recipient: str,
     cc: str,
     body: str,
     attachment_path: str,
-) -> bool:
-    """Send email with document attachment.
-
-    Args:
-        config: Email configuration.
-        subject: Email subject.
-        recipient: Email recipient address.
-        cc: CC address (optional).
-        body: Email body text.
-        attachment_path: Path to attachment file.
-
-    Returns:
-        True if email was sent successfully.
+) -> EmailMessage:
+    """Build the email message with the document attached.
 
     Raises:
-        MailerError: If email sending fails.
+        MailerError: If the attachment file does not exist.
     """
     message = EmailMessage()
     message["Subject"] = subject
@@ -58,15 +54,14 @@ def send_document_email(
         subtype="pdf",
         filename=attachment.name,
     )
+    return message
+
 
+@contextmanager
+def _smtp_errors():
+    """Translate SMTP and network errors into MailerError."""
     try:
-        logger.info(f"Sending email to {recipient} with subject: {subject}")
-        with smtplib.SMTP(config.smtp_host, config.smtp_port, timeout=30) as server:
-            server.starttls()
-            server.login(config.smtp_user, config.smtp_password)
-            server.send_message(message)
-        logger.info(f"Email sent successfully to {recipient}")
-        return True
+        yield
 
     except smtplib.SMTPAuthenticationError as e:
         logger.error(f"SMTP authentication failed: {e}")
@@ -87,3 +82,140 @@ def send_document_email(
     except OSError as e:
         logger.error(f"OS error while sending email: {e}")
         raise MailerError(f"Failed to send email: {e}")
+
+
+def _connect(config: EmailConfig) -> smtplib.SMTP:
+    """Open an SMTP connection, upgrade it to TLS and log in."""
+    server = smtplib.SMTP(config.smtp_host, config.smtp_port, timeout=30)
+    try:
+        server.starttls()
+        server.login(config.smtp_user, config.smtp_password)
+    except BaseException:
+        server.close()
+        raise
+    return server
+
+
+class MailerSession:
+    """SMTP connection reused for several messages.
+
+    Connecting, STARTTLS and login cost several round-trips, so callers
+    sending a batch should do them once::
+
+        with MailerSession(config) as session:
+            for invoice in invoices:
+                send_document_email(config, ..., session=session)
+
+    A session is not thread-safe; use one per thread.
+
+    Raises:
+        MailerError: If connecting or logging in fails.
+    """
+
+    def __init__(self, config: EmailConfig):
+        self.config = config
+        self.server = None
+
+    def __enter__(self) -> "MailerSession":
+        with _smtp_errors():
+            self.server = _connect(self.config)
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        server, self.server = self.server, None
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+        return False
+
+
+def _deliver(
+    config: EmailConfig,
+    message: EmailMessage,
+    session: Optional[MailerSession] = None,
+) -> bool:
+    """Send a prepared message over SMTP.
+
+    Uses the connection of *session* when given, otherwise opens one for
+    this message only.
+
+    Raises:
+        MailerError: If email sending fails.
+    """
+    recipient = message["To"]
+    subject = message["Subject"]
+    with _smtp_errors():
+        logger.info(f"Sending email to {recipient} with subject: {subject}")
+        if session is not None:
+            session.server.send_message(message)
+        else:
+            with _connect(config) as server:
+                server.send_message(message)
+        logger.info(f"Email sent successfully to {recipient}")
+        return True
+
+
+def send_document_email(
+    config: EmailConfig,
+    subject: str,
+    recipient: str,
+    cc: str,
+    body: str,
+    attachment_path: str,
+    session: Optional[MailerSession] = None,
+) -> bool:
+    """Send email with document attachment.
+
+    Args:
+        config: Email configuration.
+        subject: Email subject.
+        recipient: Email recipient address.
+        cc: CC address (optional).
+        body: Email body text.
+        attachment_path: Path to attachment file.
+        session: Open MailerSession to send through (optional).
+
+    Returns:
+        True if email was sent successfully.
+
+    Raises:
+        MailerError: If email sending fails.
+    """
+    message = _build_message(config, subject, recipient, cc, body, attachment_path)
+    return _deliver(config, message, session)
+
+
+def _log_failure(future: Future) -> None:
+    """Log unexpected errors raised on the background worker."""
+    exc = future.exception()
+    if exc is not None and not isinstance(exc, MailerError):
+        # MailerError is already logged by _deliver
+        logger.exception("Unexpected error in background email", exc_info=exc)
+
+
+def queue_document_email(
+    config: EmailConfig,
+    subject: str,
+    recipient: str,
+    cc: str,
+    body: str,
+    attachment_path: str,
+) -> Future:
+    """Queue an email with document attachment for background sending.
+
+    The message (including the attachment bytes) is built immediately, so
+    a missing attachment is reported to the caller; only the SMTP delivery
+    runs on the background worker.
+
+    Returns:
+        Future resolving to True, or raising MailerError on failure.
+
+    Raises:
+        MailerError: If the attachment file does not exist.
+    """
+    message = _build_message(config, subject, recipient, cc, body, attachment_path)
+    future = _executor.submit(_deliver, config, message)
+    future.add_done_callback(_log_failure)
+    return future
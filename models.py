@@ -348,6 +348,7 @@ class DeliveryNote(db.Model):
     __table_args__ = (
         db.Index("ix_delivery_note_invoiced", "invoiced"),
         db.Index("ix_delivery_note_confirmed", "confirmed"),
+        db.Index("ix_delivery_note_unbilled", "invoiced", "primary_order_id"),
     )
 
 
@@ -361,6 +362,11 @@ class DeliveryNoteOrder(db.Model):
 
     order = db.relationship("Order")
 
+    __table_args__ = (
+        db.Index("ix_delivery_note_order_note", "delivery_note_id", "order_id"),
+        db.Index("ix_delivery_note_order_order", "order_id", "delivery_note_id"),
+    )
+
 
 class DeliveryItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
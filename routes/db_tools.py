@@ -72,14 +72,12 @@ def get_database_uri() -> str:
 @admin_required
 def index():
     """Database tools dashboard."""
-    inspector = DatabaseInspector()
-    stats = inspector.get_statistics()
-    integrity_issues = inspector.check_integrity()
+    snapshot = DatabaseInspector().snapshot()
 
     return render_template(
         "admin/db_tools/index.html",
-        stats=stats,
-        integrity_issues=integrity_issues,
+        stats=snapshot["stats"],
+        integrity_issues=snapshot["integrity"],
     )
 
 
@@ -96,15 +94,20 @@ def wipe():
     inspector = DatabaseInspector()
 
     is_production = wiper.is_production_environment()
-    preview = wiper.get_deletion_preview(include_config=False)
+    # One count query; the data-only preview is a subset of the full one
     preview_with_config = wiper.get_deletion_preview(include_config=True)
+    preview = [
+        (table_name, count) for table_name, count in preview_with_config
+        if not inspector.is_config_table(table_name)
+    ]
 
     if request.method == "POST":
         action = request.form.get("action")
 
         if action == "preview":
             include_config = request.form.get("include_config") == "on"
-            preview = wiper.get_deletion_preview(include_config=include_config)
+            if include_config:
+                preview = preview_with_config
             return render_template(
                 "admin/db_tools/wipe.html",
                 is_production=is_production,
@@ -413,16 +416,13 @@ def _cleanup_import_session():
 @admin_required
 def maintenance():
     """Maintenance tools dashboard."""
-    tool = MaintenanceTool()
-    stats = tool.get_statistics()
-    table_counts = tool.get_table_counts()
-    integrity_issues = tool.check_integrity()
+    snapshot = MaintenanceTool().snapshot()
 
     return render_template(
         "admin/db_tools/maintenance.html",
-        stats=stats,
-        table_counts=table_counts,
-        integrity_issues=integrity_issues,
+        stats=snapshot["stats"],
+        table_counts=snapshot["counts"],
+        integrity_issues=snapshot["integrity"],
     )
 
 
@@ -6,6 +6,7 @@ from itertools import groupby
 
 from flask import (
     Blueprint,
+    abort,
     flash,
     jsonify,
     redirect,
@@ -15,10 +16,11 @@ from flask import (
     url_for,
 )
 from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload, selectinload
 
 from extensions import db
 from models import (
-    Bundle,
     BundleItem,
     DeliveryItem,
     DeliveryItemComponent,
@@ -26,18 +28,63 @@ from models import (
     DeliveryNoteOrder,
     Order,
     Partner,
-    Product,
 )
 from services.audit import log_action
 from services.auth import get_current_user, role_required
+from services.catalog import active_bundles, active_products, bundle_by_id
 from services.numbering import generate_number
-from services.pdf import generate_delivery_pdf
+from services.pdf import stream_delivery_pdf
 from utils import parse_datetime, safe_int, utc_now
-from services.tenant import tenant_query, stamp_tenant, tenant_get_or_404
+from services.tenant import require_tenant, tenant_query, stamp_tenant, tenant_get_or_404
 
 delivery_bp = Blueprint("delivery", __name__)
 
 
+def _update_delivery_or_404(delivery_id: int, **values) -> None:
+    """Set *values* on the tenant's delivery note with a single UPDATE.
+
+    Aborts with 404 when no such delivery note exists for the tenant.
+    """
+    result = db.session.execute(
+        update(DeliveryNote)
+        .where(
+            DeliveryNote.id == delivery_id,
+            DeliveryNote.tenant_id == require_tenant(),
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        abort(404)
+
+
+def _insert_bundle_components(bundle_rows):
+    """Bulk-insert the component rows of bundle delivery items.
+
+    *bundle_rows* holds ``(delivery_item, bundle, quantity)`` tuples collected
+    while parsing the item form.  The delivery items are flushed first so
+    their ids are known, then every component is written with a single
+    executemany instead of one ORM object per bundle line.
+    """
+    if not bundle_rows:
+        return
+    db.session.flush()
+    tid = require_tenant()
+    db.session.bulk_insert_mappings(
+        DeliveryItemComponent,
+        [
+            {
+                "tenant_id": tid,
+                "delivery_item_id": delivery_item.id,
+                "product_id": bundle_item.product_id,
+                "quantity": bundle_item.quantity * qty,
+            }
+            for delivery_item, bundle, qty in bundle_rows
+            for bundle_item in bundle.items
+        ],
+    )
+
+
 @delivery_bp.route("/delivery-notes/partner-orders/<int:partner_id>", methods=["GET"])
 @role_required("manage_delivery")
 def partner_orders(partner_id: int):
@@ -96,10 +143,6 @@ def partner_orders(partner_id: int):
 @delivery_bp.route("/delivery-notes", methods=["GET", "POST"])
 @role_required("manage_delivery")
 def list_delivery_notes():
-    partners = tenant_query(Partner).filter_by(is_active=True, is_deleted=False).all()
-    products = tenant_query(Product).filter_by(is_active=True).all()
-    bundles = tenant_query(Bundle).filter_by(is_active=True).all()
-
     if request.method == "POST":
         partner_id = safe_int(request.form.get("partner_id"))
         if not partner_id:
@@ -137,6 +180,7 @@ def list_delivery_notes():
             delivery.orders.append(dno)
 
         # Parse items from dynamic table (same pattern as orders)
+        bundle_rows = []
         idx = 0
         while True:
             item_type = request.form.get(f"items[{idx}][type]")
@@ -168,15 +212,9 @@ def list_delivery_notes():
                             unit_price=unit_price, line_total=line_total,
                         )
                         stamp_tenant(delivery_item)
-                        bundle = tenant_query(Bundle).filter_by(id=bid).first()
+                        bundle = bundle_by_id(bid)
                         if bundle:
-                            for bundle_item in bundle.items:
-                                comp = DeliveryItemComponent(
-                                    product_id=bundle_item.product_id,
-                                    quantity=bundle_item.quantity * qty,
-                                )
-                                stamp_tenant(comp)
-                                delivery_item.components.append(comp)
+                            bundle_rows.append((delivery_item, bundle, qty))
                         delivery.items.append(delivery_item)
                 elif item_type == "manual":
                     name = request.form.get(f"items[{idx}][manual_name]", "").strip()
@@ -209,15 +247,9 @@ def list_delivery_notes():
                             unit_price=unit_price, line_total=line_total,
                         )
                         stamp_tenant(delivery_item)
-                        bundle = tenant_query(Bundle).filter_by(id=bid).first()
+                        bundle = bundle_by_id(bid)
                         if bundle:
-                            for bundle_item in bundle.items:
-                                comp = DeliveryItemComponent(
-                                    product_id=bundle_item.product_id,
-                                    quantity=bundle_item.quantity * qty,
-                                )
-                                stamp_tenant(comp)
-                                delivery_item.components.append(comp)
+                            bundle_rows.append((delivery_item, bundle, qty))
                         delivery.items.append(delivery_item)
                     elif is_manual and manual_name:
                         di = DeliveryItem(
@@ -228,6 +260,7 @@ def list_delivery_notes():
                         stamp_tenant(di)
                         delivery.items.append(di)
             idx += 1
+        _insert_bundle_components(bundle_rows)
 
         log_action("create", "delivery_note", delivery.id, "created")
         db.session.commit()
@@ -261,9 +294,9 @@ def list_delivery_notes():
         total=total,
         page=page,
         per_page=per_page,
-        partners=partners,
-        products=products,
-        bundles=bundles,
+        partners=tenant_query(Partner).filter_by(is_active=True, is_deleted=False).all(),
+        products=active_products(),
+        bundles=active_bundles(),
         today=today,
         yesterday=yesterday,
     )
@@ -339,6 +372,7 @@ def edit_delivery(delivery_id: int):
     delivery.show_prices = request.form.get("show_prices") == "on"
     # Replace items
     delivery.items.clear()
+    bundle_rows = []
     idx = 0
     while True:
         item_type = request.form.get(f"items[{idx}][type]")
@@ -370,15 +404,9 @@ def edit_delivery(delivery_id: int):
                         unit_price=unit_price, line_total=line_total,
                     )
                     stamp_tenant(delivery_item)
-                    bundle = tenant_query(Bundle).filter_by(id=bid).first()
+                    bundle = bundle_by_id(bid)
                     if bundle:
-                        for bundle_item in bundle.items:
-                            comp = DeliveryItemComponent(
-                                product_id=bundle_item.product_id,
-                                quantity=bundle_item.quantity * qty,
-                            )
-                            stamp_tenant(comp)
-                            delivery_item.components.append(comp)
+                        bundle_rows.append((delivery_item, bundle, qty))
                     delivery.items.append(delivery_item)
             elif item_type == "manual":
                 name = request.form.get(f"items[{idx}][manual_name]", "").strip()
@@ -410,15 +438,9 @@ def edit_delivery(delivery_id: int):
                         unit_price=unit_price, line_total=line_total,
                     )
                     stamp_tenant(delivery_item)
-                    bundle = tenant_query(Bundle).filter_by(id=bid).first()
+                    bundle = bundle_by_id(bid)
                     if bundle:
-                        for bundle_item in bundle.items:
-                            comp = DeliveryItemComponent(
-                                product_id=bundle_item.product_id,
-                                quantity=bundle_item.quantity * qty,
-                            )
-                            stamp_tenant(comp)
-                            delivery_item.components.append(comp)
+                        bundle_rows.append((delivery_item, bundle, qty))
                     delivery.items.append(delivery_item)
                 elif is_manual and manual_name:
                     di = DeliveryItem(
@@ -429,6 +451,7 @@ def edit_delivery(delivery_id: int):
                     stamp_tenant(di)
                     delivery.items.append(di)
         idx += 1
+    _insert_bundle_components(bundle_rows)
     log_action("edit", "delivery_note", delivery.id, "updated")
     db.session.commit()
     flash("Dodací list upravený.", "success")
@@ -457,10 +480,10 @@ def delete_delivery(delivery_id: int):
 )
 @role_required("manage_delivery")
 def confirm_delivery(delivery_id: int):
-    delivery = tenant_get_or_404(DeliveryNote, delivery_id)
-    delivery.confirmed = True
-    delivery.actual_delivery_datetime = utc_now()
-    log_action("confirm", "delivery_note", delivery.id, "confirmed")
+    _update_delivery_or_404(
+        delivery_id, confirmed=True, actual_delivery_datetime=utc_now()
+    )
+    log_action("confirm", "delivery_note", delivery_id, "confirmed")
     db.session.commit()
     flash("Dodací list potvrdený.", "success")
     return redirect(url_for("delivery.list_delivery_notes"))
@@ -471,9 +494,8 @@ def confirm_delivery(delivery_id: int):
 )
 @role_required("manage_all")
 def unconfirm_delivery(delivery_id: int):
-    delivery = tenant_get_or_404(DeliveryNote, delivery_id)
-    delivery.confirmed = False
-    log_action("unconfirm", "delivery_note", delivery.id, "unconfirmed")
+    _update_delivery_or_404(delivery_id, confirmed=False)
+    log_action("unconfirm", "delivery_note", delivery_id, "unconfirmed")
     db.session.commit()
     flash("Potvrdenie dodacieho listu zrušené.", "warning")
     return redirect(url_for("delivery.list_delivery_notes"))
@@ -482,7 +504,22 @@ def unconfirm_delivery(delivery_id: int):
 @delivery_bp.route("/delivery-notes/<int:delivery_id>/pdf")
 @role_required("manage_delivery")
 def delivery_pdf(delivery_id: int):
-    delivery = tenant_get_or_404(DeliveryNote, delivery_id)
+    # Preload everything the PDF template walks so rendering issues no
+    # per-item lazy loads.
+    items_path = selectinload(DeliveryNote.items)
+    delivery = (
+        tenant_query(DeliveryNote)
+        .options(
+            joinedload(DeliveryNote.primary_order).joinedload(Order.partner),
+            items_path.joinedload(DeliveryItem.product),
+            items_path.joinedload(DeliveryItem.bundle),
+            items_path.selectinload(DeliveryItem.components).joinedload(
+                DeliveryItemComponent.product
+            ),
+        )
+        .filter(DeliveryNote.id == delivery_id)
+        .first_or_404()
+    )
     app_cfg = current_app.config["APP_CONFIG"]
-    pdf_path = generate_delivery_pdf(delivery, app_cfg)
-    return send_file(pdf_path, as_attachment=True)
+    buf, download_name = stream_delivery_pdf(delivery, app_cfg)
+    return send_file(buf, as_attachment=True, download_name=download_name)
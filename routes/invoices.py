@@ -1,10 +1,12 @@
 """Invoice management routes."""
 
 import logging
+import os
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 from flask import (
     Blueprint,
+    abort,
     flash,
     jsonify,
     redirect,
@@ -14,9 +16,11 @@ from flask import (
     url_for,
 )
 from flask import current_app
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import joinedload, load_only
 
 from extensions import csrf, db
-from mailer import MailerError, send_document_email
+from mailer import MailerError, queue_document_email
 from models import (
     DeliveryNote,
     DeliveryNoteOrder,
@@ -26,13 +30,13 @@ from models import (
     Partner,
     VALID_INVOICE_STATUSES,
 )
-from services.audit import log_action
+from services.audit import log_action, log_outcome_when_done
 from services.auth import role_required
 from services.invoice import generate_invoice_number
 from services.pdf import generate_invoice_pdf
 from superfaktura_client import SuperFakturaClient, SuperFakturaError
 from utils import safe_float, safe_int
-from services.tenant import tenant_query, stamp_tenant, tenant_get_or_404
+from services.tenant import require_tenant, tenant_query, stamp_tenant, tenant_get_or_404
 
 logger = logging.getLogger(__name__)
 
@@ -129,7 +133,6 @@ def partner_delivery_notes(partner_id: int):
 @invoices_bp.route("/invoices", methods=["GET", "POST"])
 @role_required("manage_invoices")
 def list_invoices():
-    partners = tenant_query(Partner).filter_by(is_active=True, is_deleted=False).all()
     if request.method == "POST":
         partner_id = safe_int(request.form.get("partner_id"))
         if not partner_id:
@@ -224,13 +227,35 @@ def list_invoices():
         )
         return redirect(url_for("invoices.list_invoices"))
 
-    query = tenant_query(Invoice).order_by(Invoice.created_at.desc())
-
-    # Calculate stats for dashboard
-    all_invoices = tenant_query(Invoice).all()
-    total_revenue = sum(inv.total_with_vat or 0 for inv in all_invoices)
-    paid_amount = sum(inv.total_with_vat or 0 for inv in all_invoices if inv.status == "paid")
-    unpaid_amount = sum(inv.total_with_vat or 0 for inv in all_invoices if inv.status != "paid")
+    # Only the columns the list renders, with the partner name joined in
+    query = tenant_query(Invoice).options(
+        load_only(
+            Invoice.invoice_number,
+            Invoice.partner_id,
+            Invoice.created_at,
+            Invoice.due_date,
+            Invoice.total,
+            Invoice.status,
+            Invoice.is_locked,
+            Invoice.payment_status,
+            Invoice.paid_at,
+        ),
+        joinedload(Invoice.partner).load_only(Partner.name),
+    ).order_by(Invoice.created_at.desc(), Invoice.id.desc())
+
+    # Calculate stats for dashboard in SQL instead of loading every invoice
+    amount = func.coalesce(Invoice.total_with_vat, 0)
+    total_revenue, paid_amount = (
+        tenant_query(Invoice)
+        .with_entities(
+            func.coalesce(func.sum(amount), 0),
+            func.coalesce(
+                func.sum(case((Invoice.status == "paid", amount), else_=0)), 0
+            ),
+        )
+        .one()
+    )
+    unpaid_amount = total_revenue - paid_amount
 
     # Calculate overdue (simplified - invoices not paid)
     overdue_amount = unpaid_amount
@@ -241,6 +266,14 @@ def list_invoices():
     invoices_list = (
         query.offset((page - 1) * per_page).limit(per_page).all()
     )
+    # The partner picker only needs id and name
+    partners = (
+        tenant_query(Partner)
+        .filter_by(is_active=True, is_deleted=False)
+        .with_entities(Partner.id, Partner.name)
+        .order_by(Partner.name)
+        .all()
+    )
     return render_template(
         "invoices.html",
         invoices=invoices_list,
@@ -372,16 +405,32 @@ def delete_invoice(invoice_id: int):
 )
 @role_required("manage_invoices")
 def add_invoice_item(invoice_id: int):
-    invoice = tenant_get_or_404(Invoice, invoice_id)
-    description = request.form.get("description", "").strip()
-    quantity = safe_int(request.form.get("quantity"), default=1)
-    unit_price = safe_float(request.form.get("unit_price"))
+    form = request.form
+    description = form.get("description", "").strip()
+    quantity = safe_int(form.get("quantity"), default=1)
+    unit_price = safe_float(form.get("unit_price"))
     total = round(unit_price * quantity, 2)
-    vat_rate = safe_float(request.form.get("vat_rate"), default=20.0)
+    vat_rate = safe_float(form.get("vat_rate"), default=20.0)
     vat_amount = round(total * vat_rate / 100, 2)
     total_with_vat = round(total + vat_amount, 2)
 
+    # Atomic increment in SQL: no SELECT of the invoice and no lost update
+    # when two items are added concurrently.  rowcount doubles as the
+    # tenant-scoped existence check.
+    result = db.session.execute(
+        update(Invoice)
+        .where(Invoice.id == invoice_id, Invoice.tenant_id == require_tenant())
+        .values(
+            total=func.coalesce(Invoice.total, 0) + total,
+            total_with_vat=func.coalesce(Invoice.total_with_vat, 0) + total_with_vat,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        abort(404)
+
     ii = InvoiceItem(
+        invoice_id=invoice_id,
         description=description,
         quantity=quantity,
         unit_price=unit_price,
@@ -392,11 +441,9 @@ def add_invoice_item(invoice_id: int):
         is_manual=True,
     )
     stamp_tenant(ii)
-    invoice.items.append(ii)
-    invoice.total = float(invoice.total or 0) + total
-    invoice.total_with_vat = float(invoice.total_with_vat or 0) + total_with_vat
+    db.session.add(ii)
     db.session.commit()
-    log_action("create", "invoice_item", invoice.id, "manual")
+    log_action("create", "invoice_item", invoice_id, "manual")
     db.session.commit()
     flash("Manuálna položka pridaná.", "success")
     return redirect(url_for("invoices.list_invoices"))
@@ -408,7 +455,10 @@ def invoice_pdf(invoice_id: int):
     invoice = tenant_get_or_404(Invoice, invoice_id)
     app_cfg = current_app.config["APP_CONFIG"]
     pdf_path = generate_invoice_pdf(invoice, app_cfg)
-    return send_file(pdf_path, as_attachment=True)
+    ext = os.path.splitext(pdf_path)[1]
+    return send_file(
+        pdf_path, as_attachment=True, download_name=f"invoice_{invoice.id}{ext}"
+    )
 
 
 @invoices_bp.route(
@@ -424,7 +474,7 @@ def send_invoice(invoice_id: int):
     display = invoice.invoice_number or str(invoice.id)
     if email_cfg.enabled and invoice.partner.email:
         try:
-            send_document_email(
+            future = queue_document_email(
                 email_cfg,
                 subject=f"Faktúra {display}",
                 recipient=invoice.partner.email,
@@ -432,9 +482,12 @@ def send_invoice(invoice_id: int):
                 body=f"Dobrý deň, v prílohe posielame faktúru {display}.",
                 attachment_path=pdf_path,
             )
-            log_action("email", "invoice", invoice.id, "sent")
+            log_action("email", "invoice", invoice.id, "queued")
             db.session.commit()
-            flash("Faktúra odoslaná emailom.", "success")
+            # The delivery result ("sent" or the SMTP error) is audited
+            # by the mail worker once it is known
+            log_outcome_when_done(future, "email", "invoice", invoice.id, success="sent")
+            flash("Faktúra zaradená na odoslanie emailom.", "success")
         except MailerError as e:
             logger.error("Failed to send invoice %s email: %s", invoice_id, e)
             flash(f"Chyba pri odosielaní emailu: {e}", "danger")
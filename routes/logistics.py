@@ -35,6 +35,28 @@ def dashboard():
         )
         end = start + timedelta(days=7)
 
+    # Handle the POST before running the dashboard queries it never uses
+    if request.method == "POST":
+        form = request.form
+        plan = LogisticsPlan(
+            order_id=safe_int(form.get("order_id")) or None,
+            delivery_note_id=safe_int(form.get("delivery_note_id")) or None,
+            plan_type=form.get("plan_type", "pickup"),
+            planned_datetime=parse_datetime(form.get("planned_datetime"))
+            or utc_now(),
+            vehicle_id=safe_int(form.get("vehicle_id")) or None,
+        )
+        stamp_tenant(plan)
+        db.session.add(plan)
+        log_action(
+            "create", "logistics_plan", plan.id, plan.plan_type
+        )
+        db.session.commit()
+        flash("Plán zvozu/dodania uložený.", "success")
+        return redirect(
+            url_for("logistics.dashboard", interval=interval)
+        )
+
     plans_query = (
         tenant_query(LogisticsPlan).filter(
             LogisticsPlan.planned_datetime >= start,
@@ -56,29 +78,6 @@ def dashboard():
     ).all()
     vehicles = tenant_query(Vehicle).filter_by(active=True).all()
 
-    if request.method == "POST":
-        plan = LogisticsPlan(
-            order_id=safe_int(request.form.get("order_id")) or None,
-            delivery_note_id=safe_int(request.form.get("delivery_note_id"))
-            or None,
-            plan_type=request.form.get("plan_type", "pickup"),
-            planned_datetime=parse_datetime(
-                request.form.get("planned_datetime")
-            )
-            or utc_now(),
-            vehicle_id=safe_int(request.form.get("vehicle_id")) or None,
-        )
-        stamp_tenant(plan)
-        db.session.add(plan)
-        log_action(
-            "create", "logistics_plan", plan.id, plan.plan_type
-        )
-        db.session.commit()
-        flash("Plán zvozu/dodania uložený.", "success")
-        return redirect(
-            url_for("logistics.dashboard", interval=interval)
-        )
-
     return render_template(
         "logistics.html",
         plans=plans,
@@ -96,12 +95,13 @@ def dashboard():
 @role_required("manage_delivery")
 def edit_plan(plan_id: int):
     plan = tenant_get_or_404(LogisticsPlan, plan_id)
-    plan.plan_type = request.form.get("plan_type", plan.plan_type)
-    plan.order_id = safe_int(request.form.get("order_id")) or None
-    plan.delivery_note_id = safe_int(request.form.get("delivery_note_id")) or None
-    plan.vehicle_id = safe_int(request.form.get("vehicle_id")) or None
+    form = request.form
+    plan.plan_type = form.get("plan_type", plan.plan_type)
+    plan.order_id = safe_int(form.get("order_id")) or None
+    plan.delivery_note_id = safe_int(form.get("delivery_note_id")) or None
+    plan.vehicle_id = safe_int(form.get("vehicle_id")) or None
     plan.planned_datetime = parse_datetime(
-        request.form.get("planned_datetime")
+        form.get("planned_datetime")
     ) or plan.planned_datetime
     log_action("edit", "logistics_plan", plan.id, "updated")
     db.session.commit()
@@ -5,9 +5,10 @@ from decimal import Decimal, InvalidOperation
 from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
 
 from extensions import db
-from models import Bundle, LogisticsPlan, Order, OrderItem, Partner, PartnerAddress, Product
+from models import LogisticsPlan, Order, OrderItem, Partner, PartnerAddress
 from services.audit import log_action
 from services.auth import get_current_user, role_required
+from services.catalog import active_bundles, active_products
 from services.numbering import generate_number
 from utils import parse_datetime, safe_int
 from services.tenant import tenant_query, stamp_tenant, tenant_get_or_404
@@ -31,10 +32,6 @@ def partner_addresses(partner_id: int):
 @orders_bp.route("/orders", methods=["GET", "POST"])
 @role_required("manage_orders")
 def list_orders():
-    partners = tenant_query(Partner).filter_by(is_active=True, is_deleted=False).all()
-    products = tenant_query(Product).filter_by(is_active=True).all()
-    bundles = tenant_query(Bundle).filter_by(is_active=True).all()
-
     if request.method == "POST":
         partner_id = safe_int(request.form.get("partner_id"))
         if not partner_id:
@@ -126,9 +123,9 @@ def list_orders():
         total=total,
         page=page,
         per_page=per_page,
-        partners=partners,
-        products=products,
-        bundles=bundles,
+        partners=tenant_query(Partner).filter_by(is_active=True, is_deleted=False).all(),
+        products=active_products(),
+        bundles=active_bundles(),
     )
 
 
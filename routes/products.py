@@ -15,6 +15,7 @@ from models import (
 )
 from services.audit import log_action
 from services.auth import role_required
+from services.catalog import all_bundles, all_products
 from services.numbering import generate_number
 from utils import safe_float, safe_int
 from services.tenant import tenant_query, stamp_tenant, tenant_get_or_404
@@ -48,7 +49,7 @@ def list_products():
         db.session.commit()
         flash("Produkt uložený.", "success")
         return redirect(url_for("products.list_products"))
-    return render_template("products.html", products=tenant_query(Product).all())
+    return render_template("products.html", products=all_products())
 
 
 @products_bp.route("/products/<int:product_id>/toggle", methods=["POST"])
@@ -124,7 +125,7 @@ def delete_product(product_id: int):
 @products_bp.route("/bundles", methods=["GET", "POST"])
 @role_required("manage_orders")
 def list_bundles():
-    all_products = tenant_query(Product).all()
+    products = all_products()
     if request.method == "POST":
         bundle_price = safe_float(request.form.get("bundle_price"))
         bundle = Bundle(
@@ -136,7 +137,7 @@ def list_bundles():
         db.session.add(bundle)
         db.session.flush()
         bundle.bundle_number = generate_number("bundle")
-        for product in all_products:
+        for product in products:
             qty = safe_int(request.form.get(f"bundle_product_{product.id}"))
             if qty > 0:
                 bi = BundleItem(product_id=product.id, quantity=qty)
@@ -150,8 +151,8 @@ def list_bundles():
         return redirect(url_for("products.list_bundles"))
     return render_template(
         "bundles.html",
-        bundles=tenant_query(Bundle).order_by(Bundle.id.desc()).all(),
-        products=all_products,
+        bundles=sorted(all_bundles(), key=lambda b: b.id, reverse=True),
+        products=products,
     )
 
 
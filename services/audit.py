@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import logging
+from concurrent.futures import Future
 from typing import Optional
 
+from flask import current_app
+
 from extensions import db
 from models import AuditLog
 from services.auth import get_current_user
 from services.tenant import get_current_tenant_id
 
+logger = logging.getLogger(__name__)
+
 
 def log_action(
     action: str,
@@ -32,3 +38,47 @@ def log_action(
             details=details,
         )
     )
+
+
+def log_outcome_when_done(
+    future: Future,
+    action: str,
+    entity_type: str,
+    entity_id: Optional[int],
+    success: str = "done",
+) -> None:
+    """Record an audit entry once background work behind *future* ends.
+
+    The details are *success*, or ``"error: <message>"`` if the work
+    raised.  The app, tenant and user of the current request are captured
+    now, because the callback runs on the worker thread with no request
+    context; the entry is committed there in its own app context.
+    """
+    app = current_app._get_current_object()
+    tenant_id = get_current_tenant_id()
+    user = get_current_user()
+    user_id = user.id if user else None
+
+    def record(done: Future) -> None:
+        exc = done.exception()
+        details = success if exc is None else f"error: {exc}"
+        with app.app_context():
+            try:
+                db.session.add(
+                    AuditLog(
+                        tenant_id=tenant_id,
+                        user_id=user_id,
+                        action=action,
+                        entity_type=entity_type,
+                        entity_id=entity_id,
+                        details=details,
+                    )
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception(
+                    "Failed to audit %s of %s %s", action, entity_type, entity_id
+                )
+
+    future.add_done_callback(record)
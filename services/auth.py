@@ -72,7 +72,8 @@ def ensure_admin_user():
 
     Also assigns the admin to the default tenant and sets ``is_superadmin``.
     """
-    if User.query.count() == 0:
+    # EXISTS stops at the first row instead of counting the whole table
+    if not db.session.query(User.query.exists()).scalar():
         password = secrets.token_urlsafe(12)
         admin = User(
             username="admin",
@@ -0,0 +1,58 @@
+"""Request-scoped catalog lookups (products and bundles).
+
+Several handlers load the full product/bundle catalog more than once per
+request (form rendering, item parsing, bundle expansion).  The helpers
+below memoise those reads on ``flask.g`` so each list is queried at most
+once per request; ``g`` is torn down with the request, so no explicit
+invalidation is needed.
+"""
+
+from __future__ import annotations
+
+from flask import g
+from sqlalchemy.orm import selectinload
+
+from models import Bundle, Product
+from services.tenant import tenant_query
+
+_CACHE_ATTR = "_catalog_cache"
+
+
+def _memo(key: str, loader):
+    """Return ``loader()`` cached under *key* for the current request."""
+    cache = g.get(_CACHE_ATTR)
+    if cache is None:
+        cache = {}
+        setattr(g, _CACHE_ATTR, cache)
+    if key not in cache:
+        cache[key] = loader()
+    return cache[key]
+
+
+def all_products() -> list[Product]:
+    """Return all products of the current tenant."""
+    return _memo("products", lambda: tenant_query(Product).all())
+
+
+def all_bundles() -> list[Bundle]:
+    """Return all bundles of the current tenant with their items preloaded."""
+    return _memo(
+        "bundles",
+        lambda: tenant_query(Bundle).options(selectinload(Bundle.items)).all(),
+    )
+
+
+def active_products() -> list[Product]:
+    """Return active products of the current tenant."""
+    return _memo("active_products", lambda: [p for p in all_products() if p.is_active])
+
+
+def active_bundles() -> list[Bundle]:
+    """Return active bundles of the current tenant."""
+    return _memo("active_bundles", lambda: [b for b in all_bundles() if b.is_active])
+
+
+def bundle_by_id(bundle_id: int):
+    """Return the current tenant's bundle with *bundle_id*, or None."""
+    index = _memo("bundles_by_id", lambda: {b.id: b for b in all_bundles()})
+    return index.get(bundle_id)
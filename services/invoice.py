@@ -6,8 +6,12 @@ import datetime
 import logging
 from decimal import Decimal, ROUND_HALF_UP
 
+from sqlalchemy import update
+from sqlalchemy.orm import selectinload
+
 from extensions import db
 from models import (
+    DeliveryItem,
     DeliveryNote,
     DeliveryNoteOrder,
     Invoice,
@@ -49,6 +53,20 @@ def generate_invoice_number(partner_id: int | None = None) -> str:
     return _fallback_invoice_number()
 
 
+# Notes fetched per round-trip and invoice lines / ids written per statement
+_BATCH_SIZE = 200
+
+
+def _insert_invoice_rows(rows: list[dict]) -> None:
+    """Insert invoice line mappings with a single executemany.
+
+    Core inserts skip the tenant flush guard, so every mapping must carry
+    its ``tenant_id`` explicitly.
+    """
+    if rows:
+        db.session.execute(InvoiceItem.__table__.insert(), rows)
+
+
 def build_invoice_for_partner(partner_id: int) -> Invoice:
     """Create a collective invoice for *partner_id* from unbilled delivery notes.
 
@@ -59,8 +77,16 @@ def build_invoice_for_partner(partner_id: int) -> Invoice:
     if not partner or partner.tenant_id != tid:
         raise ValueError("Partner neexistuje.")
 
+    # Load the note -> items -> product/bundle graph up front: selectinload
+    # for the items collection, joinedload for the many-to-one lookups.
+    items_path = selectinload(DeliveryNote.items)
     query = (
-        tenant_query(DeliveryNote).join(
+        tenant_query(DeliveryNote)
+        .options(
+            items_path.joinedload(DeliveryItem.product),
+            items_path.joinedload(DeliveryItem.bundle),
+        )
+        .join(
             DeliveryNoteOrder,
             DeliveryNote.id == DeliveryNoteOrder.delivery_note_id,
         )
@@ -72,8 +98,8 @@ def build_invoice_for_partner(partner_id: int) -> Invoice:
     else:
         query = query.filter(Order.partner_id == partner_id)
 
-    unbilled_notes = query.filter(DeliveryNote.invoiced.is_(False)).all()
-    if not unbilled_notes:
+    unbilled = query.filter(DeliveryNote.invoiced.is_(False))
+    if not db.session.query(unbilled.exists()).scalar():
         raise ValueError(
             "Žiadne nevyfakturované dodacie listy pre tohto partnera."
         )
@@ -86,12 +112,23 @@ def build_invoice_for_partner(partner_id: int) -> Invoice:
     )
     stamp_tenant(invoice)
     db.session.add(invoice)
+    db.session.flush()
 
     _Q2 = Decimal("0.01")
     total = Decimal("0")
     total_with_vat = Decimal("0")
 
-    for note in unbilled_notes:
+    # Stream the notes in batches (items are selectin-loaded per batch) and
+    # write invoice lines as they accumulate, so memory stays bounded by the
+    # batch size rather than the number of unbilled notes.
+    rows = []
+    note_ids = []
+    seen = set()
+    for note in unbilled.yield_per(_BATCH_SIZE):
+        if note.id in seen:
+            continue  # note linked to several of the partner's orders
+        seen.add(note.id)
+        note_ids.append(note.id)
         for item in note.items:
             line_total = item.line_total if item.line_total else (
                 Decimal(str(item.unit_price)) * item.quantity
@@ -119,21 +156,32 @@ def build_invoice_for_partner(partner_id: int) -> Invoice:
             )
             line_total_with_vat = line_total + vat_amount
 
-            ii = InvoiceItem(
-                source_delivery_id=note.id,
-                description=description,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                total=line_total,
-                vat_rate=vat_rate,
-                vat_amount=vat_amount,
-                total_with_vat=line_total_with_vat,
-            )
-            stamp_tenant(ii)
-            invoice.items.append(ii)
+            rows.append({
+                "tenant_id": tid,
+                "invoice_id": invoice.id,
+                "source_delivery_id": note.id,
+                "description": description,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "total": line_total,
+                "vat_rate": vat_rate,
+                "vat_amount": vat_amount,
+                "total_with_vat": line_total_with_vat,
+                "is_manual": False,
+            })
             total += line_total
             total_with_vat += line_total_with_vat
-        note.invoiced = True
+        if len(rows) >= _BATCH_SIZE:
+            _insert_invoice_rows(rows)
+            rows = []
+    _insert_invoice_rows(rows)
+
+    for start in range(0, len(note_ids), _BATCH_SIZE):
+        db.session.execute(
+            update(DeliveryNote)
+            .where(DeliveryNote.id.in_(note_ids[start:start + _BATCH_SIZE]))
+            .values(invoiced=True)
+        )
 
     invoice.total = total.quantize(_Q2, rounding=ROUND_HALF_UP)
     invoice.total_with_vat = total_with_vat.quantize(_Q2, rounding=ROUND_HALF_UP)
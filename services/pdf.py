@@ -9,7 +9,17 @@ HTML file (or the legacy reportlab approach).
 
 from __future__ import annotations
 
+import hashlib
+import io
+import json
+import multiprocessing
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 
 from jinja2.sandbox import SandboxedEnvironment
 
@@ -35,6 +45,10 @@ _OUTPUT_DIR = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output"
 )
 
+# Superseded invoice PDFs younger than this (seconds) are kept: they may
+# still be downloading or be the attachment of a queued email.
+_STALE_PDF_AGE = 15 * 60
+
 # ---------------------------------------------------------------------------
 # Default templates
 # ---------------------------------------------------------------------------
@@ -73,8 +87,8 @@ _DEFAULT_DELIVERY_HTML = """\
       <td>{{ item.product.name if item.product else (item.bundle.name if item.bundle else 'Polozka') }}</td>
       <td>{{ item.quantity }}x</td>
       {% if delivery.show_prices %}
-      <td>{{ '%.2f'|format(item.unit_price) }} {{ currency }}</td>
-      <td>{{ '%.2f'|format(item.line_total) }} {{ currency }}</td>
+      <td>{{ item.unit_price|money }} {{ currency }}</td>
+      <td>{{ item.line_total|money }} {{ currency }}</td>
       {% endif %}
     </tr>
     {% for comp in item.components %}
@@ -107,15 +121,15 @@ _DEFAULT_INVOICE_HTML = """\
     <tr>
       <td>{{ item.description }}</td>
       <td>{{ item.quantity }}x</td>
-      <td>{{ '%.2f'|format(item.unit_price) }} {{ currency }}</td>
+      <td>{{ item.unit_price|money }} {{ currency }}</td>
       <td>{{ '%.0f'|format(item.vat_rate) }}%</td>
-      <td>{{ '%.2f'|format(item.total_with_vat) }} {{ currency }}</td>
+      <td>{{ item.total_with_vat|money }} {{ currency }}</td>
     </tr>
     {% endfor %}
   </tbody>
 </table>
-<p class="total">Spolu bez DPH: {{ '%.2f'|format(invoice.total) }} {{ currency }}</p>
-<p class="total">Spolu s DPH: {{ '%.2f'|format(invoice.total_with_vat) }} {{ currency }}</p>
+<p class="total">Spolu bez DPH: {{ invoice.total|money }} {{ currency }}</p>
+<p class="total">Spolu s DPH: {{ invoice.total_with_vat|money }} {{ currency }}</p>
 {% if qr_code_base64 %}
 <div style="margin-top: 20px; text-align: center;">
   <p><strong>QR kod na platbu (PayBySquare)</strong></p>
@@ -154,20 +168,14 @@ def _get_template(entity_type: str) -> tuple[str, str]:
     3. Built-in defaults
     """
     try:
-        import json as _json
         tid = get_current_tenant_id()
         tmpl = PdfTemplate.query.filter_by(
             tenant_id=tid, entity_type=entity_type
         ).first()
         if tmpl and tmpl.layout_config:
-            try:
-                config = _json.loads(tmpl.layout_config)
-                if config:
-                    html_from_config = _html_from_config(entity_type, config)
-                    css_from_config = _css_from_config(config)
-                    return html_from_config, css_from_config
-            except (ValueError, TypeError):
-                pass
+            layout = _template_from_layout(entity_type, tmpl.layout_config)
+            if layout:
+                return layout
         if tmpl and tmpl.html_content:
             return tmpl.html_content, tmpl.css_content or _DEFAULT_CSS
     except Exception:
@@ -175,6 +183,25 @@ def _get_template(entity_type: str) -> tuple[str, str]:
     return _DEFAULTS.get(entity_type, ""), _DEFAULT_CSS
 
 
+@lru_cache(maxsize=32)
+def _template_from_layout(
+    entity_type: str, layout_config: str
+) -> tuple[str, str] | None:
+    """Convert a stored layout_config JSON into ``(html, css)``.
+
+    Cached by the raw JSON text, so each PDF of an unchanged layout skips
+    the JSON parse and the HTML/CSS assembly and hands the same template
+    source to :func:`_compile_template`.
+    """
+    try:
+        config = json.loads(layout_config)
+    except (ValueError, TypeError):
+        return None
+    if not config:
+        return None
+    return _html_from_config(entity_type, config), _css_from_config(config)
+
+
 def _css_from_config(config: dict) -> str:
     """Build a CSS string from a layout_config dict."""
     margins = config.get("margins", {})
@@ -295,19 +322,20 @@ def _html_from_config(entity_type: str, config: dict) -> str:
     th_cells = "".join(f"<th>{col_labels.get(c, c)}</th>" for c in columns)
 
     if entity_type == "delivery_note":
-        td_cells = ""
+        td_parts = []
         for col in columns:
             if col == "item_name":
-                td_cells += "<td>{{ item.product.name if item.product else (item.bundle.name if item.bundle else 'Polozka') }}</td>"
+                td_parts.append("<td>{{ item.product.name if item.product else (item.bundle.name if item.bundle else 'Polozka') }}</td>")
             elif col == "quantity":
-                td_cells += "<td>{{ item.quantity }}x</td>"
+                td_parts.append("<td>{{ item.quantity }}x</td>")
             elif col == "unit_price":
-                td_cells += "<td>{{ '%.2f'|format(item.unit_price) }} {{ currency }}</td>"
+                td_parts.append("<td>{{ item.unit_price|money }} {{ currency }}</td>")
             elif col == "vat_rate":
-                td_cells += "<td></td>"
+                td_parts.append("<td></td>")
             elif col == "total":
-                td_cells += "<td>{{ '%.2f'|format(item.line_total) }} {{ currency }}</td>"
+                td_parts.append("<td>{{ item.line_total|money }} {{ currency }}</td>")
 
+        td_cells = "".join(td_parts)
         table_html = (
             "<h2>Polozky</h2>\n"
             "<table>\n"
@@ -333,19 +361,20 @@ def _html_from_config(entity_type: str, config: dict) -> str:
         return header_html + doc_title + info_table + table_html + footer_html
 
     else:  # invoice
-        td_cells = ""
+        td_parts = []
         for col in columns:
             if col == "item_name":
-                td_cells += "<td>{{ item.description }}</td>"
+                td_parts.append("<td>{{ item.description }}</td>")
             elif col == "quantity":
-                td_cells += "<td>{{ item.quantity }}x</td>"
+                td_parts.append("<td>{{ item.quantity }}x</td>")
             elif col == "unit_price":
-                td_cells += "<td>{{ '%.2f'|format(item.unit_price) }} {{ currency }}</td>"
+                td_parts.append("<td>{{ item.unit_price|money }} {{ currency }}</td>")
             elif col == "vat_rate":
-                td_cells += "<td>{{ '%.0f'|format(item.vat_rate) }}%</td>"
+                td_parts.append("<td>{{ '%.0f'|format(item.vat_rate) }}%</td>")
             elif col == "total":
-                td_cells += "<td>{{ '%.2f'|format(item.total_with_vat) }} {{ currency }}</td>"
+                td_parts.append("<td>{{ item.total_with_vat|money }} {{ currency }}</td>")
 
+        td_cells = "".join(td_parts)
         table_html = (
             "<h2>Polozky</h2>\n"
             "<table>\n"
@@ -356,8 +385,8 @@ def _html_from_config(entity_type: str, config: dict) -> str:
             "    {% endfor %}\n"
             "  </tbody>\n"
             "</table>\n"
-            "<p class=\"total\">Spolu bez DPH: {{ '%.2f'|format(invoice.total) }} {{ currency }}</p>\n"
-            "<p class=\"total\">Spolu s DPH: {{ '%.2f'|format(invoice.total_with_vat) }} {{ currency }}</p>"
+            "<p class=\"total\">Spolu bez DPH: {{ invoice.total|money }} {{ currency }}</p>\n"
+            "<p class=\"total\">Spolu s DPH: {{ invoice.total_with_vat|money }} {{ currency }}</p>"
         )
 
         doc_title = "<h1>Faktura {{ invoice.invoice_number or invoice.id }}</h1>"
@@ -532,10 +561,33 @@ def render_layout_preview(entity_type: str, config: dict) -> str:
     return _render_html(html_tmpl, css, context)
 
 
+# One sandbox for all renders; compiled templates are cached by source so
+# repeated PDFs of the same layout skip Jinja parsing and compilation.
+_SANDBOX = SandboxedEnvironment()
+
+
+@lru_cache(maxsize=4096)
+def _format_money(value) -> str:
+    """Format an amount with two decimals, e.g. ``12.50``.
+
+    Memoised because the same prices and totals repeat across the lines of
+    a document and across documents.  Used as the ``money`` template filter.
+    """
+    return format(value, ".2f")
+
+
+_SANDBOX.filters["money"] = _format_money
+
+
+@lru_cache(maxsize=64)
+def _compile_template(html_template: str):
+    """Compile *html_template* in the sandbox (cached by source text)."""
+    return _SANDBOX.from_string(html_template)
+
+
 def _render_html(html_template: str, css: str, context: dict) -> str:
     """Render the Jinja2 HTML template wrapped in a full HTML document."""
-    env = SandboxedEnvironment()
-    tmpl = env.from_string(html_template)
+    tmpl = _compile_template(html_template)
     body = tmpl.render(**context)
     return (
         "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
@@ -543,36 +595,119 @@ def _render_html(html_template: str, css: str, context: dict) -> str:
     )
 
 
-def _html_to_pdf(full_html: str, output_path: str) -> str:
-    """Convert rendered HTML to PDF.  Returns the output file path."""
-    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+def _pdf_bytes(full_html: str) -> tuple[bytes, str]:
+    """Convert rendered HTML to PDF bytes.
 
+    Returns the content and its file extension: ``"pdf"``, or ``"html"``
+    when no converter is installed.  Runs in the PDF worker processes, so
+    it must stay a picklable module-level function taking plain data.
+    """
     if _HAS_WEASYPRINT:
-        weasyprint.HTML(string=full_html).write_pdf(output_path)
-        return output_path
-
+        return weasyprint.HTML(string=full_html).write_pdf(), "pdf"
     if _HAS_XHTML2PDF:
-        with open(output_path, "wb") as fh:
-            pisa.CreatePDF(full_html, dest=fh)
-        return output_path
+        buf = io.BytesIO()
+        pisa.CreatePDF(full_html, dest=buf)
+        return buf.getvalue(), "pdf"
+    # Fallback: plain HTML (user can print-to-PDF from browser)
+    return full_html.encode("utf-8"), "html"
+
+
+# HTML-to-PDF conversion is CPU-bound pure Python.  A single download is
+# rendered inline - starting a worker and pickling the document would cost
+# more than it saves - but batch callers hand their documents to a small
+# process pool so they convert in parallel instead of serialising on the
+# GIL.  The pool is created lazily (importing this module, or forking WSGI
+# workers, never starts processes) and sized by ``AppConfig.pdf_workers``.
+_PDF_POOL: ProcessPoolExecutor | None = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _pdf_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the PDF worker pool, creating it with *max_workers* on first use."""
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            _PDF_POOL = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _PDF_POOL
 
-    # Fallback: save as HTML (user can print-to-PDF from browser)
-    html_path = output_path.rsplit(".", 1)[0] + ".html"
-    with open(html_path, "w", encoding="utf-8") as fh:
-        fh.write(full_html)
-    return html_path
 
+def _discard_pdf_pool(pool) -> None:
+    """Shut down a broken *pool* and drop it if it is still the current one."""
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is pool:
+            _PDF_POOL = None
+    try:
+        pool.shutdown(wait=False, cancel_futures=True)
+    except Exception:
+        pass
 
-# ---------------------------------------------------------------------------
-# Public API — same signatures as the legacy version
-# ---------------------------------------------------------------------------
 
+def _convert_many(documents: list[str], workers: int) -> list[tuple[bytes, str]]:
+    """Run :func:`_pdf_bytes` over *documents*, on the pool when it pays off."""
+    if len(documents) < 2 or workers < 2 or not (_HAS_WEASYPRINT or _HAS_XHTML2PDF):
+        return [_pdf_bytes(html) for html in documents]
+    pool = None
+    try:
+        pool = _pdf_pool(workers)
+        return list(pool.map(_pdf_bytes, documents))
+    except (BrokenProcessPool, OSError):
+        # Worker died or processes cannot be started here: render inline
+        if pool is not None:
+            _discard_pdf_pool(pool)
+        return [_pdf_bytes(html) for html in documents]
+
+
+def _output_ext() -> str:
+    """Return the file extension :func:`_pdf_bytes` produces here."""
+    return "pdf" if (_HAS_WEASYPRINT or _HAS_XHTML2PDF) else "html"
+
+
+def _write_atomic(output_path: str, content: bytes) -> None:
+    """Write *content* to *output_path* via a temp file and ``os.replace``.
+
+    Readers checking for the file (or streaming it) never see a partially
+    written document.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(output_path) or ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(content)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
-def generate_delivery_pdf(delivery, app_cfg) -> str:
-    """Generate a PDF for a delivery note and return the file path."""
-    os.makedirs(_OUTPUT_DIR, exist_ok=True)
-    output_path = os.path.join(_OUTPUT_DIR, f"delivery_{delivery.id}.pdf")
 
+def _html_to_pdf(full_html: str, output_path: str) -> str:
+    """Convert rendered HTML to PDF.  Returns the output file path."""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    content, ext = _pdf_bytes(full_html)
+    if ext != "pdf":
+        output_path = output_path.rsplit(".", 1)[0] + "." + ext
+    _write_atomic(output_path, content)
+    return output_path
+
+
+def _html_to_buffer(full_html: str) -> tuple[io.BytesIO, str]:
+    """Convert rendered HTML to PDF in memory.
+
+    Returns the buffer and the file extension of its content.
+    """
+    content, ext = _pdf_bytes(full_html)
+    return io.BytesIO(content), ext
+
+
+def _delivery_html(delivery, app_cfg) -> str:
+    """Render the full HTML document for a delivery note."""
     html_tmpl, css = _get_template("delivery_note")
     partner_name = (
         delivery.primary_order.partner.name if delivery.primary_order else ""
@@ -582,15 +717,11 @@ def generate_delivery_pdf(delivery, app_cfg) -> str:
         "partner_name": partner_name,
         "currency": app_cfg.base_currency,
     }
-    full_html = _render_html(html_tmpl, css, context)
-    return _html_to_pdf(full_html, output_path)
-
+    return _render_html(html_tmpl, css, context)
 
-def generate_invoice_pdf(invoice, app_cfg) -> str:
-    """Generate a PDF for an invoice and return the file path."""
-    os.makedirs(_OUTPUT_DIR, exist_ok=True)
-    output_path = os.path.join(_OUTPUT_DIR, f"invoice_{invoice.id}.pdf")
 
+def _invoice_html(invoice, app_cfg) -> str:
+    """Render the full HTML document for an invoice."""
     html_tmpl, css = _get_template("invoice")
 
     # Generate QR code for payment (PayBySquare)
@@ -609,5 +740,86 @@ def generate_invoice_pdf(invoice, app_cfg) -> str:
         "currency": app_cfg.base_currency,
         "qr_code_base64": qr_code_base64,
     }
-    full_html = _render_html(html_tmpl, css, context)
-    return _html_to_pdf(full_html, output_path)
+    return _render_html(html_tmpl, css, context)
+
+
+# ---------------------------------------------------------------------------
+# Public API — same signatures as the legacy version
+# ---------------------------------------------------------------------------
+
+
+def generate_delivery_pdf(delivery, app_cfg) -> str:
+    """Generate a PDF for a delivery note and return the file path."""
+    os.makedirs(_OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(_OUTPUT_DIR, f"delivery_{delivery.id}.pdf")
+    return _html_to_pdf(_delivery_html(delivery, app_cfg), output_path)
+
+
+def _invoice_pdf_target(invoice, app_cfg) -> tuple[str, str]:
+    """Render *invoice* and return ``(full_html, cache_path)``."""
+    full_html = _invoice_html(invoice, app_cfg)
+    key = hashlib.blake2b(full_html.encode("utf-8"), digest_size=16).hexdigest()
+    filename = f"invoice_{invoice.id}_{key}.{_output_ext()}"
+    return full_html, os.path.join(_OUTPUT_DIR, filename)
+
+
+def _store_invoice_pdf(invoice_id: int, output_path: str, content: bytes) -> None:
+    """Write a new cached invoice file, then prune superseded old ones."""
+    _write_atomic(output_path, content)
+    prefix = f"invoice_{invoice_id}_"
+    filename = os.path.basename(output_path)
+    cutoff = time.time() - _STALE_PDF_AGE
+    for name in os.listdir(_OUTPUT_DIR):
+        if not name.startswith(prefix) or name == filename:
+            continue
+        path = os.path.join(_OUTPUT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def generate_invoice_pdf(invoice, app_cfg) -> str:
+    """Generate a PDF for an invoice and return the file path.
+
+    Files are cached under a hash of the rendered HTML, so downloading or
+    re-sending an unchanged invoice skips the PDF conversion.  Any change
+    to the invoice, its items, partner or template produces a new key.
+    Once the new file is in place, older files of the same invoice are
+    removed - but only after ``_STALE_PDF_AGE`` seconds, since a recent
+    one may still be streaming to a browser or waiting in the mail queue.
+    """
+    os.makedirs(_OUTPUT_DIR, exist_ok=True)
+    full_html, output_path = _invoice_pdf_target(invoice, app_cfg)
+    if not os.path.exists(output_path):
+        content, _ = _pdf_bytes(full_html)
+        _store_invoice_pdf(invoice.id, output_path, content)
+    return output_path
+
+
+def generate_invoice_pdfs(invoices, app_cfg) -> list[str]:
+    """Generate PDFs for several invoices; return their paths in order.
+
+    Same caching as :func:`generate_invoice_pdf`, but the documents that
+    need converting are spread over the PDF worker pool.
+    """
+    os.makedirs(_OUTPUT_DIR, exist_ok=True)
+    targets = [
+        (invoice.id,) + _invoice_pdf_target(invoice, app_cfg) for invoice in invoices
+    ]
+    missing = [t for t in targets if not os.path.exists(t[2])]
+    converted = _convert_many([html for _, html, _ in missing], app_cfg.pdf_workers)
+    for (invoice_id, _, output_path), (content, _) in zip(missing, converted):
+        _store_invoice_pdf(invoice_id, output_path, content)
+    return [output_path for _, _, output_path in targets]
+
+
+def stream_delivery_pdf(delivery, app_cfg) -> tuple[io.BytesIO, str]:
+    """Render a delivery note PDF in memory for direct download.
+
+    Returns ``(buffer, download_name)``.
+    """
+    buf, ext = _html_to_buffer(_delivery_html(delivery, app_cfg))
+    return buf, f"delivery_{delivery.id}.{ext}"
+
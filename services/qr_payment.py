@@ -5,6 +5,7 @@ from __future__ import annotations
 import io
 import base64
 import logging
+from functools import lru_cache
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -130,16 +131,45 @@ def qr_to_base64(png_bytes: Optional[bytes]) -> Optional[str]:
     return f"data:image/png;base64,{b64}"
 
 
+@lru_cache(maxsize=256)
+def _payment_qr_data_uri(
+    amount: float,
+    iban: str,
+    swift: str,
+    variable_symbol: str,
+    beneficiary_name: str,
+    note: str,
+) -> Optional[str]:
+    """Build the QR data URI for a payment, memoised by its inputs.
+
+    Every PDF render of an invoice needs the same image; caching skips the
+    QR encoding, PNG compression and base64 step on repeat renders.
+    """
+    png_bytes = generate_pay_by_square_qr(
+        amount=amount,
+        iban=iban,
+        swift=swift,
+        variable_symbol=variable_symbol,
+        beneficiary_name=beneficiary_name,
+        note=note,
+    )
+    return qr_to_base64(png_bytes)
+
+
 def generate_invoice_qr(invoice, tenant) -> Optional[str]:
     """Generate a PayBySquare QR for an invoice, returning base64 data URI or None."""
     from models import AppSetting
 
     # Get bank details from tenant settings
-    iban_row = AppSetting.query.filter_by(tenant_id=tenant.id, key="invoice_bank_iban").first()
-    swift_row = AppSetting.query.filter_by(tenant_id=tenant.id, key="invoice_bank_swift").first()
+    settings = dict(
+        AppSetting.query.filter(
+            AppSetting.tenant_id == tenant.id,
+            AppSetting.key.in_(("invoice_bank_iban", "invoice_bank_swift")),
+        ).with_entities(AppSetting.key, AppSetting.value)
+    )
 
-    iban = iban_row.value if iban_row and iban_row.value else ""
-    swift = swift_row.value if swift_row and swift_row.value else ""
+    iban = settings.get("invoice_bank_iban") or ""
+    swift = settings.get("invoice_bank_swift") or ""
 
     if not iban:
         return None
@@ -152,13 +182,11 @@ def generate_invoice_qr(invoice, tenant) -> Optional[str]:
     if not vs and invoice.invoice_number:
         vs = "".join(c for c in invoice.invoice_number if c.isdigit())[-10:]
 
-    png_bytes = generate_pay_by_square_qr(
-        amount=amount,
-        iban=iban,
-        swift=swift,
-        variable_symbol=vs,
-        beneficiary_name=tenant.name or "",
-        note=f"Faktura {invoice.invoice_number or invoice.id}",
+    return _payment_qr_data_uri(
+        amount,
+        iban,
+        swift,
+        vs,
+        tenant.name or "",
+        f"Faktura {invoice.invoice_number or invoice.id}",
     )
-
-    return qr_to_base64(png_bytes)
@@ -96,23 +96,45 @@ def _enforce_tenant_on_flush(session, flush_context):
         return
 
     for obj in list(session.new) + list(session.dirty):
-        obj_tid = getattr(obj, "tenant_id", None)
-        class_name = type(obj).__name__
-        if class_name in _TENANT_REQUIRED_MODELS:
-            if obj_tid is None:
-                raise TenantSecurityError(
-                    f"{class_name} has tenant_id=None (forgot stamp_tenant?)"
-                )
-            if obj_tid != tid:
-                raise TenantSecurityError(
-                    f"Cross-tenant write blocked: {class_name} "
-                    f"has tenant_id={obj_tid}, active tenant is {tid}"
-                )
-        elif obj_tid is not None and obj_tid != tid:
+        _check_tenant_write(type(obj).__name__, getattr(obj, "tenant_id", None), tid)
+
+
+def enforce_tenant_on_rows(model, rows):
+    """Apply the flush guard to *rows* written by a bulk INSERT.
+
+    Bulk operations bypass the session flush, so callers writing plain
+    mappings call this before executing them.
+    """
+    try:
+        tid = getattr(g, "_tenant_id", None)
+    except RuntimeError:
+        # Outside request context (CLI, migrations, tests without app ctx)
+        return
+
+    if tid is None:
+        return
+
+    for row in rows:
+        _check_tenant_write(model.__name__, row.get("tenant_id"), tid)
+
+
+def _check_tenant_write(class_name, obj_tid, tid):
+    """Raise TenantSecurityError if a *class_name* row may not be written."""
+    if class_name in _TENANT_REQUIRED_MODELS:
+        if obj_tid is None:
+            raise TenantSecurityError(
+                f"{class_name} has tenant_id=None (forgot stamp_tenant?)"
+            )
+        if obj_tid != tid:
             raise TenantSecurityError(
                 f"Cross-tenant write blocked: {class_name} "
                 f"has tenant_id={obj_tid}, active tenant is {tid}"
             )
+    elif obj_tid is not None and obj_tid != tid:
+        raise TenantSecurityError(
+            f"Cross-tenant write blocked: {class_name} "
+            f"has tenant_id={obj_tid}, active tenant is {tid}"
+        )
 
 
 def register_tenant_guards(app):
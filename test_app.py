@@ -18,6 +18,7 @@ from app import create_app
 from config_models import AppConfig, EmailConfig, SuperfakturaConfig
 from extensions import db
 from models import (
+    AuditLog,
     Bundle,
     BundleItem,
     BundlePriceHistory,
@@ -259,6 +260,18 @@ class TestUtilityFunctions:
     def test_parse_time_invalid(self):
         assert parse_time("bad") is None
 
+    def test_parse_fast_path_matches_strptime(self):
+        assert parse_date("2026-01-15") == datetime.date(2026, 1, 15)
+        assert parse_date("2026-1-5") == datetime.date(2026, 1, 5)
+        assert parse_date("2026-13-01") is None
+        assert parse_datetime("2026-01-15T10:30") == datetime.datetime(
+            2026, 1, 15, 10, 30
+        )
+        assert parse_datetime("2026-01-15T25:30") is None
+        assert parse_time("09:05") == datetime.time(9, 5)
+        assert parse_time("9:5") == datetime.time(9, 5)
+        assert parse_time("24:00") is None
+
 
 # ============================================================================
 # App creation tests
@@ -279,6 +292,14 @@ class TestAppCreation:
             assert admin is not None
             assert admin.role == "admin"
 
+    def test_ensure_admin_user_idempotent(self, app):
+        from services.auth import ensure_admin_user
+
+        with app.app_context():
+            before = User.query.count()
+            ensure_admin_user()
+            assert User.query.count() == before
+
     def test_csrf_initialized(self, app):
         assert "WTF_CSRF_ENABLED" in app.config
 
@@ -688,12 +709,17 @@ class TestDeliveryNoteRoutes:
                 "order_ids": str(sample_data["order_id"]),
                 "items[0][type]": "bundle",
                 "items[0][bundle_id]": str(bundle_id),
-                "items[0][quantity]": "1",
+                "items[0][quantity]": "3",
                 "items[0][unit_price]": "40.00",
             },
             follow_redirects=True,
         )
         assert resp.status_code == 200
+        with app.app_context():
+            item = DeliveryItem.query.filter_by(bundle_id=bundle_id).one()
+            assert [(c.product_id, c.quantity, c.tenant_id) for c in item.components] == [
+                (sample_data["product_id"], 6, sample_data["tenant_id"])
+            ]
 
     def test_create_delivery_note_with_manual_item(self, logged_in_client, sample_data):
         resp = logged_in_client.post(
@@ -727,6 +753,17 @@ class TestDeliveryNoteRoutes:
             follow_redirects=True,
         )
         assert resp.status_code == 200
+        with app.app_context():
+            delivery = db.session.get(DeliveryNote, delivery_id)
+            assert delivery.confirmed is True
+            assert delivery.actual_delivery_datetime is not None
+
+    def test_confirm_nonexistent_delivery(self, logged_in_client):
+        resp = logged_in_client.post(
+            "/delivery-notes/99999/confirm",
+            follow_redirects=True,
+        )
+        assert resp.status_code == 404
 
     def test_unconfirm_delivery(self, logged_in_client, sample_data, app):
         with app.app_context():
@@ -747,6 +784,8 @@ class TestDeliveryNoteRoutes:
             follow_redirects=True,
         )
         assert resp.status_code == 200
+        with app.app_context():
+            assert db.session.get(DeliveryNote, delivery_id).confirmed is False
 
     def test_delivery_pdf(self, logged_in_client, sample_data, app):
         with app.app_context():
@@ -775,6 +814,8 @@ class TestDeliveryNoteRoutes:
         resp = logged_in_client.get(f"/delivery-notes/{delivery_id}/pdf")
         assert resp.status_code == 200
         assert resp.content_type == "application/pdf"
+        assert f"delivery_{delivery_id}.pdf" in resp.headers["Content-Disposition"]
+        assert resp.data.startswith(b"%PDF")
 
 
 # ============================================================================
@@ -895,6 +936,24 @@ class TestInvoiceRoutes:
         resp = logged_in_client.get("/invoices")
         assert resp.status_code == 200
 
+    def test_invoices_page_stats(self, logged_in_client, sample_data, app):
+        with app.app_context():
+            tenant = Tenant.query.filter_by(slug="test-tenant").first()
+            for status, amount in (("paid", 120.0), ("draft", 30.5)):
+                db.session.add(Invoice(
+                    partner_id=sample_data["partner_id"], status=status,
+                    total=amount, total_with_vat=amount, tenant_id=tenant.id,
+                ))
+            db.session.commit()
+
+        resp = logged_in_client.get("/invoices")
+        assert resp.status_code == 200
+        html = resp.get_data(as_text=True)
+        assert f'<option value="{sample_data["partner_id"]}">' in html
+        assert "150.50" in html
+        assert "120.00" in html
+        assert "30.50" in html
+
     def test_create_invoice_no_partner(self, logged_in_client):
         resp = logged_in_client.post(
             "/invoices",
@@ -975,6 +1034,18 @@ class TestInvoiceRoutes:
             follow_redirects=True,
         )
         assert resp.status_code == 200
+        with app.app_context():
+            invoice = db.session.get(Invoice, invoice_id)
+            assert float(invoice.total) == 20.0
+            assert float(invoice.total_with_vat) == 24.0
+            assert [i.description for i in invoice.items] == ["Manual item"]
+
+    def test_add_invoice_item_nonexistent(self, logged_in_client):
+        resp = logged_in_client.post(
+            "/invoices/99999/items",
+            data={"description": "Manual item", "quantity": "1"},
+        )
+        assert resp.status_code == 404
 
     def test_invoice_pdf(self, logged_in_client, sample_data, app):
         with app.app_context():
@@ -1030,6 +1101,54 @@ class TestInvoiceRoutes:
         )
         assert resp.status_code == 200
 
+    @pytest.mark.parametrize("fail", [False, True])
+    def test_send_invoice_email_outcome_audited(
+        self, logged_in_client, sample_data, app, monkeypatch, fail
+    ):
+        import mailer
+
+        def deliver(config, message, session=None):
+            if fail:
+                raise mailer.MailerError("Email authentication failed: 535")
+            return True
+
+        monkeypatch.setattr(mailer, "_deliver", deliver)
+        monkeypatch.setitem(app.config, "EMAIL_CONFIG", EmailConfig(
+            enabled=True,
+            smtp_host="smtp.test.com",
+            smtp_port=587,
+            smtp_user="user",
+            smtp_password="pass",
+            sender="noreply@test.com",
+            operator_cc="",
+        ))
+        with app.app_context():
+            invoice = Invoice(
+                partner_id=sample_data["partner_id"], status="draft", total=50.0,
+                tenant_id=sample_data["tenant_id"],
+            )
+            db.session.add(invoice)
+            db.session.commit()
+            invoice_id = invoice.id
+
+        resp = logged_in_client.post(f"/invoices/{invoice_id}/send")
+        assert resp.status_code == 302
+        # The worker is single-threaded: once this runs, the email job and
+        # its done-callbacks have finished
+        mailer._executor.submit(lambda: None).result(timeout=5)
+
+        with app.app_context():
+            details = [
+                log.details for log in AuditLog.query.filter_by(
+                    action="email", entity_type="invoice", entity_id=invoice_id
+                ).order_by(AuditLog.id)
+            ]
+            expected = "error: Email authentication failed: 535" if fail else "sent"
+            assert details == ["queued", expected]
+            log = AuditLog.query.filter_by(details=expected).one()
+            assert log.tenant_id == sample_data["tenant_id"]
+            assert log.user_id is not None
+
     def test_export_invoice_disabled(self, logged_in_client, sample_data, app):
         with app.app_context():
             tenant = Tenant.query.filter_by(slug="test-tenant").first()
@@ -1098,6 +1217,8 @@ class TestBusinessLogic:
             assert invoice is not None
             assert invoice.total == 46.50
             assert len(invoice.items) == 1
+            assert invoice.items[0].tenant_id == tid
+            assert invoice.items[0].source_delivery_id == delivery.id
             assert invoice.status == "draft"
 
     def test_build_invoice_no_unbilled(self, app, sample_data):
@@ -1191,6 +1312,164 @@ class TestBusinessLogic:
 
 
 class TestPDFGeneration:
+    def test_render_html_reuses_compiled_template(self):
+        from services.pdf import _compile_template, _render_html
+
+        source = "<p>{{ value }}</p>"
+        first = _render_html(source, "", {"value": 1})
+        hits = _compile_template.cache_info().hits
+        second = _render_html(source, "", {"value": 2})
+        assert _compile_template.cache_info().hits == hits + 1
+        assert "<p>1</p>" in first and "<p>2</p>" in second
+
+    def test_money_filter(self):
+        from decimal import Decimal
+
+        from services.pdf import _render_html
+
+        html = _render_html(
+            "{{ a|money }} {{ b|money }} {{ c|money }}", "",
+            {"a": Decimal("12.5"), "b": 3, "c": 0.1},
+        )
+        assert "12.50 3.00 0.10" in html
+
+    def test_pdf_conversion_falls_back_inline(self, monkeypatch):
+        from concurrent.futures.process import BrokenProcessPool
+
+        from services import pdf
+
+        class BrokenPool:
+            shut_down = False
+
+            def submit(self, *args):
+                raise BrokenProcessPool("worker died")
+
+            def shutdown(self, wait=True, cancel_futures=False):
+                self.shut_down = (wait, cancel_futures)
+
+            def map(self, *args):
+                raise BrokenProcessPool("worker died")
+
+        broken = BrokenPool()
+        monkeypatch.setattr(pdf, "_PDF_POOL", broken)
+        monkeypatch.setattr(pdf, "_HAS_XHTML2PDF", True)
+        monkeypatch.setattr(pdf, "_pdf_bytes", lambda html: (html.encode(), "pdf"))
+        converted = pdf._convert_many(["<p>a</p>", "<p>b</p>"], 2)
+        assert converted == [(b"<p>a</p>", "pdf"), (b"<p>b</p>", "pdf")]
+        assert pdf._PDF_POOL is None
+        assert broken.shut_down == (False, True)
+
+    def test_pdf_pool_created_once(self, monkeypatch):
+        import threading
+
+        from services import pdf
+
+        created = []
+
+        class FakePool:
+            def __init__(self, **kwargs):
+                created.append(self)
+
+        monkeypatch.setattr(pdf, "_PDF_POOL", None)
+        monkeypatch.setattr(pdf, "ProcessPoolExecutor", FakePool)
+        threads = [threading.Thread(target=pdf._pdf_pool, args=(2,)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(created) == 1
+        assert pdf._pdf_pool(2) is created[0]
+
+    def test_pdf_pool_only_for_batches(self, app, sample_data, monkeypatch):
+        import dataclasses
+
+        from services import pdf
+
+        class FakePool:
+            def __init__(self, **kwargs):
+                self.max_workers = kwargs["max_workers"]
+                self.mapped = []
+
+            def map(self, fn, documents):
+                self.mapped.extend(documents)
+                return [fn(html) for html in documents]
+
+        monkeypatch.setattr(pdf, "_PDF_POOL", None)
+        monkeypatch.setattr(pdf, "ProcessPoolExecutor", FakePool)
+        monkeypatch.setattr(pdf, "_HAS_XHTML2PDF", True)
+        monkeypatch.setattr(pdf, "_pdf_bytes", lambda html: (html.encode(), "pdf"))
+        with app.app_context():
+            invoices = []
+            for total in (10.0, 20.0):
+                invoice = Invoice(
+                    partner_id=sample_data["partner_id"], status="draft", total=total,
+                    tenant_id=sample_data["tenant_id"],
+                )
+                db.session.add(invoice)
+                invoices.append(invoice)
+            db.session.commit()
+            app_cfg = dataclasses.replace(app.config["APP_CONFIG"], pdf_workers=3)
+
+            # A single download renders inline
+            single = pdf.generate_invoice_pdf(invoices[0], app_cfg)
+            assert pdf._PDF_POOL is None
+            os.unlink(single)
+
+            paths = pdf.generate_invoice_pdfs(invoices, app_cfg)
+            assert paths[0] == single
+            assert all(os.path.exists(p) for p in paths)
+            assert pdf._PDF_POOL.max_workers == 3
+            assert len(pdf._PDF_POOL.mapped) == 2
+
+            # Cached invoices are not converted again
+            assert pdf.generate_invoice_pdfs(invoices, app_cfg) == paths
+            assert len(pdf._PDF_POOL.mapped) == 2
+            for path in paths:
+                os.unlink(path)
+
+    def test_layout_config_template_cached(self):
+        from services.pdf import _template_from_layout
+
+        layout = '{"columns": ["item_name", "total"]}'
+        html, css = _template_from_layout("invoice", layout)
+        assert "{% for item in invoice.items %}" in html
+        assert "<th>Celkom</th>" in html and "<th>Mnozstvo</th>" not in html
+        assert _template_from_layout("invoice", layout) == (html, css)
+        assert _template_from_layout("invoice", "not json") is None
+
+    def test_invoice_qr_memoised(self, app, sample_data, monkeypatch):
+        from models import AppSetting
+        from services import qr_payment
+
+        calls = []
+
+        def fake_qr(**kwargs):
+            calls.append(kwargs)
+            return b"png"
+
+        monkeypatch.setattr(qr_payment, "generate_pay_by_square_qr", fake_qr)
+        qr_payment._payment_qr_data_uri.cache_clear()
+        with app.app_context():
+            tenant = Tenant.query.filter_by(slug="test-tenant").first()
+            db.session.add(AppSetting(
+                tenant_id=tenant.id, key="invoice_bank_iban",
+                value="SK3112000000198742637541",
+            ))
+            invoice = Invoice(
+                partner_id=sample_data["partner_id"], invoice_number="FV-2026-0001",
+                total_with_vat=12.0, tenant_id=tenant.id,
+            )
+            db.session.add(invoice)
+            db.session.commit()
+
+            first = qr_payment.generate_invoice_qr(invoice, tenant)
+            second = qr_payment.generate_invoice_qr(invoice, tenant)
+        assert first == second == "data:image/png;base64,cG5n"
+        assert len(calls) == 1
+        assert calls[0]["iban"] == "SK3112000000198742637541"
+        assert calls[0]["swift"] == ""
+        assert calls[0]["variable_symbol"] == "20260001"
+
     def test_generate_delivery_pdf(self, app, sample_data):
         with app.app_context():
             tenant = Tenant.query.filter_by(slug="test-tenant").first()
@@ -1314,6 +1593,63 @@ class TestPDFGeneration:
             assert pdf_path.endswith(".pdf")
             os.unlink(pdf_path)
 
+    def test_generate_invoice_pdf_cached_until_changed(self, app, sample_data):
+        with app.app_context():
+            tenant = Tenant.query.filter_by(slug="test-tenant").first()
+            invoice = Invoice(
+                partner_id=sample_data["partner_id"], status="draft", total=100.0,
+                tenant_id=tenant.id,
+            )
+            db.session.add(invoice)
+            db.session.commit()
+
+            app_cfg = app.config["APP_CONFIG"]
+            first = generate_invoice_pdf(invoice, app_cfg)
+            mtime = os.path.getmtime(first)
+            assert generate_invoice_pdf(invoice, app_cfg) == first
+            assert os.path.getmtime(first) == mtime
+
+            # A recent superseded file may still be downloading: kept
+            invoice.total = 120.0
+            db.session.commit()
+            second = generate_invoice_pdf(invoice, app_cfg)
+            assert second != first
+            assert os.path.exists(second)
+            assert os.path.exists(first)
+
+            # Old ones are pruned once the new file is in place
+            os.utime(first, (mtime - 3600, mtime - 3600))
+            invoice.total = 130.0
+            db.session.commit()
+            third = generate_invoice_pdf(invoice, app_cfg)
+            assert not os.path.exists(first)
+            assert os.path.exists(second) and os.path.exists(third)
+            assert not [n for n in os.listdir(os.path.dirname(third)) if n.endswith(".tmp")]
+            os.unlink(second)
+            os.unlink(third)
+
+    def test_generate_invoice_pdf_html_fallback_cached(self, app, sample_data, monkeypatch):
+        from services import pdf
+
+        monkeypatch.setattr(pdf, "_HAS_WEASYPRINT", False)
+        monkeypatch.setattr(pdf, "_HAS_XHTML2PDF", False)
+        with app.app_context():
+            tenant = Tenant.query.filter_by(slug="test-tenant").first()
+            invoice = Invoice(
+                partner_id=sample_data["partner_id"], status="draft", total=100.0,
+                tenant_id=tenant.id,
+            )
+            db.session.add(invoice)
+            db.session.commit()
+
+            app_cfg = app.config["APP_CONFIG"]
+            first = pdf.generate_invoice_pdf(invoice, app_cfg)
+            assert first.endswith(".html")
+            mtime = os.path.getmtime(first)
+            assert pdf.generate_invoice_pdf(invoice, app_cfg) == first
+            assert os.path.getmtime(first) == mtime
+            os.unlink(first)
+
 
 # ============================================================================
 # Role permission tests
@@ -1432,6 +1768,157 @@ class TestConfigModels:
         assert cfg.enabled is False
         assert cfg.smtp_port == 587
 
+    def test_queue_document_email_sends_in_background(self, monkeypatch, tmp_path):
+        import mailer
+
+        sent = []
+
+        class FakeSMTP:
+            def __init__(self, host, port, timeout=None):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def starttls(self):
+                pass
+
+            def login(self, user, password):
+                pass
+
+            def send_message(self, message):
+                sent.append(message["To"])
+
+        monkeypatch.setattr(mailer.smtplib, "SMTP", FakeSMTP)
+        cfg = EmailConfig(
+            enabled=True,
+            smtp_host="smtp.test.com",
+            smtp_port=587,
+            smtp_user="user",
+            smtp_password="pass",
+            sender="noreply@test.com",
+            operator_cc="",
+        )
+        attachment = tmp_path / "invoice.pdf"
+        attachment.write_bytes(b"%PDF-1.4")
+
+        future = mailer.queue_document_email(
+            cfg, "Subject", "to@test.com", "", "Body", str(attachment)
+        )
+        assert future.result(timeout=5) is True
+        assert sent == ["to@test.com"]
+
+        with pytest.raises(mailer.MailerError):
+            mailer.queue_document_email(
+                cfg, "Subject", "to@test.com", "", "Body", str(tmp_path / "missing.pdf")
+            )
+
+    def test_mailer_session_reuses_connection(self, monkeypatch, tmp_path):
+        import smtplib
+
+        import mailer
+
+        calls = []
+
+        class FakeSMTP:
+            def __init__(self, host, port, timeout=None):
+                calls.append("connect")
+
+            def starttls(self):
+                calls.append("starttls")
+
+            def login(self, user, password):
+                calls.append("login")
+
+            def send_message(self, message):
+                if message["To"] == "bad@test.com":
+                    raise smtplib.SMTPRecipientsRefused({"bad@test.com": (550, b"no")})
+                calls.append(message["To"])
+
+            def quit(self):
+                calls.append("quit")
+
+        monkeypatch.setattr(mailer.smtplib, "SMTP", FakeSMTP)
+        cfg = EmailConfig(
+            enabled=True,
+            smtp_host="smtp.test.com",
+            smtp_port=587,
+            smtp_user="user",
+            smtp_password="pass",
+            sender="noreply@test.com",
+            operator_cc="",
+        )
+        attachment = tmp_path / "invoice.pdf"
+        attachment.write_bytes(b"%PDF-1.4")
+
+        with mailer.MailerSession(cfg) as session:
+            for recipient in ("a@test.com", "b@test.com"):
+                assert mailer.send_document_email(
+                    cfg, "Subject", recipient, "", "Body", str(attachment), session=session
+                )
+            with pytest.raises(mailer.MailerError, match="recipients refused"):
+                mailer.send_document_email(
+                    cfg, "Subject", "bad@test.com", "", "Body", str(attachment), session=session
+                )
+        assert calls == ["connect", "starttls", "login", "a@test.com", "b@test.com", "quit"]
+        assert session.server is None
+
+    def test_load_config_rereads_changed_file(self, monkeypatch, tmp_path):
+        from config import load_config
+
+        path = tmp_path / "config.yaml"
+        path.write_text("app:\n  name: First\n", encoding="utf-8")
+        monkeypatch.setenv("CONFIG_PATH", str(path))
+        monkeypatch.setenv("APP_SECRET_KEY", "test-secret")
+        assert load_config()[0].name == "First"
+        assert load_config()[0].name == "First"
+
+        path.write_text("app:\n  name: Second one\n", encoding="utf-8")
+        assert load_config()[0].name == "Second one"
+
+    def test_load_config_pdf_workers(self, monkeypatch, tmp_path):
+        from config import load_config
+        from config_models import default_pdf_workers
+
+        path = tmp_path / "config.yaml"
+        path.write_text("app:\n  name: Pdf\n", encoding="utf-8")
+        monkeypatch.setenv("CONFIG_PATH", str(path))
+        monkeypatch.setenv("APP_SECRET_KEY", "test-secret")
+        assert load_config()[0].pdf_workers == default_pdf_workers() <= 4
+
+        path.write_text("app:\n  pdf_workers: 2\n", encoding="utf-8")
+        assert load_config()[0].pdf_workers == 2
+        monkeypatch.setenv("PDF_WORKERS", "3")
+        assert load_config()[0].pdf_workers == 3
+
+    def test_load_config_boolean_env(self, monkeypatch, tmp_path):
+        from config import load_config
+
+        monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "missing.yaml"))
+        monkeypatch.setenv("APP_SECRET_KEY", "test-secret")
+        monkeypatch.setenv("EMAIL_ENABLED", " On ")
+        monkeypatch.setenv("GOPAY_ENABLED", "no")
+        _app, email, _sf, gopay, _uri = load_config()
+        assert email.enabled is True
+        assert gopay.enabled is False
+
+    def test_sqlite_connection_pragmas(self, tmp_path):
+        import sqlite3
+
+        from config import enable_sqlite_fks
+
+        conn = sqlite3.connect(str(tmp_path / "pragmas.db"))
+        try:
+            enable_sqlite_fks(conn, None)
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        finally:
+            conn.close()
+
     def test_superfaktura_config_creation(self):
         cfg = SuperfakturaConfig(
             enabled=False,
@@ -1540,6 +2027,43 @@ class TestEdgeCases:
             assert invoice.total == 30.0
             assert len(invoice.items) == 3
 
+    def test_note_linked_to_two_orders_billed_once(self, app, sample_data):
+        with app.app_context():
+            tenant = Tenant.query.filter_by(slug="test-tenant").first()
+            tid = tenant.id
+            g.current_tenant = tenant
+            second_order = Order(
+                partner_id=sample_data["partner_id"],
+                created_by_id=sample_data["user_id"],
+                tenant_id=tid,
+            )
+            db.session.add(second_order)
+            delivery = DeliveryNote(
+                primary_order_id=sample_data["order_id"],
+                created_by_id=sample_data["user_id"],
+                tenant_id=tid,
+            )
+            db.session.add(delivery)
+            db.session.flush()
+            for order_id in (sample_data["order_id"], second_order.id):
+                delivery.orders.append(
+                    DeliveryNoteOrder(order_id=order_id, tenant_id=tid)
+                )
+            delivery.items.append(
+                DeliveryItem(
+                    product_id=sample_data["product_id"],
+                    quantity=1,
+                    unit_price=10.0,
+                    line_total=10.0,
+                    tenant_id=tid,
+                )
+            )
+            db.session.commit()
+
+            invoice = build_invoice_for_partner(sample_data["partner_id"])
+            assert invoice.total == 10.0
+            assert len(invoice.items) == 1
+
     def test_partner_with_empty_discount(self, logged_in_client):
         """Test creating partner with empty discount_percent."""
         resp = logged_in_client.post(
@@ -2012,3 +2536,884 @@ class TestPDFAccessControl:
         )
         assert resp.status_code == 200
         assert "Nem" in resp.data.decode("utf-8")  # "Nemáte oprávnenie"
+
+
+# ============================================================================
+# Request-scoped catalog cache
+# ============================================================================
+
+
+class TestCatalogCache:
+    def test_catalog_lists_memoised_per_request(self, app, sample_data):
+        from services.catalog import active_products, all_products
+
+        with app.test_request_context():
+            g.current_tenant = Tenant.query.filter_by(slug="test-tenant").first()
+            products = all_products()
+            assert all_products() is products
+            assert {p.id for p in active_products()} == {
+                sample_data["product_id"], sample_data["product2_id"]
+            }
+
+
+# ============================================================================
+# db_tools package imports
+# ============================================================================
+
+
+class TestDbToolsImports:
+    def test_package_exports_resolve_lazily(self):
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, db_tools.core.normalization, db_tools.operations\n"
+            "assert 'extensions' not in sys.modules\n"
+            "from db_tools.operations import MaintenanceTool\n"
+            "assert 'db_tools.operations.import_data' not in sys.modules\n"
+            "assert MaintenanceTool.__name__ == 'MaintenanceTool'\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_cli_template_needs_no_app_context(self, monkeypatch):
+        from click.testing import CliRunner
+
+        from db_tools import cli as db_cli
+
+        def _no_app():
+            raise AssertionError("template must not build an app")
+
+        monkeypatch.setattr(db_cli, "get_app_context", _no_app)
+        result = CliRunner().invoke(db_cli.cli, ["template", "vehicle"])
+        assert result.exit_code == 0
+        assert result.output.startswith("name,registration_number")
+
+    def test_sqlite_backup_includes_wal_pages(self, tmp_path):
+        import sqlite3
+
+        from db_tools.core.backup import BackupManager
+
+        db_path = tmp_path / "live.db"
+        live = sqlite3.connect(str(db_path))
+        live.execute("PRAGMA journal_mode=WAL")
+        live.execute("PRAGMA wal_autocheckpoint=0")
+        live.execute("CREATE TABLE t (v INTEGER)")
+        live.execute("INSERT INTO t VALUES (42)")
+        live.commit()
+
+        manager = BackupManager(
+            f"sqlite:///{db_path}", backup_dir=tmp_path / "backups"
+        )
+        backup_path = manager.create_backup()
+        live.close()
+
+        assert manager.verify_backup(backup_path, deep=True)
+        restored_path = tmp_path / "restored.db"
+        BackupManager(f"sqlite:///{restored_path}").restore_backup(backup_path)
+        copy = sqlite3.connect(str(restored_path))
+        assert copy.execute("SELECT v FROM t").fetchall() == [(42,)]
+        copy.close()
+
+    def test_list_backups_includes_compressed(self, tmp_path):
+        from db_tools.core.backup import BackupManager
+
+        for name in ("a.db", "b.sql.zst", "c.db.zst", "d.txt", "e.db.zst.tmp"):
+            (tmp_path / name).write_bytes(b"x")
+        manager = BackupManager("sqlite:///x.db", backup_dir=tmp_path)
+        names = {path.name for path, _ in manager.list_backups()}
+        assert names == {"a.db", "b.sql.zst", "c.db.zst"}
+
+    def test_postgres_backup_uses_custom_format(self, tmp_path, monkeypatch):
+        import subprocess
+
+        from db_tools.core import backup as backup_mod
+
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            return subprocess.CompletedProcess(cmd, 0, "pg_dump (PostgreSQL) 16.2", "")
+
+        class FakePopen:
+            def __init__(self, cmd, stdout=None, **kwargs):
+                calls.append(cmd)
+                stdout.write(b"PGDMP\x01\x0e")
+                self.returncode = 0
+
+            def communicate(self):
+                return None, b""
+
+        backup_mod._pg_dump_compression.cache_clear()
+        monkeypatch.setattr(backup_mod.subprocess, "run", fake_run)
+        monkeypatch.setattr(backup_mod.subprocess, "Popen", FakePopen)
+        manager = backup_mod.BackupManager(
+            "postgresql://u:p@db/app", backup_dir=tmp_path
+        )
+        path = manager.create_backup()
+        backup_mod._pg_dump_compression.cache_clear()
+
+        assert path.suffix == ".dump" and manager.verify_backup(path)
+        dump_cmd = calls[-1]
+        assert "--format=custom" in dump_cmd and "-f" not in dump_cmd
+        assert dump_cmd[dump_cmd.index("-Z") + 1] == "zstd:6"
+
+        manager.restore_backup(path)
+        assert calls[-1][0] == "pg_restore" and "-j" in calls[-1]
+
+    def test_sqlite_path_resolution_cached(self, tmp_path, monkeypatch):
+        from db_tools.core.backup import BackupManager
+
+        (tmp_path / "app.db").write_bytes(b"")
+        manager = BackupManager("sqlite:///app.db", app_root=str(tmp_path))
+        assert manager._resolve_sqlite_path() == str(tmp_path / "app.db")
+
+        def no_stat(path):
+            raise AssertionError("path already resolved")
+
+        monkeypatch.setattr("db_tools.core.backup.os.path.exists", no_stat)
+        assert manager._resolve_sqlite_path() == str(tmp_path / "app.db")
+
+    def test_cleanup_old_backups_retention(self, tmp_path):
+        import time
+
+        from db_tools.core.backup import BackupManager
+
+        now = time.time()
+        ages_days = {"a.db": 0, "b.db": 1, "c.db": 2, "d.db": 3, "old.db": 40}
+        for name, age in ages_days.items():
+            path = tmp_path / name
+            path.write_bytes(b"x")
+            os.utime(path, (now - age * 86400, now - age * 86400))
+
+        manager = BackupManager(
+            "sqlite:///x.db", backup_dir=tmp_path,
+            retention_count=3, retention_days=30,
+        )
+        removed = {p.name for p in manager.cleanup_old_backups()}
+        assert removed == {"d.db", "old.db"}
+        assert [p.name for p, _ in manager.list_backups()] == ["a.db", "b.db", "c.db"]
+
+    def test_verify_backup_header_check(self, tmp_path):
+        from db_tools.core.backup import BackupManager
+
+        sqlite_mgr = BackupManager("sqlite:///x.db", backup_dir=tmp_path)
+        pg_mgr = BackupManager("postgresql://u:p@db/app", backup_dir=tmp_path)
+
+        truncated = tmp_path / "truncated.db"
+        truncated.write_bytes(b"SQLite format 3\x00" + b"\x00" * 10)
+        assert sqlite_mgr.verify_backup(truncated)
+        assert not sqlite_mgr.verify_backup(truncated, deep=True)
+
+        not_sqlite = tmp_path / "other.db"
+        not_sqlite.write_bytes(b"hello world, not a database")
+        assert not sqlite_mgr.verify_backup(not_sqlite)
+
+        dump = tmp_path / "dump.sql"
+        dump.write_bytes(b"SET statement_timeout = 0;" + b" " * 100000)
+        assert pg_mgr.verify_backup(dump)
+
+    def test_fast_copy_falls_back_to_copyfile(self, tmp_path, monkeypatch):
+        from db_tools.core import backup as backup_mod
+
+        src = tmp_path / "src.db"
+        src.write_bytes(os.urandom(200_000))
+
+        dst = tmp_path / "dst.db"
+        backup_mod._fast_copy(str(src), str(dst))
+        assert dst.read_bytes() == src.read_bytes()
+
+        def refuse(*args):
+            raise OSError(18, "Invalid cross-device link")
+
+        monkeypatch.setattr(backup_mod.os, "copy_file_range", refuse, raising=False)
+        dst2 = tmp_path / "dst2.db"
+        backup_mod._fast_copy(str(src), str(dst2))
+        assert dst2.read_bytes() == src.read_bytes()
+        assert dst2.stat().st_mtime == src.stat().st_mtime
+
+    def test_backup_manager_parses_uri_once(self):
+        from db_tools.core import backup as backup_mod
+
+        backup_mod._parse_uri.cache_clear()
+        first = backup_mod.BackupManager("postgresql://u:p@db:5433/app")
+        second = backup_mod.BackupManager("postgresql://u:p@db:5433/app")
+        assert first._parsed_uri is second._parsed_uri
+        assert backup_mod._parse_uri.cache_info().hits == 1
+        assert second.is_postgresql and not second.is_sqlite
+        assert second._parsed_uri.port == 5433
+
+    def test_table_counts_single_query(self, app, sample_data):
+        from sqlalchemy import event
+
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            statements = []
+
+            def count_statements(conn, cursor, statement, *args):
+                if not statement.startswith(("SAVEPOINT", "RELEASE")):
+                    statements.append(statement)
+
+            event.listen(db.engine, "before_cursor_execute", count_statements)
+            try:
+                counts = DatabaseInspector().get_table_counts()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", count_statements)
+
+            assert len(statements) == 1
+            assert counts["product"] == Product.query.count() == 2
+            assert counts["partner"] == Partner.query.count()
+            assert all(v >= 0 for v in counts.values())
+
+    def test_table_counts_fallback_keeps_session(self, app, sample_data, monkeypatch):
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            product = db.session.get(Product, sample_data["product_id"])
+            product.name = "Pending rename"
+            db.session.flush()
+
+            inspector = DatabaseInspector()
+
+            def broken(models):
+                db.session.execute(db.text("SELECT * FROM no_such_table"))
+
+            monkeypatch.setattr(inspector, "_count_tables", broken)
+            counts = inspector.get_table_counts()
+            assert counts["product"] == 2
+            assert product.name == "Pending rename"
+            assert db.session.execute(
+                db.select(Product.name).where(Product.id == product.id)
+            ).scalar_one() == "Pending rename"
+            db.session.rollback()
+
+    def test_statistics_conditional_counts(self, app, sample_data):
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            product = db.session.get(Product, sample_data["product_id"])
+            product.is_active = False
+            db.session.commit()
+
+            stats = DatabaseInspector().get_statistics()
+            assert stats["products"] == {"total": 2, "active": 1}
+            assert set(stats["invoices"]) == {"total", "draft", "sent", "paid"}
+            assert stats["users"]["total"] == User.query.count()
+
+    def test_check_integrity_combined_query(self, app, sample_data):
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            assert DatabaseInspector().check_integrity() == []
+
+            product = db.session.get(Product, sample_data["product_id"])
+            product.is_active = False
+            other = Tenant(name="Other Tenant", slug="other-tenant")
+            db.session.add(other)
+            db.session.flush()
+            for tenant_id in (sample_data["tenant_id"], other.id):
+                db.session.add(Invoice(
+                    partner_id=sample_data["partner_id"],
+                    invoice_number="FA-DUP",
+                    tenant_id=tenant_id,
+                ))
+            db.session.commit()
+
+            issues = {i["entity"]: i for i in DatabaseInspector().check_integrity()}
+            assert set(issues) == {"Product", "Invoice"}
+            assert issues["Product"]["count"] == 1
+            assert issues["Invoice"]["details"] == ["FA-DUP"]
+            assert issues["Invoice"]["count"] == 1
+            inspector = DatabaseInspector()
+            assert inspector.get_duplicate_invoice_numbers() == ["FA-DUP"]
+            assert inspector.get_duplicate_invoice_numbers(limit=0) == []
+
+    def test_fk_graph_reflected_once(self, app):
+        from sqlalchemy import event
+
+        from db_tools.core import database_inspector as inspector_mod
+
+        with app.app_context():
+            inspector_mod._fk_graph.cache_clear()
+            inspector = inspector_mod.DatabaseInspector()
+            refs = inspector.get_foreign_key_references("invoice")
+            assert ("invoice_item", "invoice_id") in refs["incoming"]
+            assert ("partner_id", "partner") in refs["outgoing"]
+
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                again = inspector.get_foreign_key_references("invoice")
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+            assert again == refs and statements == []
+
+    def test_reference_counts_batched(self, app, sample_data):
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            inspector = DatabaseInspector()
+            counts = inspector.get_reference_counts("product", sample_data["product_id"])
+            assert counts == {"order_item": 1}
+            assert inspector.get_reference_counts("product", 999999) == {}
+
+    def test_reference_exists(self, app, sample_data):
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            inspector = DatabaseInspector()
+            found = inspector.get_reference_exists("product", sample_data["product_id"])
+            assert found["order_item"] is True
+            assert found["delivery_item"] is False
+            unused = inspector.get_reference_exists("product", sample_data["product2_id"])
+            assert not any(unused.values())
+
+    def test_normalize_for_matching(self):
+        from db_tools.core.normalization import normalize_for_matching
+
+        assert normalize_for_matching("FINARCO,  a. b.") == "finarco a.b"
+        assert normalize_for_matching("  finarco;\tB ,s.r.o. ") == "finarco b s.r.o."
+        assert normalize_for_matching("") == ""
+
+    def test_find_best_match_prenormalised(self):
+        from db_tools.core.normalization import (
+            find_best_match, find_best_match_prenorm, normalize_for_matching,
+        )
+
+        candidates = [(1, "Finarco s.r.o."), (2, "Finarco B s.r.o.")]
+        prenorm = [(cid, name, normalize_for_matching(name)) for cid, name in candidates]
+        for search in ("Finarco s.r.o.", "FINARCO,  s.r.o", "Unknown"):
+            assert find_best_match(search, candidates) == find_best_match_prenorm(search, prenorm)
+        assert find_best_match("finarco, s.r.o.", candidates) == (1, "Finarco s.r.o.", False)
+        with pytest.raises(ValueError):
+            find_best_match("a", [(1, "A"), (2, "a.")])
+
+    def test_find_best_match_indexed_matches_linear_scan(self):
+        from db_tools.core.normalization import (
+            build_match_index, find_best_match, find_best_match_indexed,
+        )
+
+        candidates = [(1, "Finarco s.r.o."), (2, "Finarco B s.r.o."),
+                      (3, "Alfa"), (4, "ALFA.")]
+        index = build_match_index(candidates)
+        for search in ("Finarco s.r.o.", "finarco, s.r.o.", "finarco b s.r.o", "x"):
+            assert find_best_match_indexed(search, index) == find_best_match(search, candidates)
+        assert find_best_match_indexed("Alfa", index) == (3, "Alfa", True)
+        with pytest.raises(ValueError):
+            find_best_match_indexed("alfa", index)
+        assert find_best_match_indexed("Alfa", build_match_index([])) is None
+
+    @pytest.mark.parametrize("use_rapidfuzz", [False, True])
+    def test_suggest_similar(self, monkeypatch, use_rapidfuzz):
+        from db_tools.core import normalization
+
+        if use_rapidfuzz and not normalization._HAS_RAPIDFUZZ:
+            pytest.skip("rapidfuzz not installed")
+        monkeypatch.setattr(normalization, "_HAS_RAPIDFUZZ", use_rapidfuzz)
+        candidates = [(1, "Finarco s.r.o."), (2, "Stavby Novak"), (3, "Alfa")]
+        suggestions = normalization.suggest_similar("finarco sro", candidates)
+        assert suggestions[0] == "Finarco s.r.o."
+        assert "Alfa" not in suggestions
+        prepared = normalization.prepare_candidates(candidates)
+        assert prepared[0].words == {"finarco", "s.r.o"}
+        assert normalization.suggest_similar("finarco sro", prepared) == suggestions
+
+    def test_engine_query_cache_size(self, app):
+        with app.app_context():
+            assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["query_cache_size"] == 1200
+            assert db.engine._compiled_cache.capacity == 1200
+
+    def test_find_best_match_exact_wins_over_earlier_normalized(self):
+        from db_tools.core.normalization import find_best_match
+
+        candidates = [(1, "ALFA."), (2, "Alfa"), (3, "alfa")]
+        assert find_best_match("Alfa", candidates) == (2, "Alfa", True)
+        assert find_best_match("Alfa ", candidates, exact_only=True) is None
+
+    def test_deletion_preview_single_query(self, app, sample_data):
+        from sqlalchemy import event
+
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                preview = DatabaseInspector().get_deletion_preview()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+            assert len(statements) == 1
+            names = [name for name, _ in preview]
+            assert dict(preview)["product"] == 2
+            assert names.index("order_item") < names.index("product")
+            assert "app_setting" not in names and all(c > 0 for _, c in preview)
+
+    def test_wipe_page_previews(self, logged_in_client, sample_data):
+        resp = logged_in_client.get("/admin/db-tools/wipe")
+        assert resp.status_code == 200
+        resp = logged_in_client.post(
+            "/admin/db-tools/wipe", data={"action": "preview", "include_config": "on"}
+        )
+        assert resp.status_code == 200
+        assert "order_item" in resp.data.decode("utf-8")
+
+    def test_model_class_lookup_preloaded(self, app):
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            inspector = DatabaseInspector()
+            assert inspector.get_model_class("delivery_note") is DeliveryNote
+            assert inspector.get_model_class("no_such_table") is None
+            assert DatabaseInspector()._model_map is inspector._model_map
+
+    def test_inspector_snapshot(self, app, sample_data):
+        from sqlalchemy import event
+
+        from db_tools.core.database_inspector import DatabaseInspector
+
+        with app.app_context():
+            statements = []
+
+            def record(conn, cursor, statement, params, context, executemany):
+                if not statement.startswith(("SAVEPOINT", "RELEASE")):
+                    statements.append(statement)
+
+            inspector = DatabaseInspector()
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                snap = inspector.snapshot()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+            # One explicit read transaction around the three queries
+            assert statements[0] == "BEGIN"
+            assert len(statements) == 4
+            assert snap["counts"]["product"] == 2
+            assert snap["stats"] == inspector.get_statistics()
+            assert list(snap["stats"])[0] == "users"
+            assert snap["stats"]["audit_log"] == {"total": snap["counts"]["audit_log"]}
+            assert snap["integrity"] == []
+
+    def test_maintenance_page_snapshot(self, logged_in_client, sample_data):
+        for url in ("/admin/db-tools/", "/admin/db-tools/maintenance"):
+            assert logged_in_client.get(url).status_code == 200
+
+    def test_import_patterns_precompiled(self, app):
+        from db_tools.operations.import_data import DataImporter, VALIDATION_RULES
+
+        with app.app_context():
+            importer = DataImporter()
+            rules = VALIDATION_RULES["partner"]
+            assert all(
+                hasattr(r["pattern"], "match") for r in rules.values() if "pattern" in r
+            )
+            assert importer._validate_value("12345678", "ico", rules["ico"], 2) == ("12345678", None)
+            value, error = importer._validate_value("1234", "ico", rules["ico"], 2)
+            assert value is None and error.message == "Value does not match required format"
+            assert importer._validate_value("SK1234567890", "ic_dph", rules["ic_dph"], 2)[1] is None
+
+    def test_import_preloads_existing_records(self, app, tmp_path):
+        from sqlalchemy import event
+
+        from db_tools.operations.import_data import DataImporter
+
+        with app.app_context():
+            db.session.add(Product(product_number="P-1", name="Old", price=1))
+            db.session.commit()
+            csv_path = tmp_path / "products.csv"
+            csv_path.write_text(
+                "name,price,product_number\n"
+                "New one,2,P-1\n"
+                "Fresh,3,P-2\n"
+                "Fresh again,4,P-2\n",
+                encoding="utf-8",
+            )
+            statements = []
+
+            def record(conn, cursor, statement, params, context, executemany):
+                if statement.lstrip().upper().startswith("SELECT"):
+                    statements.append(statement)
+
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                result = DataImporter().import_file(csv_path, "product", conflict_mode="update")
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+            assert result.success
+            assert (result.imported_count, result.updated_count) == (1, 2)
+            assert len(statements) == 1
+            names = {p.product_number: p.name for p in Product.query.all()}
+            assert names == {"P-1": "New one", "P-2": "Fresh again"}
+
+    def test_import_bulk_inserts_keep_tenant_guard(self, app, tmp_path):
+        from flask import g
+
+        from db_tools.operations.import_data import DataImporter
+        from services.tenant import TenantSecurityError, enforce_tenant_on_rows
+
+        with app.app_context():
+            csv_path = tmp_path / "vehicles.csv"
+            csv_path.write_text("name,registration_number\nVan,BA-1\nTruck,BA-2\n",
+                                encoding="utf-8")
+            result = DataImporter().import_file(csv_path, "vehicle")
+            assert result.success and result.imported_count == 2
+            assert Vehicle.query.filter_by(name="Truck").one().active is True
+
+            csv_path.write_text("name,bogus\nVan,1\n", encoding="utf-8")
+            result = DataImporter().import_file(csv_path, "vehicle")
+            assert not result.success and "bogus" in result.errors[-1].message
+
+            # Relationship names are not columns; they must not be dropped silently
+            csv_path.write_text("name,schedules\nVan,1\n", encoding="utf-8")
+            result = DataImporter().import_file(csv_path, "vehicle")
+            assert not result.success
+            assert "Unknown column(s) for vehicle: schedules" in result.errors[-1].message
+
+        with app.test_request_context():
+            g._tenant_id = 1
+            enforce_tenant_on_rows(Vehicle, [{"tenant_id": 1}])
+            with pytest.raises(TenantSecurityError):
+                enforce_tenant_on_rows(Vehicle, [{"name": "No tenant"}])
+
+    @pytest.mark.parametrize("use_calamine", [False, True])
+    def test_import_reader_streams_rows(self, app, tmp_path, monkeypatch, use_calamine):
+        openpyxl = pytest.importorskip("openpyxl")
+        from db_tools.operations import import_data
+        from db_tools.operations.import_data import DataImporter
+
+        if use_calamine and not import_data._HAS_CALAMINE:
+            pytest.skip("python-calamine not installed")
+        monkeypatch.setattr(import_data, "_HAS_CALAMINE", use_calamine)
+
+        xlsx_path = tmp_path / "vehicles.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.append(["name", "registration_number"])
+        wb.active.append(["Van", "BA-1"])
+        wb.active.append([None, None])
+        wb.active.append(["Truck", 1234])
+        wb.save(xlsx_path)
+
+        with app.app_context():
+            importer = DataImporter()
+            rows = importer._iter_xlsx(xlsx_path)
+            assert next(rows) == ["name", "registration_number"]
+            assert list(next(rows)) == ["Van", "BA-1"]
+            rows.close()
+
+            headers, validated, errors = importer.validate_file(xlsx_path, "vehicle")
+            assert headers == ["name", "registration_number"] and errors == []
+            assert [r["name"] for r in validated] == ["Van", "Truck"]
+            assert validated[1]["registration_number"] == "1234"
+
+    def test_import_decimal_comma(self, app):
+        from db_tools.operations.import_data import DataImporter
+
+        with app.app_context():
+            importer = DataImporter()
+            rules = {"type": "decimal", "min": 0}
+            assert importer._validate_value("12,5", "price", rules, 2) == (12.5, None)
+            assert importer._validate_value("7.25", "price", rules, 2) == (7.25, None)
+            value, error = importer._validate_value("1,000,5", "price", rules, 2)
+            assert value is None and error.message == "Invalid decimal value: 1,000,5"
+
+    def test_import_validate_column_plan(self, app, sample_data, tmp_path):
+        from db_tools.operations.import_data import DataImporter
+
+        csv_path = tmp_path / "contacts.csv"
+        csv_path.write_text(
+            "name,partner_name,email\n"
+            "Jana,test partner,jana@test.sk\n"
+            "Peter,Nobody,peter\n"
+            "Eva,Test Partner\n",
+            encoding="utf-8",
+        )
+        with app.app_context():
+            headers, validated, errors = DataImporter().validate_file(csv_path, "contact")
+            assert headers == ["name", "partner_name", "email"]
+            assert validated == [
+                {"name": "Jana", "partner_id": sample_data["partner_id"], "email": "jana@test.sk"},
+                {"name": "Eva", "partner_id": sample_data["partner_id"], "email": None},
+            ]
+            assert [(e.row_number, e.column) for e in errors] == [
+                (3, "partner_name"), (3, "email"),
+            ]
+
+    def test_import_csv_positional_rows(self, app, tmp_path):
+        from db_tools.operations.import_data import DataImporter
+
+        csv_path = tmp_path / "vehicles.csv"
+        csv_path.write_text(
+            "name,registration_number,name\n"
+            "Old,BA-1,Van\n"
+            "\n"
+            "Old,BA-2,Truck,extra\n"
+            "Old\n",
+            encoding="utf-8",
+        )
+        with app.app_context():
+            headers, validated, errors = DataImporter().validate_file(csv_path, "vehicle")
+            assert headers == ["name", "registration_number", "name"]
+            assert validated == [
+                {"name": "Van", "registration_number": "BA-1"},
+                {"name": "Truck", "registration_number": "BA-2"},
+            ]
+            assert [(e.row_number, e.column) for e in errors] == [(4, "name")]
+
+    def test_import_column_validators(self, app):
+        from db_tools.operations.import_data import DataImporter
+
+        with app.app_context():
+            importer = DataImporter()
+            quantity = importer._column_validator("quantity", {"type": "integer", "min": 1})
+            assert quantity("3", 2) == (3, None)
+            assert quantity("0", 2)[1].message == "Value 0 is below minimum 1"
+            flag = importer._column_validator("active", {"type": "boolean"})
+            assert flag("Áno", 2) == (True, None) and flag("nie", 2) == (False, None)
+            vat = importer._column_validator("vat_rate", {"type": "decimal", "default": 20.0})
+            assert vat("  ", 2) == (20.0, None)
+            name = importer._column_validator("name", {"required": True, "max_length": 3})
+            assert name("", 5)[1].message == "Required field 'name' is empty"
+            assert name(" abc ", 5) == ("abc", None)
+
+    def test_import_fk_suggestions_memoized(self, app, sample_data, tmp_path, monkeypatch):
+        from db_tools.operations import import_data
+        from db_tools.operations.import_data import DataImporter
+
+        calls = []
+        original = import_data.suggest_similar
+
+        def counting(value, candidates, *args, **kwargs):
+            calls.append(value)
+            return original(value, candidates, *args, **kwargs)
+
+        monkeypatch.setattr(import_data, "suggest_similar", counting)
+        csv_path = tmp_path / "contacts.csv"
+        csv_path.write_text(
+            "name,partner_name\nA,Test Partnr\nB,test partnr\nC,Other\n",
+            encoding="utf-8",
+        )
+        with app.app_context():
+            _, validated, errors = DataImporter().validate_file(csv_path, "contact")
+            assert validated == [] and len(errors) == 3
+            assert calls == ["Test Partnr", "Other"]
+            assert errors[0].suggestions == errors[1].suggestions == ["Test Partner"]
+            assert errors[0].suggestions is not errors[1].suggestions
+
+    def test_import_rejects_unrelated_headers(self, app, tmp_path):
+        from db_tools.operations.import_data import DataImporter
+
+        csv_path = tmp_path / "wrong.csv"
+        csv_path.write_text("foo,bar\n1,2\n3,4\n", encoding="utf-8")
+        with app.app_context():
+            headers, validated, errors = DataImporter().validate_file(csv_path, "vehicle")
+            assert headers == ["foo", "bar"] and validated == []
+            assert len(errors) == 1 and errors[0].value == "foo, bar"
+            assert "No recognized vehicle columns" in errors[0].message
+
+            csv_path.write_text("active,foo\n1,2\n", encoding="utf-8")
+            _, validated, errors = DataImporter().validate_file(csv_path, "vehicle")
+            assert errors == [] and validated == [{"active": "1", "foo": "2"}]
+
+    def test_repair_orphans_bulk_delete(self, app, sample_data, monkeypatch):
+        from db_tools.operations import maintenance
+        from db_tools.operations.maintenance import MaintenanceTool
+
+        monkeypatch.setattr(maintenance, "ORPHAN_DELETE_BATCH", 1)
+
+        with app.app_context():
+            pid = sample_data["product_id"]
+            conn = db.session.connection()
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            for _ in range(3):
+                conn.exec_driver_sql(
+                    "INSERT INTO order_item (order_id, product_id, quantity, unit_price) "
+                    "VALUES (999999, ?, 1, 1)", (pid,)
+                )
+            item_id = conn.exec_driver_sql(
+                "INSERT INTO delivery_item (delivery_note_id, product_id, is_manual, "
+                "quantity, unit_price, line_total) VALUES (999999, ?, 0, 1, 1, 1)", (pid,)
+            ).lastrowid
+            conn.exec_driver_sql(
+                "INSERT INTO delivery_item_component (delivery_item_id, product_id, quantity) "
+                "VALUES (?, ?, 1)", (item_id, pid)
+            )
+            db.session.commit()
+            db.session.connection().exec_driver_sql("PRAGMA foreign_keys=ON")
+
+            deleted = MaintenanceTool().repair_orphaned_records()
+            assert deleted == {"order_item": 3, "delivery_item": 1}
+            assert DeliveryItemComponent.query.count() == 0
+            assert OrderItem.query.count() == 1
+            assert MaintenanceTool().repair_orphaned_records() == {}
+
+    def test_repair_orphans_binds_no_id_list(self, app, sample_data):
+        import sqlite3
+
+        from db_tools.operations.maintenance import MaintenanceTool
+
+        with app.app_context():
+            pid = sample_data["product_id"]
+            conn = db.session.connection()
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            conn.exec_driver_sql(
+                "INSERT INTO order_item (order_id, product_id, quantity, unit_price) "
+                "VALUES (999999, ?, 1, 1)", [(pid,)] * 1200
+            )
+            db.session.commit()
+            dbapi_conn = db.session.connection().connection.dbapi_connection
+            dbapi_conn.execute("PRAGMA foreign_keys=ON")
+            # Old SQLite builds allow at most 999 variables per statement
+            limit = dbapi_conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+            try:
+                deleted = MaintenanceTool().repair_orphaned_records()
+            finally:
+                dbapi_conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+            assert deleted == {"order_item": 1200}
+            assert OrderItem.query.count() == 1
+
+    def test_reset_number_sequences(self, app, sample_data):
+        from sqlalchemy import event
+
+        from db_tools.operations.maintenance import MaintenanceTool
+        from models import NumberSequence
+
+        with app.app_context():
+            order = db.session.get(Order, sample_data["order_id"])
+            order.order_number = "OBJ-2024-0042"
+            db.session.add(NumberSequence(
+                tenant_id=sample_data["tenant_id"], entity_type="order", last_value=3
+            ))
+            db.session.commit()
+            statements = []
+
+            def record(conn, cursor, statement, params, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                results = MaintenanceTool().reset_number_sequences()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+            assert results == {"order": 42, "delivery_note": 0, "invoice": 0}
+            assert len([s for s in statements if s.lstrip().startswith("SELECT")]) == 2
+            assert NumberSequence.query.filter_by(entity_type="order").one().last_value == 42
+
+    def test_export_entity_to_csv(self, app, sample_data, tmp_path):
+        import csv
+
+        from db_tools.operations.maintenance import MaintenanceTool
+
+        with app.app_context():
+            path = str(tmp_path / "products.csv")
+            result = MaintenanceTool().export_entity_to_csv("product", path)
+            assert result == {"success": True, "count": 2, "path": path}
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            product = db.session.get(Product, sample_data["product_id"])
+            exported = next(r for r in rows if r["id"] == str(product.id))
+            assert exported["name"] == product.name
+            assert exported["created_at"] == product.created_at.isoformat()
+
+            empty = str(tmp_path / "vehicles.csv")
+            result = MaintenanceTool().export_entity_to_csv("vehicle", empty)
+            assert result["count"] == 0 and not os.path.exists(empty)
+
+    def test_read_only_query_authorizer(self, app, tmp_path):
+        import sqlite3
+
+        from db_tools.operations.maintenance import MaintenanceTool, _read_only_authorizer
+
+        conn = sqlite3.connect(tmp_path / "ro.db")
+        conn.execute("CREATE TABLE product (id INTEGER PRIMARY KEY, updated_at TEXT)")
+        conn.execute("INSERT INTO product (updated_at) VALUES ('2024-01-01')")
+        conn.set_authorizer(_read_only_authorizer)
+        assert conn.execute(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 3) "
+            "SELECT count(*), (SELECT upper(updated_at) FROM product) FROM n"
+        ).fetchone() == (3, "2024-01-01")
+        assert [r[1] for r in conn.execute("SELECT * FROM pragma_table_info('product')")] == [
+            "id", "updated_at",
+        ]
+        for sql in (
+            "DELETE FROM product",
+            "/* select */ UPDATE product SET updated_at = NULL",
+            "PRAGMA writable_schema = 1",
+            "SELECT * FROM pragma_journal_mode",
+            "ATTACH DATABASE ':memory:' AS other",
+        ):
+            with pytest.raises(sqlite3.DatabaseError):
+                conn.execute(sql)
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1; SELECT 2")
+        conn.close()
+
+        with app.app_context():
+            result = MaintenanceTool().execute_read_only_query("DELETE FROM product")
+            assert result == {"success": False, "error": "Only SELECT queries are allowed"}
+
+    def test_wipe_deletes_with_core_statements(self, app, sample_data, monkeypatch):
+        from db_tools.operations import wipe
+
+        # user rows stay referenced by user_tenant, which the wipe keeps
+        monkeypatch.setattr(
+            wipe, "DELETION_ORDER", tuple(t for t in wipe.DELETION_ORDER if t != "user")
+        )
+        with app.app_context():
+            wiper = wipe.DatabaseWiper(app.config["SQLALCHEMY_DATABASE_URI"])
+            result = wiper.wipe(create_backup=False)
+            assert result["success"], result["errors"]
+            assert result["errors"] == []
+            assert result["deleted_counts"]["product"] == 2
+            assert "app_setting" not in result["deleted_counts"]
+            assert db.session.query(Product).count() == 0
+            assert db.session.query(DeliveryNote).count() == 0
+
+    def test_wipe_vacuums_sqlite(self, app, monkeypatch):
+        from db_tools.operations import wipe
+
+        vacuumed = []
+        monkeypatch.setattr(wipe, "DELETION_ORDER", ("audit_log",))
+        monkeypatch.setattr(
+            wipe.DatabaseWiper, "_vacuum", lambda self: vacuumed.append(True)
+        )
+        with app.app_context():
+            wiper = wipe.DatabaseWiper(app.config["SQLALCHEMY_DATABASE_URI"])
+            assert wiper.wipe(create_backup=False, dry_run=True)["success"]
+            assert vacuumed == []
+            assert wiper.wipe(create_backup=False)["success"]
+            assert vacuumed == [True]
+
+    def test_wipe_vacuum_runs_outside_transaction(self, app, tmp_path, monkeypatch):
+        import sqlite3
+
+        from sqlalchemy import create_engine
+
+        from db_tools.operations.wipe import DatabaseWiper
+
+        path = tmp_path / "wipe.db"
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE t (x TEXT)")
+        conn.executemany("INSERT INTO t VALUES (?)", [("x" * 1000,)] * 500)
+        conn.execute("DELETE FROM t")
+        conn.commit()
+        conn.close()
+        size = path.stat().st_size
+
+        engine = create_engine(f"sqlite:///{path}")
+        monkeypatch.setattr(type(db), "engine", property(lambda self: engine))
+        with app.app_context():
+            DatabaseWiper(f"sqlite:///{path}")._vacuum()
+        engine.dispose()
+        assert path.stat().st_size < size
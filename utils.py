@@ -19,10 +19,23 @@ def utc_now() -> datetime.datetime:
     return datetime.datetime.now(timezone.utc)
 
 
+# The HTML date/time inputs always submit these canonical shapes.  They are
+# parsed with the C-level ``fromisoformat`` (no regex, no module lock);
+# anything else falls back to ``strptime`` with the same format.
+
+def _is_iso_date(raw: str) -> bool:
+    return len(raw) == 10 and raw[4] == "-" and raw[7] == "-"
+
+
 def parse_date(raw: Optional[str]) -> Optional[datetime.date]:
     if not raw:
         return None
     try:
+        if _is_iso_date(raw):
+            try:
+                return datetime.date.fromisoformat(raw)
+            except ValueError:
+                pass
         return datetime.datetime.strptime(raw, "%Y-%m-%d").date()
     except (ValueError, TypeError):
         logger.warning("Could not parse date: %r", raw)
@@ -33,6 +46,16 @@ def parse_datetime(raw: Optional[str]) -> Optional[datetime.datetime]:
     if not raw:
         return None
     try:
+        if (
+            len(raw) == 16
+            and _is_iso_date(raw[:10])
+            and raw[10] == "T"
+            and raw[13] == ":"
+        ):
+            try:
+                return datetime.datetime.fromisoformat(raw)
+            except ValueError:
+                pass
         return datetime.datetime.strptime(raw, "%Y-%m-%dT%H:%M")
     except (ValueError, TypeError):
         logger.warning("Could not parse datetime: %r", raw)
@@ -43,6 +66,11 @@ def parse_time(raw: Optional[str]) -> Optional[datetime.time]:
     if not raw:
         return None
     try:
+        if len(raw) == 5 and raw[2] == ":":
+            try:
+                return datetime.time.fromisoformat(raw)
+            except ValueError:
+                pass
         return datetime.datetime.strptime(raw, "%H:%M").time()
     except (ValueError, TypeError):
         logger.warning("Could not parse time: %r", raw)